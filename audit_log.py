@@ -0,0 +1,202 @@
+"""
+Bitácora de auditoría de acciones de admin (solo inserción).
+
+Cada entrada: quién (admin), qué acción, sobre qué entidad (tipo + id),
+cuándo y un JSON con el detalle. La tabla es append-only también en la BD:
+triggers rechazan UPDATE y DELETE (SQLite y Postgres).
+
+Dos formas de escribir:
+
+- `AuditBuffer.append`: la entrada se guarda en memoria y un hilo del
+  worker la inserta en lote (cada AUDIT_FLUSH_INTERVAL segundos o al juntar
+  AUDIT_BATCH_SIZE), un solo INSERT por lote. El request solo paga un
+  append a una deque. Se usa DESPUÉS del commit de la acción (si la acción
+  falla no hay nada que auditar). Si el worker muere antes del flush se
+  pierde lo que estaba en el buffer (como mucho unos segundos).
+- `record`: INSERT en la conexión de la sesión, en la MISMA transacción
+  que la acción; para acciones críticas (borrados): la entrada existe si y
+  solo si la acción se hizo.
+
+Índices: (entity_type, entity_id, created_at) para la historia de una
+entidad y (created_at) para el listado general.
+"""
+import atexit
+import json
+import os
+import threading
+from collections import deque
+from datetime import datetime
+
+from sqlalchemy import DDL, Column, DateTime, Index, Integer, MetaData, String, Table, Text, event, select, tuple_
+
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "50"))
+AUDIT_FLUSH_INTERVAL = float(os.getenv("AUDIT_FLUSH_INTERVAL", "2"))
+AUDIT_BUFFER_MAX = int(os.getenv("AUDIT_BUFFER_MAX", "10000"))
+
+metadata = MetaData()
+
+audit_log = Table(
+    "audit_log", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("created_at", DateTime, nullable=False),
+    Column("actor_id", Integer),                 # sin FK: la bitácora sobrevive a los borrados
+    Column("actor_email", String(100)),
+    Column("action", String(50), nullable=False),
+    Column("entity_type", String(30), nullable=False),
+    Column("entity_id", Integer, nullable=False),
+    Column("details", Text),                     # JSON
+    Index("ix_audit_log_entity", "entity_type", "entity_id", "created_at"),
+    Index("ix_audit_log_created_at", "created_at"),
+)
+
+# Append-only en la BD: nadie (ni la app) puede editar o borrar entradas
+for _name, _op in (("audit_log_no_update", "UPDATE"), ("audit_log_no_delete", "DELETE")):
+    event.listen(audit_log, "after_create", DDL(
+        f"CREATE TRIGGER {_name} BEFORE {_op} ON audit_log "
+        "BEGIN SELECT RAISE(ABORT, 'audit_log es solo de inserción'); END"
+    ).execute_if(dialect="sqlite"))
+
+event.listen(audit_log, "after_create", DDL("""
+    CREATE OR REPLACE FUNCTION audit_log_append_only() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        RAISE EXCEPTION 'audit_log es solo de inserción';
+    END
+    $$
+""").execute_if(dialect="postgresql"))
+event.listen(audit_log, "after_create", DDL(
+    "CREATE TRIGGER audit_log_append_only BEFORE UPDATE OR DELETE ON audit_log "
+    "FOR EACH ROW EXECUTE FUNCTION audit_log_append_only()"
+).execute_if(dialect="postgresql"))
+
+# =========================
+# ENTRADAS
+# =========================
+
+def make_entry(actor, action, entity_type, entity_id, details=None):
+    return {
+        "created_at": datetime.utcnow(),
+        "actor_id": getattr(actor, "id", None),
+        "actor_email": getattr(actor, "email", None),
+        "action": action,
+        "entity_type": entity_type,
+        "entity_id": entity_id,
+        "details": json.dumps(details, ensure_ascii=False, default=str) if details else None,
+    }
+
+
+def record(conn, actor, action, entity_type, entity_id, details=None):
+    """INSERT inmediato con `conn` (la de la sesión); el commit es de quien llama."""
+    conn.execute(audit_log.insert().values(make_entry(actor, action, entity_type, entity_id, details)))
+
+
+class AuditBuffer:
+    """Entradas en memoria del worker, insertadas en lote por un hilo de fondo."""
+
+    def __init__(self, engine, batch_size=AUDIT_BATCH_SIZE, interval=AUDIT_FLUSH_INTERVAL, max_pending=AUDIT_BUFFER_MAX):
+        self.engine = engine
+        self.batch_size = batch_size
+        self.interval = interval
+        self.max_pending = max_pending
+        self.pending = deque()
+        self.metrics = {"appended": 0, "flushed": 0, "batches": 0, "errors": 0, "dropped": 0}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._pid = None
+
+    def append(self, actor, action, entity_type, entity_id, details=None):
+        entry = make_entry(actor, action, entity_type, entity_id, details)
+        with self._lock:
+            if len(self.pending) >= self.max_pending:
+                # BD caída mucho tiempo: se pierde lo más viejo en vez de crecer sin límite
+                self.pending.popleft()
+                self.metrics["dropped"] += 1
+            self.pending.append(entry)
+            self.metrics["appended"] += 1
+            full = len(self.pending) >= self.batch_size
+        self._ensure_thread()
+        if full:
+            self._wake.set()
+
+    def flush(self):
+        """Inserta todo lo pendiente en un solo INSERT; regresa cuántas entradas escribió."""
+        with self._flush_lock:
+            with self._lock:
+                batch = list(self.pending)
+                self.pending.clear()
+            if not batch:
+                return 0
+            try:
+                with self.engine.begin() as conn:
+                    conn.execute(audit_log.insert(), batch)
+            except Exception as e:
+                # Se devuelven al frente (en orden) para el siguiente intento
+                with self._lock:
+                    self.pending.extendleft(reversed(batch))
+                    self.metrics["errors"] += 1
+                print("❌ Error al escribir bitácora de auditoría:", e)
+                return 0
+            self.metrics["flushed"] += len(batch)
+            self.metrics["batches"] += 1
+            return len(batch)
+
+    def _ensure_thread(self):
+        # Un hilo por proceso (gunicorn hace fork después de importar la app)
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            threading.Thread(target=self._run, name="audit-flush", daemon=True).start()
+            atexit.register(self.flush)
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self.flush()
+
+    def snapshot(self):
+        with self._lock:
+            return {**self.metrics, "pending": len(self.pending)}
+
+# =========================
+# LECTURA
+# =========================
+
+def read_page(conn, limit, before=None, entity_type=None, entity_id=None):
+    """
+    Una página, de la más nueva a la más vieja. `before` = (created_at, id) de
+    la última fila de la página anterior (keyset: no hay OFFSET que recorrer).
+    Regresa (filas, cursor de la siguiente página o None).
+    """
+    query = select(audit_log)
+    if entity_type:
+        query = query.where(audit_log.c.entity_type == entity_type)
+        if entity_id is not None:
+            query = query.where(audit_log.c.entity_id == entity_id)
+    if before:
+        query = query.where(tuple_(audit_log.c.created_at, audit_log.c.id) < tuple_(*before))
+    query = query.order_by(audit_log.c.created_at.desc(), audit_log.c.id.desc()).limit(limit + 1)
+
+    rows = [dict(r._mapping) for r in conn.execute(query)]
+    cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        cursor = (rows[-1]["created_at"], rows[-1]["id"])
+    return rows, cursor
+
+
+def format_cursor(cursor):
+    created_at, row_id = cursor
+    return f"{created_at.isoformat()}_{row_id}"
+
+
+def parse_cursor(value):
+    """Inverso de format_cursor; None si no es válido."""
+    try:
+        created_at, row_id = (value or "").rsplit("_", 1)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except ValueError:
+        return None
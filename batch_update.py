@@ -0,0 +1,76 @@
+"""
+UPDATE por bloques (chunks) para migraciones de datos en línea.
+
+En lugar de un único UPDATE sobre toda la tabla (que en Postgres bloquea
+todas las filas afectadas hasta el COMMIT), se recorre la tabla por rangos
+de llave primaria y se hace un commit por bloque. Si el proceso se
+interrumpe, se puede reanudar con `start_after` (último id reportado).
+"""
+import time
+
+from sqlalchemy import text
+
+
+def count_matching(engine, table, where_clause, params=None, pk="id", start_after=None):
+    """Cuenta las filas que un batched_update tocaría (modo dry-run)."""
+    params = dict(params or {})
+    after = ""
+    if start_after is not None:
+        after = f"AND {pk} > :_last"
+        params["_last"] = start_after
+
+    with engine.connect() as conn:
+        return conn.execute(
+            text(f"SELECT COUNT(*) FROM {table} WHERE ({where_clause}) {after}"),
+            params
+        ).scalar()
+
+
+def batched_update(engine, table, set_clause, where_clause, params=None,
+                   chunk_size=1000, pk="id", start_after=None, log=print):
+    """
+    Ejecuta `UPDATE <table> SET <set_clause> WHERE <where_clause>` en bloques
+    de `chunk_size` filas, avanzando por `pk` (keyset) y con un commit por bloque.
+    Regresa el total de filas actualizadas.
+    """
+    params = dict(params or {})
+    last_id = start_after
+    total = 0
+    started = time.monotonic()
+
+    while True:
+        bound_params = {**params, "_limit": chunk_size}
+        after = ""
+        if last_id is not None:
+            after = f"AND {pk} > :_last"
+            bound_params["_last"] = last_id
+
+        with engine.begin() as conn:
+            # Límite superior del siguiente bloque (ids reales, tolera huecos)
+            upper = conn.execute(text(f"""
+                SELECT MAX({pk}) FROM (
+                    SELECT {pk} FROM {table}
+                    WHERE ({where_clause}) {after}
+                    ORDER BY {pk}
+                    LIMIT :_limit
+                ) AS chunk
+            """), bound_params).scalar()
+
+            if upper is None:
+                break
+
+            bound_params["_upper"] = upper
+            result = conn.execute(text(f"""
+                UPDATE {table}
+                SET {set_clause}
+                WHERE ({where_clause}) {after} AND {pk} <= :_upper
+            """), bound_params)
+
+        total += result.rowcount
+        last_id = upper
+        elapsed = time.monotonic() - started
+        rate = total / elapsed if elapsed > 0 else float(total)
+        log(f"   … {table}: {total} filas actualizadas (último {pk}={upper}, "
+            f"{elapsed:.1f}s, {rate:,.0f} filas/s)")
+
+    return total
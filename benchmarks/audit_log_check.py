@@ -0,0 +1,143 @@
+"""
+Verifica la bitácora de auditoría de acciones de admin (audit_log.py).
+
+  1. Los cambios de estatus solo encolan en memoria: el POST no escribe en
+     audit_log y el flush inserta todo el lote con un solo statement.
+  2. Borrar una propuesta o un usuario escribe la entrada en la misma
+     transacción (un rollback no deja entrada); editar un usuario registra
+     los campos cambiados.
+  3. La tabla rechaza UPDATE y DELETE.
+  4. /admin/audit recorre todas las entradas por páginas (keyset) sin
+     repetir ni saltarse ninguna, también filtrado por entidad.
+
+Sale con código 1 si algo no cuadra.
+
+    python benchmarks/audit_log_check.py
+"""
+import argparse
+import html
+import re
+import sys
+import time
+
+from sqlalchemy import func, select, text
+
+from load_test import QueryCounter, check, load_app, make_client, percentile, prepare
+
+
+def walk_pages(client, path):
+    """Sigue los links "Anteriores" y regresa (filas vistas, páginas)."""
+    seen, pages = [], 0
+    while path:
+        resp = client.get(path)
+        assert resp.status_code == 200, (path, resp.status_code)
+        body = resp.get_data(as_text=True)
+        seen += re.findall(r'<td class="px-3 py-4 whitespace-nowrap">([^<]+)</td>', body)
+        pages += 1
+        nxt = re.search(r'<a href="([^"]+)"[^>]*>Anteriores', body)
+        path = html.unescape(nxt.group(1)) if nxt else None
+    return seen, pages
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bitácora de auditoría de admin")
+    parser.add_argument("--candidates", type=int, default=50)
+    parser.add_argument("--proposals", type=int, default=200)
+    parser.add_argument("--changes", type=int, default=120)
+    parser.add_argument("--database-url")
+    args = parser.parse_args(argv)
+
+    c4p = load_app(args.database_url)
+    from audit_log import audit_log, record
+
+    ctx = prepare(c4p, args.candidates, args.proposals, log=lambda *a: None)
+    with c4p.app.app_context():
+        engine = c4p.db.engine
+        counter = QueryCounter(engine)
+        proposals = [(p.id, p.status) for p in c4p.Proposal.query.order_by(c4p.Proposal.id).limit(args.changes)]
+        victim = c4p.User.query.filter(c4p.User.email.notin_(list(c4p.ADMIN_EMAILS))).order_by(c4p.User.id.desc()).first()
+        victim_id, victim_email = victim.id, victim.email
+
+    def count(**where):
+        with engine.connect() as conn:
+            query = select(func.count()).select_from(audit_log)
+            for k, v in where.items():
+                query = query.where(audit_log.c[k] == v)
+            return conn.execute(query).scalar()
+
+    buffer = c4p.audit_buffer
+    buffer.interval = 3600  # el hilo no vacía el buffer a media prueba; se llama flush() a mano
+    buffer.batch_size = 10 ** 6
+    admin = make_client(c4p, ctx, "admin")
+    ok = True
+    start = count()
+
+    # 1. Cambios de estatus: buffer + un INSERT por lote
+    latencies = []
+    for proposal_id, status in proposals:
+        t0 = time.perf_counter()
+        admin.post("/admin/proposals", data={
+            "proposal_id": proposal_id, "new_status": "Aceptada" if status != "Aceptada" else "Rechazada",
+        })
+        latencies.append(time.perf_counter() - t0)
+    print(f"   POST cambio de estatus p50={percentile(sorted(latencies), 50) * 1000:.2f}ms")
+    ok &= check(count() == start and buffer.snapshot()["pending"] == len(proposals),
+                f"{len(proposals)} cambios en el buffer, ninguno escrito todavía")
+
+    batches = buffer.metrics["batches"]
+    with c4p.app.app_context():
+        counter.reset()
+        written = buffer.flush()
+        statements = counter.count
+    ok &= check(written == len(proposals) and count(action="proposal.status") == len(proposals),
+                f"flush escribe las {written} entradas")
+    ok &= check(buffer.metrics["batches"] == batches + 1 and statements <= 2,
+                f"un lote, {statements} statement(s) SQL")
+
+    # 2. Borrados en la misma transacción; ediciones con los campos cambiados
+    with c4p.app.app_context():
+        admin_user = c4p.db.session.get(c4p.User, ctx["admin_id"])
+        record(c4p.db.session.connection(), admin_user, "proposal.delete", "proposal", proposals[0][0])
+        c4p.db.session.rollback()
+    ok &= check(count(action="proposal.delete") == 0, "un borrado revertido no deja entrada")
+
+    admin.post(f"/admin/proposals/{proposals[0][0]}/delete")
+    ok &= check(count(action="proposal.delete", entity_id=proposals[0][0]) == 1, "borrar propuesta -> entrada")
+
+    admin.post(f"/admin/users/{victim_id}/edit", data={"full_name": "Nombre Auditado", "email": victim_email})
+    buffer.flush()
+    with engine.connect() as conn:
+        details = conn.execute(
+            select(audit_log.c.details).where(audit_log.c.action == "user.edit", audit_log.c.entity_id == victim_id)
+        ).scalar()
+    ok &= check(details is not None and "Nombre Auditado" in details and "email" not in details,
+                "editar usuario -> solo los campos que cambiaron")
+
+    admin.post(f"/admin/users/{victim_id}/delete")
+    ok &= check(count(action="user.delete", entity_id=victim_id) == 1, "borrar usuario -> entrada")
+
+    # 3. Append-only
+    for sql in ("UPDATE audit_log SET action = 'x'", "DELETE FROM audit_log"):
+        try:
+            with engine.begin() as conn:
+                conn.execute(text(sql))
+            rejected = False
+        except Exception:
+            rejected = True
+        ok &= check(rejected, f"la BD rechaza: {sql.split()[0]}")
+
+    # 4. Paginación
+    total = count()
+    seen, pages = walk_pages(admin, "/admin/audit")
+    ok &= check(len(seen) == total and pages == -(-total // c4p.AUDIT_PAGE_SIZE),
+                f"{total} entradas en {pages} páginas")
+    seen, _ = walk_pages(admin, f"/admin/audit?entity_type=user&entity_id={victim_id}")
+    ok &= check(len(seen) == 2, "filtro por entidad: historia del usuario (edición + borrado)")
+
+    print(f"   métricas: {admin.get('/health').get_json()['audit_log']}")
+    print("✅ Bitácora de auditoría OK" if ok else "❌ Bitácora de auditoría con fallas")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
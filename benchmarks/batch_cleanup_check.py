@@ -0,0 +1,161 @@
+"""
+Verifica la limpieza de URLs legacy por bloques (cleanup_legacy_columns.py +
+batch_update.py) contra una BD SQLite grande generada.
+
+  1. --dry-run cuenta exactamente las filas legacy y no modifica nada.
+  2. batched_update hace un commit por bloque (ceil(filas / chunk) commits,
+     más el de la última consulta que ya no encuentra filas).
+  3. Si se interrumpe a medio camino, lo ya procesado queda guardado y
+     --start-after (último id del log) termina el resto.
+  4. Estado final: ninguna URL "/uploads/%", las demás intactas.
+
+Sale con código 1 si algo no cuadra.
+
+    python benchmarks/batch_cleanup_check.py --rows 400000
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import re
+import sqlite3
+import sys
+import tempfile
+import time
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, BASE_DIR)
+
+from sqlalchemy import event, text  # noqa: E402
+
+import cleanup_legacy_columns  # noqa: E402
+from batch_update import batched_update, count_matching  # noqa: E402
+from db_engine import create_engine_for  # noqa: E402
+from load_test import check  # noqa: E402
+
+LEGACY_SHARE = 0.3
+
+
+class Interrupted(Exception):
+    pass
+
+
+def generate(path, rows, seed=1):
+    """profiles y proposals con ~LEGACY_SHARE de URLs "/uploads/..." y huecos en los ids."""
+    rng = random.Random(seed)
+    expected = {}
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE profiles (id INTEGER PRIMARY KEY, cv_url VARCHAR(255));
+        CREATE TABLE proposals (id INTEGER PRIMARY KEY, supporting_doc_url VARCHAR(255));
+    """)
+    for table, column, n in (("profiles", "cv_url", rows // 4), ("proposals", "supporting_doc_url", rows)):
+        batch, legacy, next_id = [], 0, 0
+        for _ in range(n):
+            next_id += rng.choice((1, 1, 1, 2, 5))   # huecos (filas borradas)
+            roll = rng.random()
+            if roll < LEGACY_SHARE:
+                url, legacy = f"/uploads/{table}/{next_id}.pdf", legacy + 1
+            elif roll < 0.9:
+                url = f"https://res.cloudinary.com/demo/raw/upload/v1/c4p/{table}/{next_id}.pdf"
+            else:
+                url = None
+            batch.append((next_id, url))
+        conn.executemany(f"INSERT INTO {table} (id, {column}) VALUES (?, ?)", batch)
+        expected[table] = {"rows": n, "legacy": legacy, "kept": sum(1 for _, u in batch if u and not u.startswith("/uploads/"))}
+    conn.commit()
+    conn.close()
+    return expected
+
+
+def run_cli(*argv):
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        cleanup_legacy_columns.main(list(argv))
+    return out.getvalue()
+
+
+def state(engine, table, column):
+    with engine.connect() as conn:
+        legacy = conn.execute(text(f"SELECT COUNT(*) FROM {table} WHERE {column} LIKE '/uploads/%'")).scalar()
+        kept = conn.execute(text(f"SELECT COUNT(*) FROM {table} WHERE {column} IS NOT NULL")).scalar()
+    return legacy, kept
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Limpieza legacy por bloques contra una BD grande")
+    parser.add_argument("--rows", type=int, default=200000, help="filas de proposals (profiles: rows/4)")
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    args = parser.parse_args(argv)
+
+    path = os.path.join(tempfile.mkdtemp(prefix="c4p-cleanup-"), "cleanup.db")
+    url = f"sqlite:///{path}"
+    t0 = time.perf_counter()
+    expected = generate(path, args.rows)
+    print(f"🌱 BD generada en {time.perf_counter() - t0:.1f}s: {expected}")
+    engine = create_engine_for(url)
+    ok = True
+
+    # 1. Dry-run
+    out = run_cli("--database-url", url, "--dry-run")
+    counts = {t: int(n) for t, n in re.findall(r"(\w+): (\d+) filas por limpiar", out)}
+    ok &= check(counts == {t: e["legacy"] for t, e in expected.items()}, f"--dry-run cuenta las filas legacy {counts}")
+    ok &= check(state(engine, "proposals", "supporting_doc_url")[0] == expected["proposals"]["legacy"],
+                "--dry-run no modifica nada")
+
+    # 2 y 3. Bloques con commit propio; interrupción y reanudación
+    commits = []
+    event.listen(engine, "commit", lambda conn: commits.append(1))
+    done_ids = []
+
+    def interrupt_after_three(line):
+        m = re.search(r"último id=(\d+)", line)
+        if m:
+            done_ids.append(int(m.group(1)))
+        if len(done_ids) == 3:
+            raise Interrupted()
+
+    set_clause, where_clause = cleanup_legacy_columns.CLEANUPS["proposals"]
+    try:
+        batched_update(engine, "proposals", set_clause, where_clause,
+                       chunk_size=args.chunk_size, log=interrupt_after_three)
+    except Interrupted:
+        pass
+    legacy_left = state(engine, "proposals", "supporting_doc_url")[0]
+    ok &= check(len(commits) == 3 and legacy_left == expected["proposals"]["legacy"] - 3 * args.chunk_size,
+                f"interrumpido tras 3 bloques: {len(commits)} commits, {3 * args.chunk_size} filas guardadas")
+    ok &= check(count_matching(engine, "proposals", where_clause, start_after=done_ids[-1]) == legacy_left,
+                f"--start-after {done_ids[-1]}: quedan {legacy_left} filas")
+
+    commits.clear()
+    t0 = time.perf_counter()
+    out = run_cli("--database-url", url, "--only", "proposals", "--start-after", str(done_ids[-1]),
+                  "--chunk-size", str(args.chunk_size))
+    elapsed = time.perf_counter() - t0
+    resumed = int(re.search(r"proposals: (\d+) filas limpiadas", out).group(1))
+    ok &= check(resumed == legacy_left, f"reanudado: {resumed} filas en {elapsed:.1f}s")
+
+    # Conteo exacto de commits por bloque
+    commits.clear()
+    set_clause, where_clause = cleanup_legacy_columns.CLEANUPS["profiles"]
+    n = batched_update(engine, "profiles", set_clause, where_clause, chunk_size=args.chunk_size, log=lambda *a: None)
+    chunks = -(-expected["profiles"]["legacy"] // args.chunk_size)
+    # + 1: la última consulta (ya sin filas) también abre y cierra su transacción
+    ok &= check(n == expected["profiles"]["legacy"] and len(commits) == chunks + 1,
+                f"profiles: {n} filas en {len(commits)} commits (uno por bloque de {args.chunk_size})")
+
+    # 4. Estado final
+    for table, column in (("profiles", "cv_url"), ("proposals", "supporting_doc_url")):
+        legacy, kept = state(engine, table, column)
+        ok &= check(legacy == 0 and kept == expected[table]["kept"],
+                    f"{table}: 0 URLs legacy, {kept} URLs válidas intactas")
+    out = run_cli("--database-url", url, "--dry-run")
+    ok &= check("proposals: 0 filas por limpiar" in out, "una segunda corrida no tiene nada que hacer")
+
+    print("✅ Limpieza por bloques OK" if ok else "❌ Limpieza por bloques con fallas")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
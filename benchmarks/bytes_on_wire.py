@@ -0,0 +1,107 @@
+"""
+Bytes transferidos por ruta, sin compresión vs gzip/brotli.
+
+Usa una BD SQLite temporal (no toca la BD real) y el test client de Flask:
+
+    python benchmarks/bytes_on_wire.py
+    python benchmarks/bytes_on_wire.py --json bytes_on_wire.json
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, BASE_DIR)
+
+_tmpdir = tempfile.mkdtemp(prefix="c4p-bench-")
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(_tmpdir, "bench.db")
+os.environ.setdefault("SECRET_KEY", "bench")
+
+from load_test import migrate_schema  # noqa: E402
+
+migrate_schema(os.environ["DATABASE_URL"])
+
+import call_for_papers_app as c4p  # noqa: E402
+
+
+def seed_candidate():
+    with c4p.app.app_context():
+        user = c4p.User(
+            full_name="Candidata Benchmark",
+            email="bench@example.com",
+            password_hash="x",
+            unique_password="x",
+        )
+        c4p.db.session.add(user)
+        c4p.db.session.flush()
+        c4p.db.session.add(c4p.Profile(
+            user_id=user.id, phone="5555555555", country="México",
+            cv_url="https://example.com/cv.pdf", photo_url="https://example.com/foto.jpg",
+        ))
+        for venue in ("Colombia, Cartagena", "México, Monterrey", "Chile, Santiago"):
+            c4p.db.session.add(c4p.Proposal(
+                user_id=user.id, title="Propuesta benchmark", session_type="DOCUMENTO",
+                instructional_objective="-", detailed_process="-", learning_outcome="-",
+                category="Documento", supporting_doc_url="https://example.com/p.pdf",
+                video_url="https://example.com/p.pdf", venue=venue,
+            ))
+        c4p.db.session.commit()
+
+        admin = c4p.User.query.filter(c4p.User.email.in_(list(c4p.ADMIN_EMAILS))).first()
+        return user.id, admin.id
+
+
+def measure(client, path, user_id):
+    with client.session_transaction() as sess:
+        if user_id:
+            sess["user_id"] = user_id
+        else:
+            sess.pop("user_id", None)
+
+    sizes = {}
+    for label, accept in (("identity", "identity"), ("gzip", "gzip"), ("br", "br, gzip")):
+        resp = client.get(path, headers={"Accept-Encoding": accept})
+        sizes[label] = len(resp.get_data())
+        sizes[f"{label}_encoding"] = resp.headers.get("Content-Encoding", "identity")
+        sizes["status"] = resp.status_code
+    return sizes
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--json", help="escribe los resultados en este archivo")
+    args = parser.parse_args()
+
+    c4p.limiter.enabled = False
+    c4p.app.config["SESSION_COOKIE_SECURE"] = False
+    candidate_id, admin_id = seed_candidate()
+    client = c4p.app.test_client()
+
+    css_path = c4p.BASE_CSS.split('href="', 1)[1].split('"', 1)[0]
+    routes = [
+        ("/", None),
+        ("/profile", candidate_id),
+        ("/submit", candidate_id),
+        ("/proposals", candidate_id),
+        ("/admin/proposals", admin_id),
+        ("/admin/passwords", admin_id),
+        (css_path, None),
+    ]
+
+    results = {}
+    print(f"{'ruta':<40} {'identity':>9} {'gzip':>9} {'br':>9}")
+    for path, user_id in routes:
+        r = measure(client, path, user_id)
+        results[path] = r
+        br = f"{r['br']}" if r["br_encoding"] == "br" else "n/a"
+        print(f"{path:<40} {r['identity']:>9} {r['gzip']:>9} {br:>9}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Registros simultáneos con el mismo correo (POST /register).
+
+Varios procesos (como workers de gunicorn, multiprocessing "spawn") intentan
+registrar la MISMA lista de correos, cada uno en otro orden, arrancando a la
+vez. Por cada correo debe haber exactamente un registro exitoso (redirect a
+/profile) y el resto debe recibir el aviso de duplicado (redirect a /); ningún
+500 ni IntegrityError, y en la BD una sola fila por correo. Sale con código 1
+si algo no cuadra.
+
+    python benchmarks/concurrent_registration.py
+    python benchmarks/concurrent_registration.py --workers 8 --emails 50
+    python benchmarks/concurrent_registration.py --database-url postgresql+psycopg://localhost/c4p_bench
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+
+EMAIL_DOMAIN = "registro.example.com"
+
+
+def emails_for(count):
+    return [f"candidato{i}@{EMAIL_DOMAIN}" for i in range(count)]
+
+
+def worker(database_url, emails, seed, ready, start_event, results):
+    stats = {"created": [], "duplicate": 0, "errors": 0, "latencies": []}
+    signalled = False
+    try:
+        from load_test import load_app
+
+        c4p = load_app(database_url)
+        client = c4p.app.test_client()
+        order = list(emails)
+        random.Random(seed).shuffle(order)
+        ready.release()
+        signalled = True
+        start_event.wait()
+
+        for email in order:
+            t0 = time.perf_counter()
+            resp = client.post("/register", data={"full_name": "Candidato Registro", "email": email})
+            stats["latencies"].append(time.perf_counter() - t0)
+            if resp.status_code == 302 and resp.location.endswith("/profile"):
+                stats["created"].append(email)
+            elif resp.status_code == 302:
+                stats["duplicate"] += 1
+            else:
+                stats["errors"] += 1
+    except Exception as e:
+        stats["errors"] += 1
+        print(f"❌ worker {os.getpid()}: {type(e).__name__}: {str(e).splitlines()[0]}")
+    finally:
+        if not signalled:
+            ready.release()
+        results.put(stats)
+
+
+def _prepare(database_url):
+    # Crea tablas y admins una vez, antes de que los workers compitan
+    from load_test import load_app
+    load_app(database_url)
+
+
+def count_rows(database_url):
+    from sqlalchemy import text
+
+    from db_engine import create_engine_for
+
+    engine = create_engine_for(database_url)
+    with engine.connect() as conn:
+        rows = conn.execute(
+            text("SELECT email, COUNT(*) FROM users WHERE email LIKE :pattern GROUP BY email"),
+            {"pattern": f"%@{EMAIL_DOMAIN}"},
+        ).all()
+        # Limpia para poder repetir la prueba sobre la misma BD
+        conn.execute(text("DELETE FROM users WHERE email LIKE :pattern"), {"pattern": f"%@{EMAIL_DOMAIN}"})
+        conn.commit()
+    engine.dispose()
+    return dict(rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Registros concurrentes con correos repetidos")
+    parser.add_argument("--database-url")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--emails", type=int, default=20, help="correos distintos; cada worker intenta todos")
+    args = parser.parse_args(argv)
+
+    if not args.database_url:
+        tmpdir = tempfile.mkdtemp(prefix="c4p-register-")
+        args.database_url = "sqlite:///" + os.path.join(tmpdir, "register.db")
+    os.environ.setdefault("SECRET_KEY", "bench")
+
+    ctx = multiprocessing.get_context("spawn")
+    prep = ctx.Process(target=_prepare, args=(args.database_url,))
+    prep.start()
+    prep.join()
+
+    emails = emails_for(args.emails)
+    ready = ctx.Semaphore(0)
+    start_event = ctx.Event()
+    results = ctx.Queue()
+    procs = [
+        ctx.Process(target=worker, args=(args.database_url, emails, i, ready, start_event, results))
+        for i in range(args.workers)
+    ]
+    for p in procs:
+        p.start()
+    for _ in procs:
+        ready.acquire()
+    started = time.perf_counter()
+    start_event.set()
+    collected = [results.get() for _ in procs]
+    elapsed = time.perf_counter() - started
+    for p in procs:
+        p.join()
+
+    from load_test import percentile
+
+    created = [e for r in collected for e in r["created"]]
+    duplicate = sum(r["duplicate"] for r in collected)
+    errors = sum(r["errors"] for r in collected)
+    lat = sorted(x for r in collected for x in r["latencies"])
+    rows = count_rows(args.database_url)
+
+    print(f"   intentos={len(lat)} creados={len(created)} duplicados={duplicate} errores={errors} "
+          f"p50={percentile(lat, 50) * 1000:.0f}ms p99={percentile(lat, 99) * 1000:.0f}ms "
+          f"({len(lat) / elapsed:.1f} req/s)")
+
+    ok = (
+        errors == 0
+        and sorted(created) == sorted(emails)
+        and duplicate == len(emails) * (args.workers - 1)
+        and rows == {e: 1 for e in emails}
+    )
+    print("✅ Un registro por correo, sin errores" if ok else "❌ Registros duplicados o con error")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+    sys.exit(main())
@@ -0,0 +1,145 @@
+"""
+Verifica los contadores del tablero (proposal_stats.py) contra un recálculo.
+
+Siembra la BD, concilia y luego hace operaciones al azar con el test client:
+envíos de propuestas, cambios de estatus, borrado de propuestas y de
+candidatos (con sus propuestas). Después de cada ronda, la conciliación en
+modo verificación no debe encontrar diferencias. También revisa que un flush
+que se revierte no deje contadores movidos y que /admin/dashboard sea más
+rápido con los contadores que con el GROUP BY sobre proposals que reemplazan
+(la lectura de los contadores no crece con la tabla; el GROUP BY sí).
+Sale con código 1 si algo no cuadra.
+
+    python benchmarks/dashboard_counters_check.py
+    python benchmarks/dashboard_counters_check.py --rounds 10 --ops 30 --proposals 30000
+"""
+import argparse
+import random
+import sys
+import time
+
+from load_test import QueryCounter, check, load_app, make_client, percentile, prepare, submit_data
+
+STATUSES = ["En revisión", "Aceptada", "Rechazada", "En reserva"]
+
+
+def random_op(c4p, ctx, rng, candidate, admin):
+    with c4p.app.app_context():
+        ids = [pid for (pid,) in c4p.db.session.query(c4p.Proposal.id).all()]
+    roll = rng.random()
+    if roll < 0.35 or not ids:
+        resp = candidate.post("/submit", data=submit_data(None), content_type="multipart/form-data")
+        return "submit", resp.status_code == 302
+    if roll < 0.75:
+        resp = admin.post("/admin/proposals", data={"proposal_id": rng.choice(ids), "new_status": rng.choice(STATUSES)})
+        return "status", resp.status_code == 302
+    if roll < 0.95:
+        resp = admin.post(f"/admin/proposals/{rng.choice(ids)}/delete")
+        return "delete", resp.status_code == 302
+    with c4p.app.app_context():
+        owner = c4p.db.session.get(c4p.Proposal, rng.choice(ids)).user_id
+    if owner == ctx["candidate_id"]:  # el que envía sigue existiendo
+        return "skip", True
+    resp = admin.post(f"/admin/users/{owner}/delete")
+    return "delete_user", resp.status_code == 302
+
+
+def check_rollback(c4p, engine, reconcile):
+    with c4p.app.app_context():
+        user_id = c4p.User.query.filter(c4p.User.role != "admin").first().id
+        c4p.db.session.add(c4p.Proposal(
+            user_id=user_id, title="rollback", session_type="DOCUMENTO",
+            instructional_objective="-", detailed_process="-", learning_outcome="-",
+            category="-", video_url="-", venue="México, Monterrey",
+        ))
+        c4p.db.session.flush()
+        c4p.db.session.rollback()
+    diff = reconcile(engine, fix=False)
+    return not diff["status"] and not diff["daily"]
+
+
+def time_route(client, path, counter, n=20):
+    latencies, queries = [], []
+    for _ in range(n):
+        counter.reset()
+        t0 = time.perf_counter()
+        client.get(path)
+        latencies.append(time.perf_counter() - t0)
+        queries.append(counter.count)
+    return percentile(sorted(latencies), 50) * 1000, max(queries)
+
+
+def time_read(engine, read, n=20):
+    latencies = []
+    for _ in range(n):
+        with engine.connect() as conn:
+            t0 = time.perf_counter()
+            read(conn)
+            latencies.append(time.perf_counter() - t0)
+    return percentile(sorted(latencies), 50) * 1000
+
+
+def compare_dashboard(c4p, engine, admin, counter):
+    """Misma ruta leyendo los contadores vs con el GROUP BY sobre proposals que reemplazan."""
+    from proposal_stats import read_summary, recompute
+
+    p50, queries = time_route(admin, "/admin/dashboard", counter)
+    c4p.read_summary = recompute
+    try:
+        p50_group_by, _ = time_route(admin, "/admin/dashboard", counter)
+    finally:
+        c4p.read_summary = read_summary
+    read_ms, group_by_ms = time_read(engine, read_summary), time_read(engine, recompute)
+    print(f"   lectura: contadores p50={read_ms:.2f}ms, GROUP BY p50={group_by_ms:.2f}ms")
+    return check(p50 < p50_group_by,
+                 f"/admin/dashboard p50={p50:.2f}ms sql={queries} con contadores vs {p50_group_by:.2f}ms con GROUP BY")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Contadores del tablero vs recálculo")
+    parser.add_argument("--candidates", type=int, default=200)
+    parser.add_argument("--proposals", type=int, default=3000)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--ops", type=int, default=20, help="operaciones por ronda")
+    parser.add_argument("--seed", type=int, default=43)
+    parser.add_argument("--database-url")
+    args = parser.parse_args(argv)
+
+    c4p = load_app(args.database_url)
+    from proposal_stats import reconcile
+
+    ctx = prepare(c4p, args.candidates, args.proposals, log=lambda *a: None)
+    with c4p.app.app_context():
+        engine = c4p.db.engine
+        counter = QueryCounter(engine)
+    candidate = make_client(c4p, ctx, "candidate")
+    admin = make_client(c4p, ctx, "admin")
+    rng = random.Random(args.seed)
+    ok = True
+
+    diff = reconcile(engine, fix=False)
+    ok &= check(not diff["status"] and not diff["daily"], "tras el seed + conciliación los contadores cuadran")
+
+    for r in range(args.rounds):
+        done = {}
+        failed = 0
+        for _ in range(args.ops):
+            kind, success = random_op(c4p, ctx, rng, candidate, admin)
+            done[kind] = done.get(kind, 0) + 1
+            failed += not success
+        diff = reconcile(engine, fix=False)
+        mismatches = len(diff["status"]) + len(diff["daily"])
+        ok &= check(mismatches == 0 and not failed, f"ronda {r + 1} {done}: {mismatches} diferencias")
+        if mismatches:
+            print(f"      {diff}")
+
+    ok &= check(check_rollback(c4p, engine, reconcile), "un flush revertido no mueve los contadores")
+
+    ok &= compare_dashboard(c4p, engine, admin, counter)
+
+    print("✅ Contadores del tablero OK" if ok else "❌ Contadores del tablero con diferencias")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+"""
+Simula caídas de la BD y revisa la capa de resiliencia (db_resilience.py).
+
+Reemplaza el connect del driver por uno que falla a voluntad y vacía el pool
+para forzar conexiones nuevas:
+
+  1. parpadeo: las 2 primeras conexiones fallan -> el request responde bien
+     gracias a los reintentos con backoff;
+  2. caída: toda conexión falla -> tras DB_BREAKER_THRESHOLD fallas el
+     breaker se abre y los requests responden 503 sin tocar la BD;
+  3. recuperación: pasado DB_BREAKER_RESET_SECONDS un intento de prueba
+     cierra el breaker y todo vuelve a responder.
+
+Reporta intentos de conexión por request y latencias, y sale con código 1 si
+algo no cuadra.
+
+    python benchmarks/db_outage_sim.py
+    python benchmarks/db_outage_sim.py --requests 40
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+os.environ.setdefault("DB_BREAKER_RESET_SECONDS", "1")
+os.environ.setdefault("DB_RETRY_BASE_DELAY", "0.05")
+
+from load_test import check, load_app, make_client, percentile, prepare  # noqa: E402
+
+
+class FlakyDriver:
+    """Envuelve dialect.connect: falla las próximas `fail_next` conexiones o todas si `down`."""
+
+    def __init__(self, dialect):
+        self.dialect = dialect
+        self.real_connect = dialect.connect
+        self.error_cls = dialect.loaded_dbapi.OperationalError
+        self.fail_next = 0
+        self.down = False
+        self.attempts = 0
+        self.lock = threading.Lock()
+        dialect.connect = self.connect
+
+    def connect(self, *cargs, **cparams):
+        with self.lock:
+            self.attempts += 1
+            fail = self.down or self.fail_next > 0
+            if self.fail_next > 0:
+                self.fail_next -= 1
+        if fail:
+            raise self.error_cls("could not connect to server: Connection refused (simulado)")
+        return self.real_connect(*cargs, **cparams)
+
+
+def timed_get(client, path):
+    t0 = time.perf_counter()
+    resp = client.get(path)
+    return resp, time.perf_counter() - t0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Caídas simuladas de la BD")
+    parser.add_argument("--requests", type=int, default=20, help="requests durante la caída")
+    args = parser.parse_args(argv)
+
+    c4p = load_app()
+    ctx = prepare(c4p, candidates=10, proposals=10, log=lambda *a: None)
+    client = make_client(c4p, ctx, "candidate")
+
+    with c4p.app.app_context():
+        engine = c4p.db.engine
+    guard = c4p.guard_for(engine)
+    driver = FlakyDriver(engine.dialect)
+    ok = True
+
+    # 1. Parpadeo
+    driver.fail_next = 2
+    engine.dispose()
+    before = dict(guard.metrics)
+    resp, _ = timed_get(client, "/proposals")
+    ok &= check(resp.status_code == 200, "parpadeo de 2 conexiones: el request responde 200")
+    ok &= check(guard.metrics["retries"] - before["retries"] == 2, "se contaron 2 reintentos")
+
+    # 2. Caída
+    driver.down = True
+    engine.dispose()
+    attempts_before = driver.attempts
+    statuses, latencies, attempts_per_request = [], [], []
+    for _ in range(args.requests):
+        a0 = driver.attempts
+        resp, elapsed = timed_get(client, "/proposals")
+        statuses.append(resp.status_code)
+        latencies.append(elapsed)
+        attempts_per_request.append(driver.attempts - a0)
+
+    threshold = guard.breaker.threshold
+    opened_after = next((i for i, n in enumerate(attempts_per_request) if n == 0), None)
+    fast = sorted(latencies[opened_after:]) if opened_after is not None else []
+    print(f"   caída: {args.requests} requests, {driver.attempts - attempts_before} intentos de conexión "
+          f"(sin resiliencia: {args.requests * 3}+)")
+    print(f"   intentos por request: {attempts_per_request}")
+    if fast:
+        print(f"   con el breaker abierto: p50={percentile(fast, 50) * 1000:.2f}ms "
+              f"p99={percentile(fast, 99) * 1000:.2f}ms")
+    ok &= check(all(s == 503 for s in statuses), "todas las respuestas son 503 (no 500)")
+    ok &= check(opened_after == threshold, f"el breaker se abre tras {threshold} fallas")
+    ok &= check(guard.breaker.state == "open", "estado del breaker: open")
+    ok &= check(resp.headers.get("Retry-After") is not None, "503 con Retry-After")
+
+    health = client.get("/health")
+    body = health.get_json()
+    ok &= check(health.status_code == 500 and body["resilience"]["primary"]["state"] == "open",
+                "/health reporta la BD caída y el breaker abierto")
+
+    # 3. Recuperación
+    driver.down = False
+    time.sleep(guard.breaker.reset_seconds + 0.1)
+    resp, _ = timed_get(client, "/proposals")
+    ok &= check(resp.status_code == 200, "tras el reset, el intento de prueba responde 200")
+    ok &= check(guard.breaker.state == "closed", "estado del breaker: closed")
+
+    body = client.get("/health").get_json()
+    print(f"   métricas: {body['resilience']['primary']}")
+    print("✅ Resiliencia OK" if ok else "❌ Resiliencia con fallas")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,315 @@
+"""
+Verifica la detección de propuestas casi duplicadas (near_duplicates.py).
+
+  1. Precisión / recall con variantes sintéticas de --originals propuestas:
+     - casi duplicados (deben marcarse): mismo texto con otro formato y
+       nombre de archivo, ~15% de oraciones cambiadas, párrafos en otro orden
+       con otro título/empresa;
+     - no duplicados: reescrituras de la mayor parte del texto y propuestas
+       distintas del mismo tema y empresa.
+     También contra la Jaccard exacta de los shingles (qué pierde el LSH).
+  2. Latencia de búsqueda en el índice por propuesta con --documents firmas
+     (debe ser < 1ms); la firma se calcula aparte, en el pool del extractor.
+  3. De punta a punta: dos cuentas suben la misma charla con distinto
+     archivo; el extractor marca el par, /admin/duplicates lo muestra y
+     /admin/proposals pone el aviso; --rebuild llega a los mismos pares; el
+     mismo archivo reenviado desde otra cuenta también se marca.
+  4. Extractores concurrentes: un id más bajo que llega después se carga en
+     el índice, y re-extraer un documento ya firmado no falla.
+
+Sale con código 1 si algo no cuadra.
+
+    python benchmarks/duplicate_check.py --originals 200 --documents 2000
+"""
+import argparse
+import io
+import itertools
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from load_test import check, load_app, make_client, percentile, prepare
+from synthetic_docs import make_docx, make_pdf, proposal_text, sentence
+
+MIN_PRECISION = 0.95
+MIN_RECALL = 0.95
+
+
+# =========================
+# VARIANTES
+# =========================
+
+def split(text):
+    """(encabezado, oraciones) de un texto de proposal_text."""
+    lines = text.split("\n")
+    body = " ".join(lines[2:])
+    return lines[:2], [s.strip() + "." for s in body.split(".") if s.strip()]
+
+
+def join(header, sentences):
+    paragraphs = [" ".join(sentences[i:i + 5]) for i in range(0, len(sentences), 5)]
+    return "\n".join(header + paragraphs)
+
+
+def reformat(rng, text):
+    """Mismo contenido: otro formato (mayúsculas, saltos, puntuación)."""
+    header, sentences = split(text)
+    return "\n\n".join([header[0].upper(), header[1]] + [s.replace(",", " ,") for s in sentences])
+
+
+def edit(rng, text, fraction):
+    """Cambia `fraction` de las oraciones por otras."""
+    header, sentences = split(text)
+    for i in rng.sample(range(len(sentences)), int(len(sentences) * fraction)):
+        sentences[i] = sentence(rng)
+    return join(header, sentences)
+
+
+def reorder(rng, text):
+    """Párrafos en otro orden, otro título y empresa, y algunas oraciones cambiadas."""
+    header, sentences = split(edit(rng, text, 0.05))
+    paragraphs = [sentences[i:i + 5] for i in range(0, len(sentences), 5)]
+    rng.shuffle(paragraphs)
+    return join([f"Versión revisada: {header[0]}", "Presentado por otra empresa."], list(itertools.chain(*paragraphs)))
+
+
+NEAR = {"formato": reformat, "15% editado": lambda rng, t: edit(rng, t, 0.15), "reordenado": reorder}
+FAR = {"reescrito 70%": lambda rng, t: edit(rng, t, 0.7)}
+
+
+def build_corpus(rng, originals):
+    """[(doc_id, familia, tipo, texto)]: los casi duplicados comparten familia."""
+    corpus = []
+    for family in range(originals):
+        base = proposal_text(rng)
+        corpus.append((family, "original", base))
+        for kind, make in NEAR.items():
+            corpus.append((family, kind, make(rng, base)))
+        for kind, make in FAR.items():
+            corpus.append((f"{family}-{kind}", kind, make(rng, base)))
+        # Misma empresa y tema, otra charla
+        header = base.split("\n")[0]
+        topic, _, company = header.partition(" en ")
+        corpus.append((f"{family}-tema", "mismo tema", proposal_text(rng, topic=topic, company=company)))
+    rng.shuffle(corpus)
+    return [(doc_id, family, kind, text) for doc_id, (family, kind, text) in enumerate(corpus, start=1)]
+
+
+def precision_recall(flagged, truth):
+    tp = len(flagged & truth)
+    precision = tp / len(flagged) if flagged else 1.0
+    recall = tp / len(truth) if truth else 1.0
+    return precision, recall
+
+# =========================
+# CHECKS
+# =========================
+
+def check_quality(args, pool):
+    from near_duplicates import NEAR_DUP_THRESHOLD, LshIndex, minhash, shingles
+
+    rng = random.Random(11)
+    corpus = build_corpus(rng, args.originals)
+    t0 = time.perf_counter()
+    signatures = list(pool.map(minhash, [text for *_, text in corpus], chunksize=8))
+    elapsed = time.perf_counter() - t0
+    print(f"   {len(corpus)} firmas en {elapsed:.1f}s ({elapsed / len(corpus) * 1000:.1f}ms c/u con {args.workers} procesos)")
+
+    # Como en el extractor: cada documento contra los que ya estaban
+    index = LshIndex()
+    flagged = set()
+    for (doc_id, *_), signature in zip(corpus, signatures):
+        flagged |= {frozenset((doc_id, m)) for m, _ in index.find(signature)}
+        index.add(doc_id, signature)
+
+    by_family = {}
+    for doc_id, family, kind, _ in corpus:
+        by_family.setdefault(family, []).append(doc_id)
+    truth = {frozenset(p) for ids in by_family.values() for p in itertools.combinations(ids, 2)}
+
+    ok = True
+    precision, recall = precision_recall(flagged, truth)
+    ok &= check(precision >= MIN_PRECISION and recall >= MIN_RECALL,
+                f"variantes sintéticas: precisión {precision:.3f}, recall {recall:.3f} "
+                f"({len(truth)} pares casi duplicados, {len(flagged)} marcados)")
+
+    kinds = {doc_id: kind for doc_id, _, kind, _ in corpus}
+    for kind in NEAR:
+        pairs = {p for p in truth if kind in {kinds[d] for d in p}}
+        found = len(pairs & flagged)
+        print(f"      {kind}: {found}/{len(pairs)} pares detectados")
+    for kind in list(FAR) + ["mismo tema"]:
+        wrong = sum(1 for p in flagged - truth if kind in {kinds[d] for d in p})
+        print(f"      {kind}: {wrong} falsos positivos")
+
+    # Contra la Jaccard exacta (subconjunto: todos los pares es cuadrático)
+    sample = corpus[:min(len(corpus), 300)]
+    sets = {doc_id: shingles(text) for doc_id, _, _, text in sample}
+    exact = {
+        frozenset((a, b)) for a, b in itertools.combinations(sets, 2)
+        if len(sets[a] & sets[b]) / len(sets[a] | sets[b]) >= NEAR_DUP_THRESHOLD
+    }
+    ids = set(sets)
+    sampled_flags = {p for p in flagged if p <= ids}
+    precision, recall = precision_recall(sampled_flags, exact)
+    ok &= check(precision >= 0.9 and recall >= 0.9,
+                f"contra Jaccard exacta >= {NEAR_DUP_THRESHOLD} ({len(sample)} docs): precisión {precision:.3f}, recall {recall:.3f}")
+    return ok
+
+
+def check_latency(args, pool):
+    from near_duplicates import LshIndex, minhash
+
+    rng = random.Random(5)
+    texts = [proposal_text(rng, sentences=rng.randint(25, 60)) for _ in range(args.documents)]
+    signatures = [s for s in pool.map(minhash, texts, chunksize=16) if s is not None]
+    index = LshIndex()
+    for doc_id, signature in enumerate(signatures[:-200], start=1):
+        index.add(doc_id, signature)
+
+    latencies, candidates = [], []
+    for signature in signatures[-200:]:
+        t0 = time.perf_counter()
+        index.find(signature)
+        latencies.append(time.perf_counter() - t0)
+        candidates.append(len(index.candidates(signature)))
+    latencies.sort()
+    p50, p99 = percentile(latencies, 50) * 1000, percentile(latencies, 99) * 1000
+    print(f"   índice con {len(index)} firmas: {sum(candidates) / len(candidates):.1f} candidatos por consulta")
+    return check(p99 < 1.0, f"búsqueda por propuesta p50={p50 * 1000:.0f}µs, p99={p99 * 1000:.0f}µs (< 1ms)")
+
+
+def check_end_to_end(c4p, pool):
+    from near_duplicates import duplicate_flags, rebuild
+    from proposal_search import extract_once
+    from storage import LocalStorage
+
+    c4p.storage = LocalStorage(tempfile.mkdtemp(prefix="c4p-dup-"), url_prefix="/files")
+    ctx = prepare(c4p, 20, 20, log=lambda *a: None)
+    with c4p.app.app_context():
+        engine = c4p.db.engine
+        other = c4p.User.query.filter(
+            c4p.User.id != ctx["candidate_id"], c4p.User.email.notin_(list(c4p.ADMIN_EMAILS))
+        ).first()
+        other_id = other.id
+
+    def pairs():
+        with engine.connect() as conn:
+            return sorted((r.doc_id, r.match_doc_id) for r in conn.execute(duplicate_flags.select()))
+
+    def submit(client, data, filename, venue):
+        resp = client.post("/submit", data={
+            "venues": [venue], "proposal_file": (io.BytesIO(data), filename),
+        }, content_type="multipart/form-data")
+        assert resp.status_code == 302, resp.status_code
+
+    rng = random.Random(3)
+    talk = proposal_text(rng)
+    first = make_client(c4p, ctx, "candidate")
+    second = c4p.app.test_client()
+    with second.session_transaction() as sess:
+        sess["user_id"] = other_id
+    admin = make_client(c4p, ctx, "admin")
+
+    ok = True
+    original_pdf = make_pdf(talk)
+    submit(first, original_pdf, "propuesta_mantenimiento.pdf", "México, Monterrey")
+    submit(second, make_docx(edit(rng, talk, 0.1)), "charla_final_v2.docx", "Chile, Santiago")
+    submit(second, make_pdf(proposal_text(rng)), "otra_charla.pdf", "Chile, Santiago")
+    with ThreadPoolExecutor(max_workers=4) as io_pool:
+        stats = extract_once(engine, c4p.storage, pool, io_pool)
+    print(f"   extracción: {stats}")
+    found = pairs()
+    ok &= check(stats["duplicates"] == 1 and len(found) == 1, "el extractor marca un solo par (la otra charla no)")
+
+    body = admin.get("/admin/duplicates").get_data(as_text=True)
+    ok &= check("distinto candidato" in body and "propuesta mantenimiento" in body and "charla final v2" in body,
+                "/admin/duplicates muestra ambas propuestas de cuentas distintas")
+    body = admin.get("/admin/proposals").get_data(as_text=True)
+    ok &= check(body.count("Posible duplicado") == 2, "/admin/proposals marca las dos propuestas")
+
+    indexed, flagged = rebuild(engine, pool)
+    ok &= check(flagged == 1 and pairs() == found, f"--rebuild: {indexed} documentos, mismos pares")
+
+    # El mismo archivo, byte por byte, desde otra cuenta (cada subida tiene su propia URL)
+    submit(second, original_pdf, "propuesta_mantenimiento.pdf", "Chile, Santiago")
+    with ThreadPoolExecutor(max_workers=4) as io_pool:
+        stats = extract_once(engine, c4p.storage, pool, io_pool)
+    with engine.connect() as conn:
+        exact = conn.execute(duplicate_flags.select().where(duplicate_flags.c.similarity == 1.0)).all()
+    ok &= check(stats["duplicates"] >= 1 and len(exact) == 1, "el mismo archivo reenviado por otra cuenta se marca (similitud 1.0)")
+    return ok
+
+
+def check_concurrent_extractors(c4p):
+    """Dos extractores con índices propios sobre la misma BD."""
+    from near_duplicates import DuplicateDetector, document_signatures, duplicate_flags, minhash
+
+    rng = random.Random(8)
+    talk = proposal_text(rng)
+    signature = minhash(talk)
+    with c4p.app.app_context():
+        engine = c4p.db.engine
+    base = 10 ** 6   # ids fuera de los de check_end_to_end
+    first, second, stale = DuplicateDetector(), DuplicateDetector(), DuplicateDetector()
+    with engine.begin() as conn:
+        for detector in (first, second, stale):
+            detector.refresh(conn)
+
+    ok = True
+    # El segundo hace commit de un id más alto antes de que el primero termine uno más bajo
+    with engine.begin() as conn:
+        second.check_and_add(conn, base + 2, minhash(edit(rng, talk, 0.1)))
+    with engine.begin() as conn:
+        second.refresh(conn)   # siguiente pasada del segundo, antes del commit del primero
+    with engine.begin() as conn:
+        first.refresh(conn)
+        first.check_and_add(conn, base + 1, signature)
+    with engine.begin() as conn:
+        second.refresh(conn)
+        matches = second.check_and_add(conn, base + 3, minhash(edit(rng, talk, 0.1)))
+    ok &= check({m for m, _ in matches} == {base + 1, base + 2},
+                "refresh carga ids más bajos que llegaron después (de otro extractor)")
+
+    # Renta vencida: otro extractor vuelve a procesar un documento ya indexado
+    try:
+        with engine.begin() as conn:
+            again = stale.check_and_add(conn, base + 1, signature)
+        ok &= check(again == [], "re-extraer un documento ya firmado no rompe el lote ni duplica pares")
+    except Exception as e:
+        ok &= check(False, f"re-extraer un documento ya firmado: {e!r}")
+
+    with engine.begin() as conn:
+        conn.execute(duplicate_flags.delete().where(duplicate_flags.c.doc_id > base))
+        conn.execute(document_signatures.delete().where(document_signatures.c.doc_id > base))
+    return ok
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Detección de propuestas casi duplicadas")
+    parser.add_argument("--originals", type=int, default=200)
+    parser.add_argument("--documents", type=int, default=2000, help="firmas en el índice para medir latencia")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--database-url")
+    args = parser.parse_args(argv)
+
+    c4p = load_app(args.database_url)  # también pone la raíz del repo en sys.path (para el pool)
+    ok = True
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        print("🔎 Precisión / recall")
+        ok &= check_quality(args, pool)
+        print("⏱️  Latencia")
+        ok &= check_latency(args, pool)
+        print("🔗 De punta a punta")
+        ok &= check_end_to_end(c4p, pool)
+    print("🔀 Extractores concurrentes")
+    ok &= check_concurrent_extractors(c4p)
+
+    print("✅ Casi duplicados OK" if ok else "❌ Casi duplicados con fallas")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
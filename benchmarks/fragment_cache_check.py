@@ -0,0 +1,117 @@
+"""
+Verifica la cache de fragmentos de las vistas de admin de un candidato
+(/admin/candidate/<id> y /admin/users/<id>).
+
+  1. Con la cache caliente, una vista repetida no carga User/Profile ni arma
+     el HTML: menos SQL y menos latencia que en frío.
+  2. Guardar el perfil (ORM, como /profile) sube users.profile_version y la
+     siguiente vista muestra el cambio; lo mismo al editar el usuario desde
+     /admin/users/<id>/edit.
+  3. El cambio de un candidato no invalida el fragmento de otro.
+  4. Un usuario nuevo que reutiliza el id de uno borrado (SQLite reusa el id
+     más alto) no ve el fragmento cacheado del borrado.
+
+Sale con código 1 si algo no cuadra.
+
+    python benchmarks/fragment_cache_check.py
+"""
+import argparse
+import sys
+import time
+
+from load_test import QueryCounter, check, load_app, make_client, percentile, prepare
+
+
+def timed(client, path, counter, n=1):
+    latencies, queries, body = [], [], ""
+    for _ in range(n):
+        counter.reset()
+        t0 = time.perf_counter()
+        resp = client.get(path)
+        body = resp.get_data(as_text=True)
+        latencies.append(time.perf_counter() - t0)
+        queries.append(counter.count)
+        assert resp.status_code == 200, (path, resp.status_code)
+    return percentile(sorted(latencies), 50) * 1000, max(queries), body
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cache de fragmentos del perfil de candidato")
+    parser.add_argument("--candidates", type=int, default=200)
+    parser.add_argument("--proposals", type=int, default=200)
+    parser.add_argument("--database-url")
+    args = parser.parse_args(argv)
+
+    c4p = load_app(args.database_url)
+    ctx = prepare(c4p, args.candidates, args.proposals, log=lambda *a: None)
+    with c4p.app.app_context():
+        engine = c4p.db.engine
+        counter = QueryCounter(engine)
+        ids = [u.id for u in c4p.User.query.filter(c4p.User.role != "admin").order_by(c4p.User.id).limit(2)]
+    admin = make_client(c4p, ctx, "admin")
+    cache = c4p.fragment_cache
+    target, other = ids
+    ok = True
+
+    # 1. Fría vs caliente
+    for path in (f"/admin/candidate/{target}", f"/admin/users/{target}"):
+        cache.memory.clear()
+        cold_ms, cold_sql, _ = timed(admin, path, counter)
+        hits = cache.metrics["hits"]
+        warm_ms, warm_sql, _ = timed(admin, path, counter, n=20)
+        print(f"   {path} fría: {cold_ms:.2f}ms sql={cold_sql}; caliente p50={warm_ms:.2f}ms sql={warm_sql}")
+        ok &= check(cache.metrics["hits"] - hits == 20 and warm_sql < cold_sql,
+                    "vistas repetidas: todas hit y sin leer User/Profile")
+
+    timed(admin, f"/admin/candidate/{other}", counter)
+
+    # 2. Guardar el perfil / editar el usuario
+    with c4p.app.app_context():
+        before = c4p.profile_version_of(target)
+        profile = c4p.db.session.get(c4p.User, target).profile
+        profile.company_name = f"Empresa {time.time_ns()}"
+        company = profile.company_name
+        c4p.db.session.commit()
+        ok &= check(c4p.profile_version_of(target) == before + 1, "guardar el perfil sube profile_version")
+    _, _, body = timed(admin, f"/admin/candidate/{target}", counter)
+    ok &= check(company in body, "la vista del candidato muestra el cambio")
+    _, _, body = timed(admin, f"/admin/users/{target}", counter)
+    ok &= check(company in body, "la ficha de usuario muestra el cambio")
+
+    new_name = f"Nombre Editado {time.time_ns()}"
+    with c4p.app.app_context():
+        email = c4p.db.session.get(c4p.User, target).email
+    admin.post(f"/admin/users/{target}/edit", data={"full_name": new_name, "email": email})
+    _, _, body = timed(admin, f"/admin/candidate/{target}", counter)
+    ok &= check(new_name in body, "la edición desde admin se ve en el perfil del candidato")
+
+    # 3. Otro candidato sigue en cache
+    hits = cache.metrics["hits"]
+    timed(admin, f"/admin/candidate/{other}", counter)
+    ok &= check(cache.metrics["hits"] == hits + 1, "el fragmento de otro candidato sigue siendo hit")
+
+    # 4. Id reutilizado tras borrar al último usuario
+    with c4p.app.app_context():
+        last = c4p.db.session.query(c4p.User).order_by(c4p.User.id.desc()).first()
+        last_id, old_name = last.id, last.full_name
+    _, _, body = timed(admin, f"/admin/candidate/{last_id}", counter)
+    admin.post(f"/admin/users/{last_id}/delete")
+    with c4p.app.app_context():
+        newcomer = c4p.User(
+            full_name=f"Usuario Nuevo {time.time_ns()}", email=f"nuevo{time.time_ns()}@example.com",
+            password_hash="x", unique_password="x", role="user",
+        )
+        c4p.db.session.add(newcomer)
+        c4p.db.session.commit()
+        new_id, new_name = newcomer.id, newcomer.full_name
+    _, _, body = timed(admin, f"/admin/candidate/{new_id}", counter)
+    ok &= check(new_id == last_id and new_name in body and old_name not in body,
+                f"id {new_id} reutilizado: se ve el usuario nuevo, no el fragmento del borrado")
+
+    print(f"   métricas: {admin.get('/health').get_json()['fragment_cache']}")
+    print("✅ Cache de fragmentos OK" if ok else "❌ Cache de fragmentos con fallas")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
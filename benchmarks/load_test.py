@@ -0,0 +1,289 @@
+"""
+Prueba de carga por ruta con datos sintéticos.
+
+Siembra una BD local (SQLite temporal por defecto, o la de --database-url),
+reemplaza el almacenamiento remoto por un stub y ejecuta cada ruta con el
+test client de Flask (N hilos, un cliente por hilo). Reporta p50/p95/p99,
+throughput y consultas SQL por request; con --json deja un baseline legible
+por máquina.
+
+    python benchmarks/load_test.py --candidates 10000 --proposals 30000
+    python benchmarks/load_test.py --routes admin_proposals,login --requests 50 --concurrency 4
+    python benchmarks/load_test.py --database-url postgresql+psycopg://localhost/c4p_bench --json baseline.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def load_app(database_url=None):
+    """Importa la app apuntando a la BD de benchmark (la config se lee al importar)."""
+    if not database_url:
+        tmpdir = tempfile.mkdtemp(prefix="c4p-load-")
+        database_url = "sqlite:///" + os.path.join(tmpdir, "load.db")
+    os.environ["DATABASE_URL"] = database_url
+    os.environ.setdefault("SECRET_KEY", "bench")
+    if BASE_DIR not in sys.path:
+        sys.path.insert(0, BASE_DIR)
+    migrate_schema(database_url)
+
+    import call_for_papers_app as c4p
+
+    c4p.app.config["SESSION_COOKIE_SECURE"] = False
+    c4p.limiter.enabled = False
+    stub_storage(c4p)
+    return c4p
+
+
+def migrate_schema(database_url):
+    """Como en un despliegue: migraciones antes de importar la app (que no crea esas tablas)."""
+    from migrations import get_engine, migrate
+
+    engine = get_engine(database_url)
+    with contextlib.redirect_stdout(io.StringIO()):
+        migrate(engine)
+    engine.dispose()
+
+# =========================
+# STUBS
+# =========================
+
+class StubStorage:
+    """Backend de almacenamiento en memoria: no hace I/O de red."""
+    name = "stub"
+    supports_direct_upload = False
+
+    def __init__(self):
+        self.counter = 0
+        self.lock = threading.Lock()
+
+    def save(self, file, folder):
+        if not file or file.filename == "":
+            return None
+        file.read()
+        with self.lock:
+            self.counter += 1
+            n = self.counter
+        return f"https://storage.bench.test/{folder}/{n}-{file.filename}"
+
+    def delete(self, url):
+        pass
+
+
+def stub_storage(c4p):
+    c4p.storage = StubStorage()
+
+# =========================
+# MÉTRICAS
+# =========================
+
+class QueryCounter:
+    """Cuenta sentencias SQL por hilo (before_cursor_execute)."""
+
+    def __init__(self, engine):
+        self.local = threading.local()
+        from sqlalchemy import event
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args, **kwargs):
+        self.local.count = getattr(self.local, "count", 0) + 1
+
+    def reset(self):
+        self.local.count = 0
+
+    @property
+    def count(self):
+        return getattr(self.local, "count", 0)
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * pct / 100
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def check(condition, message):
+    """Imprime ✅/❌ con el mensaje y regresa la condición (para acumular con &=)."""
+    print(("   ✅ " if condition else "   ❌ ") + message)
+    return condition
+
+
+def summarize(latencies, queries, elapsed, errors):
+    lat = sorted(latencies)
+    return {
+        "requests": len(lat),
+        "errors": errors,
+        "p50_ms": round(percentile(lat, 50) * 1000, 3),
+        "p95_ms": round(percentile(lat, 95) * 1000, 3),
+        "p99_ms": round(percentile(lat, 99) * 1000, 3),
+        "throughput_rps": round(len(lat) / elapsed, 2) if elapsed > 0 else 0.0,
+        "queries_per_request": round(sum(queries) / len(queries), 2) if queries else 0.0,
+        "max_queries": max(queries) if queries else 0,
+    }
+
+# =========================
+# ESCENARIOS
+# =========================
+
+class Scenario:
+    def __init__(self, name, method, path, role=None, data=None, expect=(200, 302)):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.role = role          # None (anónimo), "candidate" o "admin"
+        self.data = data          # callable -> dict para POST
+        self.expect = expect
+
+
+def login_data(ctx):
+    return {"email": ctx["candidate_email"], "password": ctx["password"]}
+
+
+def submit_data(ctx):
+    return {
+        "venues": ["México, Monterrey", "Chile, Santiago"],
+        "proposal_file": (io.BytesIO(b"%PDF-1.4 benchmark\n" * 512), "propuesta_benchmark.pdf"),
+    }
+
+
+SCENARIOS = {
+    "index": Scenario("index", "GET", "/"),
+    "login": Scenario("login", "POST", "/login", data=login_data),
+    "profile": Scenario("profile", "GET", "/profile", role="candidate"),
+    "submit_form": Scenario("submit_form", "GET", "/submit", role="candidate"),
+    "submit_proposal": Scenario("submit_proposal", "POST", "/submit", role="candidate", data=submit_data),
+    "proposals_list": Scenario("proposals_list", "GET", "/proposals", role="candidate"),
+    "admin_proposals": Scenario("admin_proposals", "GET", "/admin/proposals", role="admin"),
+    "admin_passwords": Scenario("admin_passwords", "GET", "/admin/passwords", role="admin"),
+    "admin_dashboard": Scenario("admin_dashboard", "GET", "/admin/dashboard", role="admin"),
+}
+
+
+def prepare(c4p, candidates, proposals, log=print):
+    """Siembra si la BD está vacía y regresa el contexto (ids/credenciales)."""
+    from seed_data import SEED_EMAIL_DOMAIN, SEED_PASSWORD, seed
+
+    with c4p.app.app_context():
+        User = c4p.User
+        existing = User.query.filter(User.email.like(f"%@{SEED_EMAIL_DOMAIN}")).count()
+        if existing == 0:
+            log(f"🌱 Sembrando {candidates} candidatos / {proposals} propuestas...")
+            seed(c4p.db.engine, (c4p.User, c4p.Profile, c4p.Proposal),
+                 candidates=candidates, proposals=proposals, log=log)
+            # El seed inserta directo (sin ORM): los contadores del tablero se concilian
+            from proposal_stats import reconcile
+            reconcile(c4p.db.engine)
+
+        candidate = (
+            User.query.filter(User.email.like(f"%@{SEED_EMAIL_DOMAIN}"))
+            .order_by(User.id.asc()).first()
+        )
+        admin = User.query.filter(User.email.in_(list(c4p.ADMIN_EMAILS))).first()
+        return {
+            "candidate_id": candidate.id,
+            "candidate_email": candidate.email,
+            "admin_id": admin.id,
+            "password": SEED_PASSWORD,
+        }
+
+
+def make_client(c4p, ctx, role):
+    client = c4p.app.test_client()
+    if role:
+        with client.session_transaction() as sess:
+            sess["user_id"] = ctx["admin_id"] if role == "admin" else ctx["candidate_id"]
+    return client
+
+
+def run_scenario(c4p, ctx, scenario, requests=20, concurrency=1, warmup=1, counter=None, before_request=None):
+    latencies, queries = [], []
+    errors = 0
+    lock = threading.Lock()
+    per_thread = max(1, requests // concurrency)
+
+    def worker():
+        nonlocal errors
+        client = make_client(c4p, ctx, scenario.role)
+        for i in range(warmup + per_thread):
+            kwargs = {}
+            if scenario.data:
+                kwargs["data"] = scenario.data(ctx)
+                kwargs["content_type"] = "multipart/form-data"
+            if before_request:
+                before_request()
+            if counter:
+                counter.reset()
+            t0 = time.perf_counter()
+            resp = client.open(scenario.path, method=scenario.method, **kwargs)
+            resp.get_data()
+            dt = time.perf_counter() - t0
+            if i < warmup:
+                continue
+            with lock:
+                latencies.append(dt)
+                if counter:
+                    queries.append(counter.count)
+                if resp.status_code not in scenario.expect:
+                    errors += 1
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    return summarize(latencies, queries, elapsed, errors)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prueba de carga de rutas C4P")
+    parser.add_argument("--database-url", help="BD a usar (default: SQLite temporal)")
+    parser.add_argument("--candidates", type=int, default=10000)
+    parser.add_argument("--proposals", type=int, default=30000)
+    parser.add_argument("--routes", default=",".join(SCENARIOS), help="lista separada por comas")
+    parser.add_argument("--requests", type=int, default=20, help="requests por ruta")
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--json", help="escribe resultados en este archivo")
+    args = parser.parse_args(argv)
+
+    c4p = load_app(args.database_url)
+    ctx = prepare(c4p, args.candidates, args.proposals)
+    with c4p.app.app_context():
+        counter = QueryCounter(c4p.db.engine)
+
+    results = {}
+    print(f"{'ruta':<18} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>8} {'SQL/req':>8} {'err':>4}")
+    for name in args.routes.split(","):
+        scenario = SCENARIOS[name.strip()]
+        r = run_scenario(c4p, ctx, scenario, requests=args.requests,
+                         concurrency=args.concurrency, counter=counter)
+        results[scenario.name] = r
+        print(f"{scenario.name:<18} {r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} {r['p99_ms']:>9.2f} "
+              f"{r['throughput_rps']:>8.1f} {r['queries_per_request']:>8.1f} {r['errors']:>4}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump({
+                "candidates": args.candidates,
+                "proposals": args.proposals,
+                "concurrency": args.concurrency,
+                "results": results,
+            }, fh, indent=2)
+            fh.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""
+Verifica el outbox de notificaciones de cambio de estatus (notifications.py)
+contra un servidor SMTP local de prueba (sin red ni dependencias).
+
+  1. Cambiar estatus en /admin/proposals deja una fila en el outbox y NO
+     habla con SMTP; un cambio revertido (rollback) no deja fila y guardar el
+     mismo estatus tampoco.
+  2. El dispatcher junta los cambios de cada candidato en un solo correo y
+     manda todos por una sola conexión SMTP.
+  3. Con el servidor respondiendo 451 las filas se reprograman con backoff y
+     se entregan cuando vuelve; un 550 las deja en `failed`.
+  4. Con dos dispatchers, las filas rentadas por uno (sending) no las toma
+     el otro aunque llegue otro cambio del mismo candidato; si el primero se
+     cae, se vuelven a tomar al vencer la renta.
+
+Sale con código 1 si algo no cuadra.
+
+    python benchmarks/outbox_check.py
+"""
+import argparse
+import socketserver
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from email import message_from_bytes, policy
+
+from load_test import check, load_app, make_client, percentile, prepare
+
+
+class FakeSmtpServer(socketserver.ThreadingTCPServer):
+    """SMTP mínimo: guarda los mensajes; `reject` = código para MAIL FROM (p.ej. 451)."""
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), FakeSmtpHandler)
+        self.messages = []
+        self.connections = 0
+        self.reject = None
+        self.lock = threading.Lock()
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+
+class FakeSmtpHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write((line + "\r\n").encode())
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.connections += 1
+        self.reply("220 localhost ESMTP prueba")
+        rcpts = []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            cmd = line.decode(errors="replace").strip()
+            verb = cmd.split(" ", 1)[0].upper()
+            if verb in ("EHLO", "HELO"):
+                self.reply("250 localhost")
+            elif verb == "MAIL":
+                if server.reject:
+                    self.reply(f"{server.reject} rechazado por prueba")
+                else:
+                    rcpts = []
+                    self.reply("250 OK")
+            elif verb == "RCPT":
+                rcpts.append(cmd.split(":", 1)[1].strip(" <>"))
+                self.reply("250 OK")
+            elif verb == "DATA":
+                self.reply("354 fin con .")
+                data = []
+                while True:
+                    chunk = self.rfile.readline()
+                    if chunk in (b".\r\n", b".\n", b""):
+                        break
+                    data.append(chunk[1:] if chunk.startswith(b"..") else chunk)
+                with server.lock:
+                    server.messages.append((rcpts, message_from_bytes(b"".join(data), policy=policy.default)))
+                self.reply("250 OK")
+            elif verb in ("RSET", "NOOP"):
+                self.reply("250 OK")
+            elif verb == "QUIT":
+                self.reply("221 adiós")
+                return
+            else:
+                self.reply("502 no implementado")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Outbox de notificaciones de estatus")
+    parser.add_argument("--candidates", type=int, default=50)
+    parser.add_argument("--proposals", type=int, default=200)
+    parser.add_argument("--database-url")
+    args = parser.parse_args(argv)
+
+    c4p = load_app(args.database_url)
+    import notifications
+    from notifications import FAILED, PENDING, SENDING, SENT, SmtpMailer, claim, dispatch_once, enqueue_status_change, outbox
+
+    ctx = prepare(c4p, args.candidates, args.proposals, log=lambda *a: None)
+    with c4p.app.app_context():
+        engine = c4p.db.engine
+        with engine.begin() as conn:
+            conn.execute(outbox.delete())
+        Proposal = c4p.Proposal
+        users = [
+            uid for (uid,) in c4p.db.session.query(Proposal.user_id)
+            .group_by(Proposal.user_id).having(c4p.db.func.count() >= 3).limit(2)
+        ]
+        first = Proposal.query.filter_by(user_id=users[0]).order_by(Proposal.id).limit(3).all()
+        second = Proposal.query.filter_by(user_id=users[1]).order_by(Proposal.id).first()
+        changes = [(p.id, "Aceptada" if p.status != "Aceptada" else "Rechazada") for p in first]
+        changes.append((second.id, "En reserva" if second.status != "En reserva" else "Aceptada"))
+
+    def rows():
+        with engine.connect() as conn:
+            return [dict(r._mapping) for r in conn.execute(outbox.select().order_by(outbox.c.id))]
+
+    smtp = FakeSmtpServer()
+    admin = make_client(c4p, ctx, "admin")
+    ok = True
+
+    # 1. La vista solo escribe el outbox
+    latencies = []
+    for proposal_id, status in changes:
+        t0 = time.perf_counter()
+        resp = admin.post("/admin/proposals", data={"proposal_id": proposal_id, "new_status": status})
+        latencies.append(time.perf_counter() - t0)
+        assert resp.status_code == 302, resp.status_code
+    # Guardar otra vez el estatus que ya tiene
+    admin.post("/admin/proposals", data={"proposal_id": changes[-1][0], "new_status": changes[-1][1]})
+    print(f"   POST cambio de estatus p50={percentile(sorted(latencies), 50) * 1000:.2f}ms")
+    ok &= check(len(rows()) == len(changes), f"{len(changes)} cambios -> {len(changes)} filas (el mismo estatus no encola)")
+    ok &= check(smtp.connections == 0, "la vista no abre conexiones SMTP")
+
+    with c4p.app.app_context():
+        p = c4p.db.session.get(Proposal, changes[0][0])
+        old = p.status
+        p.status = "Rechazada" if old != "Rechazada" else "Aceptada"
+        enqueue_status_change(c4p.db.session.connection(), p, "nadie@bench.test", old)
+        c4p.db.session.rollback()
+    ok &= check(len(rows()) == len(changes), "un cambio revertido no deja notificación")
+
+    # 2. Un correo por candidato, una conexión
+    mailer = SmtpMailer(host="127.0.0.1", port=smtp.port, starttls=False, user=None)
+    stats = dispatch_once(engine, mailer)
+    ok &= check(stats["sent"] == 0, "antes de OUTBOX_BATCH_DELAY no se envía nada")
+
+    later = datetime.utcnow() + timedelta(seconds=notifications.OUTBOX_BATCH_DELAY + 1)
+    stats = dispatch_once(engine, mailer, now=later)
+    mailer.close()
+    print(f"   pasada: {stats}; SMTP: {len(smtp.messages)} mensajes, {smtp.connections} conexiones")
+    ok &= check(stats["emails"] == 2 and len(smtp.messages) == 2, "2 candidatos -> 2 correos")
+    ok &= check(smtp.connections == 1, "todos los correos por una sola conexión SMTP")
+    body = next(m for _, m in smtp.messages if m["To"] == rows()[0]["recipient"]).get_content()
+    ok &= check(body.count("\n- ") == 3, "el correo del primer candidato lista sus 3 propuestas")
+    ok &= check(all(r["status"] == SENT for r in rows()), "filas marcadas como enviadas")
+
+    # 3. Reintentos con backoff
+    smtp.reject = 451
+    proposal_id, status = changes[-1]
+    admin.post("/admin/proposals", data={"proposal_id": proposal_id, "new_status": "Aceptada" if status != "Aceptada" else "Rechazada"})
+    later = datetime.utcnow() + timedelta(seconds=notifications.OUTBOX_BATCH_DELAY + 1)
+    stats = dispatch_once(engine, mailer, now=later)
+    row = rows()[-1]
+    ok &= check(stats["retry"] == 1 and row["status"] == PENDING and row["attempts"] == 1
+                and row["available_at"] > later, f"451 -> reprogramada (siguiente intento {row['available_at'] - later})")
+    ok &= check(dispatch_once(engine, mailer, now=later)["retry"] == 0, "no se reintenta antes del backoff")
+
+    smtp.reject = None
+    stats = dispatch_once(engine, mailer, now=row["available_at"] + timedelta(seconds=1))
+    ok &= check(stats["emails"] == 1 and rows()[-1]["status"] == SENT, "al volver el servidor se entrega")
+
+    smtp.reject = 550
+    admin.post("/admin/proposals", data={"proposal_id": proposal_id, "new_status": status})
+    later = datetime.utcnow() + timedelta(seconds=notifications.OUTBOX_BATCH_DELAY + 1)
+    dispatch_once(engine, mailer, now=later)
+    ok &= check(rows()[-1]["status"] == FAILED, "550 -> failed sin reintentos")
+
+    # 4. Dos dispatchers: lo rentado por uno no lo toma el otro
+    smtp.reject = None
+    sent_before = len(smtp.messages)
+
+    def toggle(proposal_id):
+        with c4p.app.app_context():
+            current = c4p.db.session.get(Proposal, proposal_id).status
+        admin.post("/admin/proposals", data={
+            "proposal_id": proposal_id, "new_status": "Aceptada" if current != "Aceptada" else "Rechazada",
+        })
+
+    toggle(changes[0][0])
+    toggle(changes[1][0])
+    later = datetime.utcnow() + timedelta(seconds=notifications.OUTBOX_BATCH_DELAY + 1)
+    leased = claim(engine, later)  # dispatcher A: toma y se queda a medio envío
+    leased_ids = {r["id"] for r in leased}
+    ok &= check(len(leased) == 2 and all(r["status"] == SENDING for r in rows() if r["id"] in leased_ids),
+                "dispatcher A renta las 2 filas del candidato (sending)")
+
+    toggle(changes[2][0])  # otro cambio del mismo candidato, mientras A envía
+    later2 = datetime.utcnow() + timedelta(seconds=notifications.OUTBOX_BATCH_DELAY + 2)
+    stats = dispatch_once(engine, mailer, now=later2)  # dispatcher B
+    ok &= check(stats["sent"] == 1 and len(smtp.messages) == sent_before + 1
+                and all(r["status"] == SENDING for r in rows() if r["id"] in leased_ids),
+                "dispatcher B solo envía la fila nueva, no las rentadas por A")
+
+    # A se cae: al vencer la renta se vuelven a tomar
+    expired = later + timedelta(seconds=notifications.OUTBOX_LEASE_SECONDS + 1)
+    stats = dispatch_once(engine, mailer, now=expired)
+    ok &= check(stats["sent"] == 2 and all(r["status"] == SENT for r in rows() if r["id"] in leased_ids),
+                "renta vencida (dispatcher caído) -> se reenvían")
+    mailer.close()
+    smtp.shutdown()
+
+    print("✅ Outbox de notificaciones OK" if ok else "❌ Outbox de notificaciones con fallas")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
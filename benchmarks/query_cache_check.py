@@ -0,0 +1,137 @@
+"""
+Verifica la cache versionada de los listados de admin (query_cache.py).
+
+  1. La segunda visita a /admin/proposals es un hit: no repite la consulta
+     del listado (menos SQL y menos latencia).
+  2. Un cambio de estatus sube la versión de datos: la siguiente visita es un
+     miss y muestra el cambio. Lo mismo para un registro nuevo en
+     /admin/passwords (alta por INSERT directo, sin flush).
+  3. Un cambio que no toca propuestas ni usuarios (perfil) no invalida.
+  4. Con un directorio compartido, un segundo "worker" (otra QueryCache)
+     reutiliza el resultado del primero sin ir a la BD.
+  5. Las versiones viejas no se acumulan: cada listado y filtros ocupa una
+     sola entrada en memoria y un solo archivo en el directorio compartido.
+
+Reporta latencia y SQL con cache fría y caliente; sale con código 1 si algo
+no cuadra.
+
+    python benchmarks/query_cache_check.py
+    python benchmarks/query_cache_check.py --proposals 30000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from load_test import QueryCounter, check, load_app, make_client, percentile, prepare
+
+
+def measure(client, path, counter, n=10):
+    latencies, queries = [], []
+    for _ in range(n):
+        counter.reset()
+        t0 = time.perf_counter()
+        resp = client.get(path)
+        latencies.append(time.perf_counter() - t0)
+        queries.append(counter.count)
+        assert resp.status_code == 200, resp.status_code
+    return percentile(sorted(latencies), 50) * 1000, max(queries)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cache versionada de listados de admin")
+    parser.add_argument("--candidates", type=int, default=1000)
+    parser.add_argument("--proposals", type=int, default=3000)
+    parser.add_argument("--database-url")
+    args = parser.parse_args(argv)
+
+    c4p = load_app(args.database_url)
+    ctx = prepare(c4p, args.candidates, args.proposals, log=lambda *a: None)
+    with c4p.app.app_context():
+        engine = c4p.db.engine
+        counter = QueryCounter(engine)
+    admin = make_client(c4p, ctx, "admin")
+    cache = c4p.query_cache
+    c4p.single_flight.ttl = 0  # aquí se mide la cache de listados, no el resultado reciente
+    ok = True
+
+    # 1. Fría vs caliente
+    cache.memory.clear()
+    counter.reset()
+    t0 = time.perf_counter()
+    admin.get("/admin/proposals")
+    cold_ms, cold_sql = (time.perf_counter() - t0) * 1000, counter.count
+    before = dict(cache.metrics)
+    warm_ms, warm_sql = measure(admin, "/admin/proposals", counter)
+    print(f"   /admin/proposals fría: {cold_ms:.1f}ms sql={cold_sql}; caliente p50={warm_ms:.1f}ms sql={warm_sql}")
+    ok &= check(cache.metrics["hits"] - before["hits"] == 10 and cache.metrics["misses"] == before["misses"],
+                "visitas repetidas: 10 hits, 0 misses")
+    ok &= check(warm_sql < cold_sql, "con hit no se repite la consulta del listado")
+
+    # 2. Invalidación por escritura
+    with c4p.app.app_context():
+        proposal = c4p.Proposal.query.order_by(c4p.Proposal.id.asc()).first()
+        proposal_id = proposal.id
+        new_status = "Aceptada" if proposal.status != "Aceptada" else "Rechazada"
+        version = c4p.current_data_version(c4p.db.session.connection())
+    admin.post("/admin/proposals", data={"proposal_id": proposal_id, "new_status": new_status})
+    with c4p.app.app_context():
+        ok &= check(c4p.current_data_version(c4p.db.session.connection()) > version,
+                    "el cambio de estatus sube la versión de datos")
+    misses = cache.metrics["misses"]
+    page = admin.get("/admin/proposals").get_data(as_text=True)
+    row = page[page.index(f'value="{proposal_id}"'):]
+    ok &= check(cache.metrics["misses"] == misses + 1, "la siguiente visita es un miss")
+    ok &= check(f'<td class="px-3 py-4">{new_status}</td>' in row[:3000], "y muestra el estatus nuevo")
+
+    admin.get("/admin/passwords")
+    anon = c4p.app.test_client()
+    email = f"cache-check-{int(time.time() * 1000)}@example.com"
+    anon.post("/register", data={"full_name": "Cache Check", "email": email})
+    ok &= check(email in admin.get("/admin/passwords").get_data(as_text=True),
+                "un registro nuevo aparece en /admin/passwords")
+
+    # 3. Un cambio de perfil no invalida los listados
+    with c4p.app.app_context():
+        version = c4p.current_data_version(c4p.db.session.connection())
+        profile = c4p.Profile.query.first() or c4p.Profile(user_id=ctx["candidate_id"])
+        profile.certifications = (profile.certifications or "") + " "
+        c4p.db.session.add(profile)
+        c4p.db.session.commit()
+        ok &= check(c4p.current_data_version(c4p.db.session.connection()) == version,
+                    "editar un perfil no cambia la versión")
+
+    # 4. Store compartido entre workers
+    shared_dir = tempfile.mkdtemp(prefix="c4p-query-cache-")
+    worker_a = c4p.QueryCache(shared_dir=shared_dir)
+    worker_b = c4p.QueryCache(shared_dir=shared_dir)
+    computed = []
+
+    def compute():
+        computed.append(1)
+        with c4p.app.app_context():
+            return c4p.load_admin_proposal_rows()
+
+    rows_a = worker_a.get_or_compute("admin_proposals", {}, version, compute)
+    rows_b = worker_b.get_or_compute("admin_proposals", {}, version, compute)
+    ok &= check(len(computed) == 1 and rows_a == rows_b and worker_b.metrics["shared_hits"] == 1,
+                "otro worker reutiliza el resultado del store compartido")
+
+    # 5. Sin copias huérfanas por versión
+    for v in range(version + 1, version + 6):
+        worker_a.get_or_compute("admin_proposals", {}, v, compute)
+    stale = worker_a.get_or_compute("admin_proposals", {}, version, lambda: "viejo")
+    files = [n for n in os.listdir(shared_dir) if n.endswith(".json")]
+    ok &= check(len(worker_a.memory) == 1 and len(files) == 1,
+                f"5 versiones nuevas: {len(worker_a.memory)} entrada en memoria, {len(files)} archivo compartido")
+    ok &= check(stale == "viejo" and worker_b.get_or_compute("admin_proposals", {}, version + 5, compute) == rows_a
+                and len(computed) == 6, "una versión vieja no reemplaza a la nueva")
+
+    print(f"   métricas: {admin.get('/health').get_json()['query_cache']}")
+    print("✅ Cache de listados OK" if ok else "❌ Cache de listados con fallas")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
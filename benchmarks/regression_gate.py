@@ -0,0 +1,161 @@
+"""
+Gate de regresión de desempeño contra baselines guardados en el repo.
+
+Para cada ruta mide latencia (p50/p95), sentencias SQL por request y pico de
+memoria Python (tracemalloc, en una pasada aparte para no distorsionar la
+latencia) y compara contra benchmarks/baselines.json. Sale con código 1 si
+alguna métrica empeora más que el umbral.
+
+    python benchmarks/regression_gate.py              # compara
+    python benchmarks/regression_gate.py --update     # regenera baselines
+    python benchmarks/regression_gate.py --threshold 0.5 --routes admin_proposals
+
+Las latencias dependen de la máquina: regenerar baselines en el mismo tipo de
+runner donde corre el gate. Las sentencias SQL y la memoria son más estables.
+Las rutas *_cold vacían la cache de listados y el single-flight antes de cada
+request: miden la consulta y el render, no un hit (las rutas normales, con
+cache caliente, miden lo que ve la mayoría de las visitas).
+"""
+import argparse
+import json
+import os
+import sys
+import tracemalloc
+
+from load_test import SCENARIOS, QueryCounter, load_app, make_client, prepare, run_scenario
+
+BASELINES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+
+GATED_ROUTES = [
+    "index", "profile", "submit_form", "proposals_list",
+    "admin_proposals", "admin_passwords", "submit_proposal", "admin_dashboard",
+    "admin_proposals_cold", "admin_passwords_cold",
+]
+
+# Ruta fría -> escenario de load_test que repite sin cache
+COLD_ROUTES = {
+    "admin_proposals_cold": "admin_proposals",
+    "admin_passwords_cold": "admin_passwords",
+}
+
+DEFAULTS = {
+    "candidates": 1000,
+    "proposals": 3000,
+    "requests": 10,
+    "memory_requests": 3,
+}
+
+# Diferencias absolutas por debajo de esto se consideran ruido
+MIN_DELTA = {"p50_ms": 2.0, "p95_ms": 3.0, "queries_per_request": 1.0, "peak_kb": 256.0}
+METRICS = ["p50_ms", "p95_ms", "queries_per_request", "peak_kb"]
+
+
+def clear_caches(c4p):
+    c4p.query_cache.memory.clear()
+    c4p.single_flight.clear()
+
+
+def measure_peak_memory(c4p, ctx, scenario, requests, before_request=None):
+    client = make_client(c4p, ctx, scenario.role)
+    peak = 0
+    for _ in range(requests):
+        if before_request:
+            before_request()
+        kwargs = {}
+        if scenario.data:
+            kwargs["data"] = scenario.data(ctx)
+            kwargs["content_type"] = "multipart/form-data"
+        tracemalloc.start()
+        try:
+            client.open(scenario.path, method=scenario.method, **kwargs).get_data()
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+        finally:
+            tracemalloc.stop()
+    return round(peak / 1024, 1)
+
+
+def run(routes, config):
+    c4p = load_app(config.get("database_url"))
+    ctx = prepare(c4p, config["candidates"], config["proposals"])
+    with c4p.app.app_context():
+        counter = QueryCounter(c4p.db.engine)
+
+    results = {}
+    for name in routes:
+        scenario = SCENARIOS[COLD_ROUTES.get(name, name)]
+        before_request = (lambda: clear_caches(c4p)) if name in COLD_ROUTES else None
+        stats = run_scenario(c4p, ctx, scenario, requests=config["requests"], counter=counter,
+                             before_request=before_request)
+        stats["peak_kb"] = measure_peak_memory(c4p, ctx, scenario, config["memory_requests"], before_request)
+        results[name] = {m: stats[m] for m in METRICS}
+        results[name]["errors"] = stats["errors"]
+        print(f"   {name:<18} p50={stats['p50_ms']:.2f}ms p95={stats['p95_ms']:.2f}ms "
+              f"sql={stats['queries_per_request']:.1f} peak={stats['peak_kb']:.0f}KB")
+    return results
+
+
+def compare(baseline, current, threshold):
+    failures = []
+    for route, base in baseline.items():
+        cur = current.get(route)
+        if cur is None:
+            continue
+        if cur.get("errors"):
+            failures.append(f"{route}: {cur['errors']} respuestas con estatus inesperado")
+        for metric in METRICS:
+            old, new = base.get(metric), cur.get(metric)
+            if old is None or new is None:
+                continue
+            if new - old <= MIN_DELTA[metric]:
+                continue
+            if new > old * (1 + threshold):
+                failures.append(f"{route}.{metric}: {old} -> {new} (+{(new / old - 1) * 100 if old else float('inf'):.0f}%)")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gate de regresión de desempeño")
+    parser.add_argument("--update", action="store_true", help="reescribe baselines.json")
+    parser.add_argument("--threshold", type=float, default=0.25, help="regresión permitida (0.25 = 25%%)")
+    parser.add_argument("--routes", help="subconjunto de rutas, separado por comas")
+    parser.add_argument("--database-url")
+    args = parser.parse_args(argv)
+
+    stored = {}
+    if os.path.exists(BASELINES_PATH):
+        with open(BASELINES_PATH, encoding="utf-8") as fh:
+            stored = json.load(fh)
+
+    config = {**DEFAULTS, **stored.get("config", {})}
+    config["database_url"] = args.database_url
+    routes = args.routes.split(",") if args.routes else GATED_ROUTES
+
+    print(f"⏱️  Midiendo {len(routes)} rutas ({config['candidates']} candidatos / {config['proposals']} propuestas)...")
+    current = run(routes, config)
+
+    if args.update:
+        config.pop("database_url", None)
+        baseline = {**stored.get("routes", {}), **current}
+        with open(BASELINES_PATH, "w", encoding="utf-8") as fh:
+            json.dump({"config": config, "routes": baseline}, fh, indent=2, sort_keys=True)
+            fh.write("\n")
+        print(f"✅ Baselines actualizados en {os.path.relpath(BASELINES_PATH)}")
+        return 0
+
+    if not stored:
+        print("❌ No hay baselines; corre con --update primero.")
+        return 1
+
+    failures = compare(stored.get("routes", {}), current, args.threshold)
+    if failures:
+        print("❌ Regresiones detectadas:")
+        for f in failures:
+            print(f"   - {f}")
+        return 1
+
+    print("✅ Sin regresiones")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+"""
+Verifica el ruteo a la réplica de lectura con dos archivos SQLite locales.
+
+Siembra el primario, lo copia como "réplica" (API de backup de sqlite3) y
+cambia el estatus de una propuesta SOLO en la copia; así cada respuesta de
+/admin/proposals dice de qué BD leyó. Revisa que:
+
+  1. los GET de admin lean de la réplica;
+  2. tras actualizar un estatus (POST), ese admin lea del primario
+     (read-your-writes) y vea su cambio aunque la réplica no lo tenga;
+  3. al vencer la ventana REPLICA_STICKY_SECONDS vuelva a la réplica;
+  4. si la réplica se cae, las vistas respondan igual desde el primario.
+
+Sale con código 1 si algo no cuadra. Con dos Postgres locales (primario y
+standby) basta con pasar --database-url/--replica-url; en ese caso no se
+siembra un marcador y solo se revisan los puntos 2 y 4.
+
+    python benchmarks/replica_routing_check.py
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+from load_test import check, load_app, make_client, prepare
+
+MARKER = "LEIDO-DESDE-LA-REPLICA"
+
+
+def sqlite_path(url):
+    return url.split("sqlite:///", 1)[1]
+
+
+def copy_to_replica(primary_url, replica_url):
+    src = sqlite3.connect(sqlite_path(primary_url))
+    dst = sqlite3.connect(sqlite_path(replica_url))
+    with dst:
+        src.backup(dst)
+        dst.execute("UPDATE proposals SET status = ? WHERE id = (SELECT MIN(id) FROM proposals)", (MARKER,))
+    src.close()
+    dst.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ruteo a réplica de lectura")
+    parser.add_argument("--database-url")
+    parser.add_argument("--replica-url")
+    parser.add_argument("--sticky", type=float, default=1.0, help="REPLICA_STICKY_SECONDS para la prueba")
+    args = parser.parse_args(argv)
+
+    local = not args.database_url
+    if local:
+        tmpdir = tempfile.mkdtemp(prefix="c4p-replica-")
+        args.database_url = "sqlite:///" + os.path.join(tmpdir, "primary.db")
+        args.replica_url = "sqlite:///" + os.path.join(tmpdir, "replica.db")
+    os.environ["DATABASE_REPLICA_URL"] = args.replica_url
+    os.environ["REPLICA_STICKY_SECONDS"] = str(args.sticky)
+
+    c4p = load_app(args.database_url)
+    ctx = prepare(c4p, candidates=20, proposals=30, log=lambda *a: None)
+    if local:
+        copy_to_replica(args.database_url, args.replica_url)
+
+    with c4p.app.app_context():
+        proposal = c4p.Proposal.query.order_by(c4p.Proposal.id.asc()).first()
+        proposal_id, old_status = proposal.id, proposal.status
+    new_status = "Aceptada" if old_status != "Aceptada" else "Rechazada"
+
+    admin = make_client(c4p, ctx, "admin")
+    ok = True
+
+    if local:
+        page = admin.get("/admin/proposals").get_data(as_text=True)
+        ok &= check(MARKER in page, "GET /admin/proposals lee de la réplica")
+
+    resp = admin.post("/admin/proposals", data={"proposal_id": proposal_id, "new_status": new_status})
+    ok &= check(resp.status_code == 302, "POST de estatus en el primario")
+
+    page = admin.get("/admin/proposals").get_data(as_text=True)
+    if local:
+        # La réplica nunca recibe el cambio: sin marcador, la fila muestra el estatus nuevo
+        ok &= check(MARKER not in page, "read-your-writes: tras escribir, el mismo admin lee del primario")
+    ok &= check(f'<td class="px-3 py-4">{new_status}</td>' in page, "el admin ve su cambio")
+
+    other = make_client(c4p, ctx, "admin")
+    if local:
+        page = other.get("/admin/proposals").get_data(as_text=True)
+        ok &= check(MARKER in page, "otra sesión sigue leyendo de la réplica")
+
+        time.sleep(args.sticky + 0.1)
+        page = admin.get("/admin/proposals").get_data(as_text=True)
+        ok &= check(MARKER in page, "al vencer la ventana vuelve a la réplica")
+
+    # Réplica caída entre dos revisiones de salud: la consulta falla a medio
+    # request, la réplica se descarta y la vista se repite en el primario
+    def refuse(*cargs, **cparams):
+        raise replica.dialect.loaded_dbapi.OperationalError("réplica apagada (simulado)")
+
+    with c4p.app.app_context():
+        replica = c4p.db.engines["replica"]
+        replica.dispose()
+        replica.dialect.connect = refuse  # lo llama db_resilience en cada conexión nueva
+        c4p._replica_state.update(healthy=True, checked_at=time.time(), down_until=0.0)
+
+    resp = other.get("/admin/proposals")
+    page = resp.get_data(as_text=True)
+    ok &= check(resp.status_code == 200 and MARKER not in page,
+                "réplica caída: responde desde el primario")
+    ok &= check(c4p._replica_state["down_until"] > time.time(), "la réplica queda marcada como caída")
+
+    for path in (f"/admin/candidate/{ctx['candidate_id']}", "/admin/passwords", f"/admin/users/{ctx['candidate_id']}"):
+        ok &= check(other.get(path).status_code == 200, f"GET {path} con la réplica caída")
+
+    print("✅ Ruteo a réplica OK" if ok else "❌ Ruteo a réplica con fallas")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,216 @@
+"""
+Simulación de subidas reanudables (/uploads/chunked) con transferencias cortadas.
+
+Sube un documento sintético en bloques con el test client de Flask y corta la
+transferencia en puntos aleatorios: bloques perdidos, respuestas perdidas
+(reintento de un bloque ya guardado), bloques corruptos y reanudación desde
+GET /uploads/chunked/<id>. Verifica que el archivo final coincida byte a byte,
+que /submit cree las propuestas (y que si el commit falla el spool siga ahí
+para reintentar), que sin token CSRF se rechace la subida y que el gc borre
+spools abandonados. Sale con código 1 si algo no cuadra.
+
+    python benchmarks/resumable_upload_sim.py
+    python benchmarks/resumable_upload_sim.py --size 9000000 --runs 20 --drop-rate 0.3
+"""
+import argparse
+import hashlib
+import os
+import random
+import re
+import sys
+import time
+
+from load_test import load_app, make_client, prepare
+
+
+def sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def csrf_headers(client):
+    """X-CSRFToken con el token del form de /submit (como chunked_upload.js)."""
+    page = client.get("/submit").get_data(as_text=True)
+    return {"X-CSRFToken": re.search(r'name="csrf_token" value="([^"]+)"', page).group(1)}
+
+
+class Transfer:
+    """Cliente del protocolo que "pierde" peticiones según drop_rate."""
+
+    def __init__(self, client, headers, data, rng, drop_rate):
+        self.client = client
+        self.headers = headers
+        self.data = data
+        self.rng = rng
+        self.drop_rate = drop_rate
+        self.stats = {"chunks": 0, "dropped": 0, "lost_responses": 0, "corrupted": 0, "resumes": 0}
+
+    def init(self, filename):
+        resp = self.client.post("/uploads/chunked", json={
+            "kind": "proposal", "filename": filename, "size": len(self.data),
+        }, headers=self.headers)
+        assert resp.status_code == 201, resp.get_json()
+        body = resp.get_json()
+        return body["upload_id"], body["chunk_size"]
+
+    def resume(self, upload_id):
+        self.stats["resumes"] += 1
+        resp = self.client.get(f"/uploads/chunked/{upload_id}")
+        assert resp.status_code == 200, resp.get_json()
+        return resp.get_json()["offset"]
+
+    def put(self, upload_id, offset, chunk, checksum=None):
+        return self.client.put(
+            f"/uploads/chunked/{upload_id}?offset={offset}",
+            data=chunk,
+            headers={**self.headers, "X-Chunk-SHA256": checksum or sha256(chunk)},
+            content_type="application/octet-stream",
+        )
+
+    def run(self, upload_id, chunk_size):
+        offset = 0
+        while offset < len(self.data):
+            chunk = self.data[offset:offset + chunk_size]
+            self.stats["chunks"] += 1
+            roll = self.rng.random()
+
+            if roll < self.drop_rate / 3:
+                # El bloque nunca llega: el cliente pregunta dónde quedó
+                self.stats["dropped"] += 1
+                offset = self.resume(upload_id)
+                continue
+
+            if roll < self.drop_rate * 2 / 3:
+                # Llega corrupto: el servidor lo rechaza sin escribir
+                self.stats["corrupted"] += 1
+                bad = bytes([chunk[0] ^ 0xFF]) + chunk[1:]
+                resp = self.put(upload_id, offset, bad, checksum=sha256(chunk))
+                assert resp.status_code == 422, resp.status_code
+                continue
+
+            resp = self.put(upload_id, offset, chunk)
+            assert resp.status_code == 200, resp.get_json()
+            new_offset = resp.get_json()["offset"]
+
+            if roll < self.drop_rate:
+                # Se pierde la respuesta: el cliente reintenta el mismo bloque
+                self.stats["lost_responses"] += 1
+                retry = self.put(upload_id, offset, chunk)
+                assert retry.status_code == 200 and retry.get_json()["offset"] == new_offset
+            offset = new_offset
+
+        # Un offset adelantado se corrige con 409 + offset actual
+        resp = self.put(upload_id, offset + 10, b"x")
+        assert resp.status_code in (400, 409), resp.status_code
+        return offset
+
+
+def run_once(c4p, client, headers, ctx, rng, size, drop_rate):
+    data = os.urandom(size)
+    transfer = Transfer(client, headers, data, rng, drop_rate)
+    upload_id, chunk_size = transfer.init("propuesta_reanudable.pdf")
+    t0 = time.perf_counter()
+    transfer.run(upload_id, chunk_size)
+
+    bad = client.post(f"/uploads/chunked/{upload_id}/finalize", json={"sha256": "0" * 64}, headers=headers)
+    assert bad.status_code == 422, bad.status_code
+    ok = client.post(f"/uploads/chunked/{upload_id}/finalize", json={"sha256": sha256(data)}, headers=headers)
+    assert ok.status_code == 200, ok.get_json()
+    elapsed = time.perf_counter() - t0
+
+    _, spool_path = c4p.upload_spool.assembled(upload_id, ctx["candidate_id"])
+    with open(spool_path, "rb") as fh:
+        assert fh.read() == data, "el archivo ensamblado no coincide"
+
+    with c4p.app.app_context():
+        before = c4p.Proposal.query.count()
+    resp = client.post("/submit", data={"venues": ["Chile, Santiago"], "proposal_upload_id": upload_id})
+    assert resp.status_code == 302 and "/proposals" in resp.location, resp.location
+    with c4p.app.app_context():
+        assert c4p.Proposal.query.count() == before + 1
+    assert c4p.upload_spool.assembled(upload_id, ctx["candidate_id"]) is None, "el spool no se limpió"
+
+    return elapsed, transfer.stats
+
+
+def check_csrf(client, headers):
+    init = {"kind": "proposal", "filename": "sin_token.pdf", "size": 100}
+    assert client.post("/uploads/chunked", json=init).status_code == 400, "init sin token CSRF"
+    upload_id = client.post("/uploads/chunked", json=init, headers=headers).get_json()["upload_id"]
+    resp = client.put(f"/uploads/chunked/{upload_id}?offset=0", data=b"a" * 10,
+                      headers={"X-Chunk-SHA256": sha256(b"a" * 10)})
+    assert resp.status_code == 400, "append sin token CSRF"
+    resp = client.post(f"/uploads/chunked/{upload_id}/finalize", json={"sha256": "0" * 64})
+    assert resp.status_code == 400, "finalize sin token CSRF"
+
+
+def check_failed_commit(c4p, client, headers, ctx):
+    """Si el alta falla al guardar, el spool se conserva y el reintento funciona."""
+    data = os.urandom(1000)
+    upload_id = client.post("/uploads/chunked", json={
+        "kind": "proposal", "filename": "commit_fallido.pdf", "size": len(data),
+    }, headers=headers).get_json()["upload_id"]
+    client.put(f"/uploads/chunked/{upload_id}?offset=0", data=data,
+               headers={**headers, "X-Chunk-SHA256": sha256(data)}, content_type="application/octet-stream")
+    client.post(f"/uploads/chunked/{upload_id}/finalize", json={"sha256": sha256(data)}, headers=headers)
+
+    original = c4p.complete_idempotent_request
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("BD caída al guardar (simulado)")
+
+    c4p.complete_idempotent_request = fail
+    try:
+        resp = client.post("/submit", data={"venues": ["Chile, Santiago"], "proposal_upload_id": upload_id})
+    finally:
+        c4p.complete_idempotent_request = original
+    assert "/submit" in resp.location, resp.location
+    assert c4p.upload_spool.assembled(upload_id, ctx["candidate_id"]), "commit fallido: el spool se borró"
+
+    resp = client.post("/submit", data={"venues": ["Chile, Santiago"], "proposal_upload_id": upload_id})
+    assert "/proposals" in resp.location, resp.location
+    assert c4p.upload_spool.assembled(upload_id, ctx["candidate_id"]) is None, "el spool no se limpió"
+
+
+def check_gc(c4p, client, headers):
+    resp = client.post("/uploads/chunked", json={"kind": "proposal", "filename": "abandonada.pdf", "size": 100},
+                       headers=headers)
+    upload_id = resp.get_json()["upload_id"]
+    client.put(f"/uploads/chunked/{upload_id}?offset=0", data=b"a" * 10,
+               headers={**headers, "X-Chunk-SHA256": sha256(b"a" * 10)})
+    removed = c4p.upload_spool.gc(now=time.time() + c4p.upload_spool.ttl + 1)
+    assert removed >= 2, removed
+    assert client.get(f"/uploads/chunked/{upload_id}").status_code == 404
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulación de subidas reanudables")
+    parser.add_argument("--size", type=int, default=7 * 1024 * 1024 + 123)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--drop-rate", type=float, default=0.25)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("UPLOAD_SPOOL_DIR", os.path.join(
+        os.environ.get("TMPDIR", "/tmp"), f"c4p-spool-{os.getpid()}"))
+    c4p = load_app()
+    ctx = prepare(c4p, candidates=10, proposals=10, log=lambda *a: None)
+    client = make_client(c4p, ctx, "candidate")
+    headers = csrf_headers(client)
+    rng = random.Random(args.seed)
+
+    totals = {}
+    for i in range(args.runs):
+        elapsed, stats = run_once(c4p, client, headers, ctx, rng, args.size, args.drop_rate)
+        for k, v in stats.items():
+            totals[k] = totals.get(k, 0) + v
+        print(f"   corrida {i + 1}: {elapsed * 1000:.0f} ms  {stats}")
+
+    check_csrf(client, headers)
+    check_failed_commit(c4p, client, headers, ctx)
+    check_gc(c4p, client, headers)
+    print(f"✅ {args.runs} subidas reanudadas correctamente {totals}; CSRF, commit fallido y gc OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
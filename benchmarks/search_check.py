@@ -0,0 +1,125 @@
+"""
+Verifica la búsqueda de texto completo en documentos de propuesta
+(proposal_search.py) con documentos PDF/DOCX sintéticos y almacenamiento local.
+
+  1. /submit solo encola el documento (una fila aunque vaya a varias sedes);
+     el texto lo extrae el pool de procesos en una pasada aparte.
+  2. /admin/search encuentra por contenido (sin importar acentos), ordena
+     por relevancia y resalta los términos con <mark> sin inyectar HTML del
+     documento.
+  3. Un documento roto queda en `failed` sin reintentos.
+  4. Latencia de búsqueda con --documents textos indexados.
+
+Sale con código 1 si algo no cuadra.
+
+    python benchmarks/search_check.py --documents 5000
+"""
+import argparse
+import io
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+
+from load_test import check, load_app, make_client, percentile, prepare
+from synthetic_docs import make_docx, make_pdf, proposal_text
+
+
+def submit(client, data, filename):
+    resp = client.post("/submit", data={
+        "venues": ["México, Monterrey", "Chile, Santiago"],
+        "proposal_file": (io.BytesIO(data), filename),
+    }, content_type="multipart/form-data")
+    assert resp.status_code == 302, resp.status_code
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Búsqueda en documentos de propuesta")
+    parser.add_argument("--candidates", type=int, default=50)
+    parser.add_argument("--proposals", type=int, default=100)
+    parser.add_argument("--documents", type=int, default=5000, help="textos sintéticos para medir latencia")
+    parser.add_argument("--database-url")
+    args = parser.parse_args(argv)
+
+    c4p = load_app(args.database_url)
+    from proposal_search import DONE, FAILED, PENDING, document_texts, extract_once, search
+    from storage import LocalStorage
+
+    c4p.storage = LocalStorage(tempfile.mkdtemp(prefix="c4p-search-"), url_prefix="/files")
+    ctx = prepare(c4p, args.candidates, args.proposals, log=lambda *a: None)
+    with c4p.app.app_context():
+        engine = c4p.db.engine
+
+    def rows(**where):
+        with engine.connect() as conn:
+            query = document_texts.select()
+            for k, v in where.items():
+                query = query.where(document_texts.c[k] == v)
+            return [dict(r._mapping) for r in conn.execute(query)]
+
+    rng = random.Random(7)
+    candidate = make_client(c4p, ctx, "candidate")
+    admin = make_client(c4p, ctx, "admin")
+    ok = True
+
+    # 1. Envío: solo encola
+    strong = proposal_text(rng) + "\nLa tribología aplicada redujo el desgaste. Tribología y lubricación: tribología en campo."
+    weak = proposal_text(rng) + "\nSe mencionó la tribología una vez. <script>alert(1)</script>"
+    other = proposal_text(rng)
+    submit(candidate, make_pdf(strong), "tribologia_fuerte.pdf")
+    submit(candidate, make_docx(weak), "tribologia_debil.docx")
+    submit(candidate, make_pdf(other), "otra_propuesta.pdf")
+    submit(candidate, b"%PDF-1.4 esto no es un pdf", "roto.pdf")
+    queued = rows(status=PENDING)
+    ok &= check(len(queued) == 4, f"4 envíos (2 sedes c/u) -> {len(queued)} documentos en cola")
+
+    with ProcessPoolExecutor(max_workers=2) as pool, ThreadPoolExecutor(max_workers=4) as io_pool:
+        t0 = time.perf_counter()
+        stats = extract_once(engine, c4p.storage, pool, io_pool)
+        elapsed = time.perf_counter() - t0
+    print(f"   extracción: {stats} en {elapsed * 1000:.0f}ms")
+    ok &= check(stats["done"] == 3 and len(rows(status=DONE)) == 3, "PDF y DOCX extraídos")
+
+    # 2. Búsqueda desde admin
+    body = admin.get("/admin/search?q=tribologia").get_data(as_text=True)
+    first, second = body.find("tribologia fuerte"), body.find("tribologia debil")
+    ok &= check(first != -1 and second != -1, "encuentra ambos documentos (sin acento en la consulta)")
+    ok &= check(first < second, "el documento con más menciones va primero")
+    ok &= check("<mark>" in body, "resalta los términos con <mark>")
+    ok &= check("<script>alert(1)</script>" not in body, "el texto del documento se escapa")
+    ok &= check("otra propuesta" not in body, "no regresa documentos sin el término")
+
+    # 3. Documento roto
+    broken = rows(status=FAILED)
+    ok &= check(len(broken) == 1 and broken[0]["attempts"] == 1,
+                f"PDF roto -> failed ({broken[0]['error'][:60] if broken else '—'})")
+
+    # 4. Latencia con muchos documentos indexados
+    now = datetime.utcnow()
+    batch = [
+        {"doc_url": f"/files/bench/{i}.pdf", "status": DONE, "content": proposal_text(rng, sentences=60),
+         "attempts": 0, "queued_at": now, "extracted_at": now}
+        for i in range(args.documents)
+    ]
+    with engine.begin() as conn:
+        conn.execute(document_texts.insert(), batch)
+    queries = ["vibraciones", "bombas centrífugas", "lubricante reductores", "calderas disponibilidad", "compresores"]
+    latencies = []
+    with engine.connect() as conn:
+        for _ in range(5):
+            for q in queries:
+                t0 = time.perf_counter()
+                hits = search(conn, q, limit=50)
+                latencies.append(time.perf_counter() - t0)
+    p50 = percentile(sorted(latencies), 50) * 1000
+    print(f"   {args.documents} documentos: búsqueda p50={p50:.1f}ms, p95={percentile(sorted(latencies), 95) * 1000:.1f}ms")
+    ok &= check(len(hits) == 50, "búsqueda sobre el índice completo (50 resultados)")
+
+    print("✅ Búsqueda en documentos OK" if ok else "❌ Búsqueda en documentos con fallas")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
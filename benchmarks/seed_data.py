@@ -0,0 +1,166 @@
+"""
+Generador de datos sintéticos (usuarios, perfiles y propuestas).
+
+Inserta en bloques con executemany; todos los candidatos comparten la misma
+contraseña (SEED_PASSWORD) para no pagar un pbkdf2 por fila y poder probar /login.
+
+    python benchmarks/seed_data.py --database-url sqlite:////tmp/c4p-bench.db \
+        --candidates 10000 --proposals 30000
+"""
+import argparse
+import random
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, insert, select
+from werkzeug.security import generate_password_hash
+
+SEED_PASSWORD = "Bench12345"
+SEED_EMAIL_DOMAIN = "bench.c4p.test"
+
+FIRST_NAMES = [
+    "María", "José", "Juan", "Ana", "Luis", "Carmen", "Carlos", "Laura", "Jorge", "Sofía",
+    "Miguel", "Valentina", "Andrés", "Camila", "Diego", "Daniela", "Fernando", "Gabriela",
+    "Ricardo", "Paula", "Alejandro", "Isabel", "Javier", "Lucía", "Sebastián", "Mariana",
+]
+LAST_NAMES = [
+    "García", "Rodríguez", "Martínez", "Hernández", "López", "González", "Pérez", "Sánchez",
+    "Ramírez", "Torres", "Flores", "Rivera", "Gómez", "Díaz", "Cruz", "Morales", "Reyes",
+    "Gutiérrez", "Ortiz", "Chávez", "Ruiz", "Castillo", "Vargas", "Rojas", "Mendoza",
+]
+COUNTRIES = ["México", "Colombia", "Chile", "Perú", "Argentina", "Ecuador", "España", "Brasil"]
+COMPANIES = [
+    "Minera Andina", "Cementos del Norte", "Energía Pacífico", "Petroquímica Sur",
+    "Alimentos La Sierra", "Acerera del Golfo", "Papelera Central", "Farmacéutica Austral",
+]
+POSITIONS = ["Gerente de Mantenimiento", "Ingeniero de Confiabilidad", "Planeador", "Consultor", "Director de Activos"]
+TOPICS = [
+    "Análisis de vibraciones", "RCM aplicado", "Gestión de activos ISO 55000", "Mantenimiento predictivo",
+    "Lubricación de precisión", "Análisis causa raíz", "Indicadores de confiabilidad", "Termografía",
+]
+VENUES = ["Colombia, Cartagena", "México, Monterrey", "Chile, Santiago"]
+STATUSES = ["En revisión"] * 6 + ["Aceptada", "Rechazada", "En reserva"]
+
+CHUNK = 2000
+
+
+def _chunks(rows, size=CHUNK):
+    for i in range(0, len(rows), size):
+        yield rows[i:i + size]
+
+
+def seed(engine, models, candidates=10000, proposals=30000, rng_seed=42, log=print):
+    """
+    models: (User, Profile, Proposal) de la app.
+    Regresa la lista de ids de candidatos creados.
+    """
+    User, Profile, Proposal = models
+    rng = random.Random(rng_seed)
+    password_hash = generate_password_hash(SEED_PASSWORD, method="pbkdf2:sha256")
+
+    with engine.begin() as conn:
+        offset = conn.execute(select(func.count()).select_from(User.__table__)).scalar()
+
+    users = []
+    for i in range(candidates):
+        n = offset + i
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {rng.choice(LAST_NAMES)}"
+        users.append({
+            "full_name": name,
+            "email": f"candidato{n}@{SEED_EMAIL_DOMAIN}",
+            "password_hash": password_hash,
+            "unique_password": SEED_PASSWORD,
+            "role": "user",
+        })
+
+    with engine.begin() as conn:
+        for chunk in _chunks(users):
+            conn.execute(insert(User.__table__), chunk)
+        user_ids = list(conn.execute(
+            select(User.__table__.c.id)
+            .where(User.__table__.c.email.like(f"%@{SEED_EMAIL_DOMAIN}"))
+            .order_by(User.__table__.c.id.desc())
+            .limit(candidates)
+        ).scalars())
+    log(f"   … {len(user_ids)} usuarios")
+
+    profiles = []
+    for uid in user_ids:
+        profiles.append({
+            "user_id": uid,
+            "phone": "".join(rng.choice("0123456789") for _ in range(10)),
+            "country": rng.choice(COUNTRIES),
+            "linkedin_url": f"https://www.linkedin.com/in/candidato-{uid}",
+            "cv_url": f"https://storage.bench.test/c4p/profiles/cv/{uid}.pdf",
+            "photo_url": f"https://storage.bench.test/c4p/profiles/photos/{uid}.jpg",
+            "certifications": "CMRP, ISO 55000 Internal Auditor",
+            "company_name": rng.choice(COMPANIES),
+            "company_description": "Empresa del sector industrial.",
+            "company_website": "https://www.example.com",
+            "position": rng.choice(POSITIONS),
+            "action_field": rng.choice(["Consultor /Proveedor", "Usuario"]),
+            "speaker_experience": "CMC 2024, Congreso de Confiabilidad 2025",
+        })
+    with engine.begin() as conn:
+        for chunk in _chunks(profiles):
+            conn.execute(insert(Profile.__table__), chunk)
+    log(f"   … {len(profiles)} perfiles")
+
+    placeholder = "Ver documento adjunto en 'Documento de apoyo'."
+    now = datetime.utcnow()
+    rows = []
+    for i in range(proposals):
+        uid = rng.choice(user_ids)
+        doc = f"https://storage.bench.test/c4p/proposals/docs/{uid}-{i}.pdf"
+        rows.append({
+            "user_id": uid,
+            "title": f"{rng.choice(TOPICS)} en {rng.choice(COMPANIES)}",
+            "session_type": "DOCUMENTO",
+            "instructional_objective": placeholder,
+            "detailed_process": placeholder,
+            "learning_outcome": placeholder,
+            "category": "Documento",
+            "supporting_doc_url": doc,
+            "video_url": doc,
+            "venue": rng.choice(VENUES),
+            "status": rng.choice(STATUSES),
+            "received_at": now - timedelta(minutes=rng.randint(0, 60 * 24 * 90)),
+        })
+    with engine.begin() as conn:
+        for chunk in _chunks(rows):
+            conn.execute(insert(Proposal.__table__), chunk)
+    log(f"   … {len(rows)} propuestas")
+
+    return user_ids
+
+
+def main():
+    import os
+    import sys
+
+    parser = argparse.ArgumentParser(description="Carga datos sintéticos en la BD")
+    parser.add_argument("--database-url", default=os.environ.get("DATABASE_URL"))
+    parser.add_argument("--candidates", type=int, default=10000)
+    parser.add_argument("--proposals", type=int, default=30000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    if not args.database_url:
+        parser.error("define DATABASE_URL o usa --database-url")
+
+    # Migraciones primero; la app crea las tablas de sus modelos al importarse (misma BD)
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ.setdefault("SECRET_KEY", "bench")
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+    from load_test import migrate_schema
+    migrate_schema(args.database_url)
+    import call_for_papers_app as c4p
+
+    print(f"🌱 Sembrando {args.candidates} candidatos / {args.proposals} propuestas...")
+    with c4p.app.app_context():
+        seed(c4p.db.engine, (c4p.User, c4p.Profile, c4p.Proposal),
+             candidates=args.candidates, proposals=args.proposals, rng_seed=args.seed)
+    print("✅ Datos sintéticos cargados")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Revisores concurrentes sobre /admin/proposals, con y sin single-flight.
+
+En cada ronda se cambia un estatus (sube la versión de datos, así que la cache
+de listados está fría) y luego N revisores abren la tabla exactamente a la
+vez (barrera de hilos, como los threads de un worker). Sin single-flight cada
+request corre la consulta del listado y arma la tabla; con single-flight lo
+hace uno y los demás esperan su resultado.
+
+Reporta por modo: consultas del listado, tablas armadas, SQL totales y
+latencias. Sale con código 1 si con single-flight se calcula más de una vez
+por ronda o alguna respuesta sale mal.
+
+    python benchmarks/single_flight_sim.py
+    python benchmarks/single_flight_sim.py --reviewers 16 --rounds 10 --proposals 10000
+"""
+import argparse
+import sys
+import threading
+import time
+
+from load_test import load_app, make_client, percentile, prepare
+
+
+class NoCoalescing:
+    """Misma interfaz que SingleFlight, sin juntar nada (la línea base)."""
+
+    def do(self, key, fn):
+        return fn()
+
+    def snapshot(self):
+        return {}
+
+
+class Counters:
+    def __init__(self, c4p, engine):
+        from sqlalchemy import event
+
+        self.lock = threading.Lock()
+        self.values = {"listing": 0, "render": 0, "sql": 0}
+        event.listen(engine, "before_cursor_execute", lambda *a, **k: self.add("sql"))
+
+        load_rows, render_rows = c4p.load_admin_proposal_rows, c4p.render_admin_proposal_rows
+
+        def counted_load():
+            self.add("listing")
+            return load_rows()
+
+        def counted_render(version):
+            self.add("render")
+            return render_rows(version)
+
+        c4p.load_admin_proposal_rows = counted_load
+        c4p.render_admin_proposal_rows = counted_render
+
+    def add(self, name):
+        with self.lock:
+            self.values[name] += 1
+
+    def take(self):
+        with self.lock:
+            values, self.values = self.values, dict.fromkeys(self.values, 0)
+        return values
+
+
+def change_status(c4p):
+    with c4p.app.app_context():
+        proposal = c4p.Proposal.query.order_by(c4p.Proposal.id.asc()).first()
+        proposal.status = "Aceptada" if proposal.status != "Aceptada" else "Rechazada"
+        c4p.db.session.commit()
+
+
+def run_round(clients):
+    barrier = threading.Barrier(len(clients))
+    latencies, failures = [], []
+    lock = threading.Lock()
+
+    def reviewer(client):
+        barrier.wait()
+        t0 = time.perf_counter()
+        resp = client.get("/admin/proposals")
+        body = resp.get_data(as_text=True)
+        dt = time.perf_counter() - t0
+        with lock:
+            latencies.append(dt)
+            if resp.status_code != 200 or 'id="delete-proposal-form"' not in body:
+                failures.append(resp.status_code)
+
+    threads = [threading.Thread(target=reviewer, args=(c,)) for c in clients]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return latencies, failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Single-flight en /admin/proposals")
+    parser.add_argument("--candidates", type=int, default=1000)
+    parser.add_argument("--proposals", type=int, default=3000)
+    parser.add_argument("--reviewers", type=int, default=8)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--database-url")
+    args = parser.parse_args(argv)
+
+    c4p = load_app(args.database_url)
+    ctx = prepare(c4p, args.candidates, args.proposals, log=lambda *a: None)
+    with c4p.app.app_context():
+        engine = c4p.db.engine
+    counters = Counters(c4p, engine)
+    clients = [make_client(c4p, ctx, "admin") for _ in range(args.reviewers)]
+    real_single_flight = c4p.single_flight
+    ok = True
+
+    results = {}
+    for label, coalescer in (("sin single-flight", NoCoalescing()), ("con single-flight", real_single_flight)):
+        c4p.single_flight = coalescer
+        latencies, failures, per_round = [], [], []
+        counters.take()
+        for _ in range(args.rounds):
+            change_status(c4p)
+            counters.take()
+            round_latencies, round_failures = run_round(clients)
+            latencies += round_latencies
+            failures += round_failures
+            per_round.append(counters.take())
+        latencies.sort()
+        totals = {k: sum(round_[k] for round_ in per_round) for k in per_round[0]}
+        results[label] = totals
+        print(f"   {label}: {args.rounds} rondas × {args.reviewers} revisores -> "
+              f"listado={totals['listing']} tablas={totals['render']} sql={totals['sql']} "
+              f"p50={percentile(latencies, 50) * 1000:.1f}ms p95={percentile(latencies, 95) * 1000:.1f}ms "
+              f"fallas={len(failures)}")
+        ok &= not failures
+        if coalescer is real_single_flight:
+            ok &= all(round_["render"] == 1 and round_["listing"] == 1 for round_ in per_round)
+    c4p.single_flight = real_single_flight
+
+    before, after = results["sin single-flight"], results["con single-flight"]
+    print(f"   consultas del listado: {before['listing']} -> {after['listing']}; "
+          f"SQL totales: {before['sql']} -> {after['sql']}")
+    print(f"   métricas: {real_single_flight.snapshot()}")
+    print("✅ Single-flight OK" if ok else "❌ Single-flight con fallas")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+"""
+Escrituras concurrentes en SQLite: varios procesos (como workers de gunicorn)
+enviando propuestas a la misma BD por POST /submit.
+
+Cada proceso importa la app por su cuenta (multiprocessing "spawn", igual que
+workers separados) y cuenta respuestas exitosas, envíos fallidos y errores
+"database is locked" vistos por el engine, también los del arranque. Con
+--compare corre primero sin los PRAGMA de db_engine.py (SQLITE_TUNING=0:
+journal clásico) y luego con WAL.
+
+    python benchmarks/sqlite_concurrency.py
+    python benchmarks/sqlite_concurrency.py --workers 8 --requests 100 --compare
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+
+def worker(database_url, tuning, requests, ready, start_event, results):
+    stats = {"ok": 0, "failed": 0, "locked": 0, "crashed": 0, "latencies": []}
+    signalled = []
+
+    def signal_ready():
+        if not signalled:
+            signalled.append(True)
+            ready.release()
+
+    try:
+        _worker(database_url, tuning, requests, signal_ready, start_event, stats)
+    except Exception as e:
+        # P.ej. "database is locked" al arrancar (bootstrap_admins escribe en cada import)
+        stats["crashed"] = 1
+        if "database is locked" in str(e):
+            stats["locked"] += 1
+        print(f"❌ worker {os.getpid()}: {type(e).__name__}: {str(e).splitlines()[0]}")
+    finally:
+        signal_ready()
+        results.put(stats)
+
+
+def _worker(database_url, tuning, requests, signal_ready, start_event, stats):
+    os.environ["SQLITE_TUNING"] = "1" if tuning else "0"
+    from load_test import load_app, make_client, prepare, submit_data
+    from sqlalchemy import event
+
+    c4p = load_app(database_url)
+    ctx = prepare(c4p, candidates=10, proposals=0, log=lambda *a: None)
+
+    def on_error(context):
+        if "database is locked" in str(context.original_exception):
+            stats["locked"] += 1
+
+    with c4p.app.app_context():
+        event.listen(c4p.db.engine, "handle_error", on_error)
+
+    client = make_client(c4p, ctx, "candidate")
+    signal_ready()
+    start_event.wait()
+    for _ in range(requests):
+        t0 = time.perf_counter()
+        resp = client.post("/submit", data=submit_data(ctx), content_type="multipart/form-data")
+        stats["latencies"].append(time.perf_counter() - t0)
+        if resp.status_code == 302 and resp.location.endswith("/proposals"):
+            stats["ok"] += 1
+        else:
+            stats["failed"] += 1
+
+
+def run(workers, requests, tuning):
+    tmpdir = tempfile.mkdtemp(prefix="c4p-concurrency-")
+    database_url = "sqlite:///" + os.path.join(tmpdir, "concurrency.db")
+
+    # Siembra una vez antes de lanzar los workers (así no compiten por crear tablas)
+    os.environ["SQLITE_TUNING"] = "1" if tuning else "0"
+    ctx = multiprocessing.get_context("spawn")
+    seed = ctx.Process(target=_seed, args=(database_url,))
+    seed.start()
+    seed.join()
+
+    ready = ctx.Semaphore(0)
+    start_event = ctx.Event()
+    results = ctx.Queue()
+    procs = [
+        ctx.Process(target=worker, args=(database_url, tuning, requests, ready, start_event, results))
+        for _ in range(workers)
+    ]
+    for p in procs:
+        p.start()
+    # Arrancan todos a la vez, cuando ya terminaron de importar la app
+    for _ in procs:
+        ready.acquire()
+    started = time.perf_counter()
+    start_event.set()
+    collected = [results.get() for _ in procs]
+    elapsed = time.perf_counter() - started
+    for p in procs:
+        p.join()
+
+    from load_test import percentile
+    lat = sorted(x for r in collected for x in r["latencies"])
+    return {
+        "ok": sum(r["ok"] for r in collected),
+        "failed": sum(r["failed"] for r in collected),
+        "locked": sum(r["locked"] for r in collected),
+        "crashed": sum(r["crashed"] for r in collected),
+        "p50_ms": percentile(lat, 50) * 1000,
+        "p99_ms": percentile(lat, 99) * 1000,
+        "rps": len(lat) / elapsed if elapsed else 0.0,
+    }
+
+
+def _seed(database_url):
+    from load_test import load_app, prepare
+    prepare(load_app(database_url), candidates=10, proposals=0, log=lambda *a: None)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Escrituras concurrentes en SQLite")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=50, help="envíos por worker")
+    parser.add_argument("--compare", action="store_true", help="corre también sin WAL/busy_timeout")
+    args = parser.parse_args(argv)
+
+    modes = [False, True] if args.compare else [True]
+    print(f"{'modo':<10} {'ok':>6} {'fallidos':>9} {'locked':>7} {'caídos':>7} {'p50 ms':>8} {'p99 ms':>8} {'req/s':>7}")
+    status = 0
+    for tuning in modes:
+        r = run(args.workers, args.requests, tuning)
+        name = "WAL" if tuning else "clásico"
+        print(f"{name:<10} {r['ok']:>6} {r['failed']:>9} {r['locked']:>7} {r['crashed']:>7} "
+              f"{r['p50_ms']:>8.1f} {r['p99_ms']:>8.1f} {r['rps']:>7.1f}")
+        if tuning and (r["failed"] or r["locked"] or r["crashed"]):
+            status = 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    sys.exit(main())
@@ -0,0 +1,140 @@
+"""
+Documentos de propuesta sintéticos (texto en español, PDF y DOCX) para los
+benchmarks de búsqueda y de detección de duplicados.
+
+    from synthetic_docs import proposal_text, make_pdf, make_docx
+"""
+import io
+import random
+import zipfile
+from xml.sax.saxutils import escape
+
+from seed_data import COMPANIES, TOPICS
+
+SUBJECTS = [
+    "el equipo de mantenimiento", "la planta", "el área de confiabilidad", "el comité de activos",
+    "la gerencia de operaciones", "el taller central", "los técnicos de turno", "el planeador",
+]
+ACTIONS = [
+    "redujo", "documentó", "midió", "priorizó", "estandarizó", "automatizó", "auditó", "rediseñó",
+    "analizó", "programó", "validó", "implementó",
+]
+OBJECTS = [
+    "las fallas repetitivas de bombas centrífugas", "el consumo de lubricante en reductores",
+    "el tiempo medio entre fallas de compresores", "las órdenes de trabajo atrasadas",
+    "la criticidad de los activos rotativos", "las rutas de inspección sensorial",
+    "el inventario de refacciones críticas", "los paros no programados de la línea de envasado",
+    "la temperatura de rodamientos en motores", "el desbalance de ventiladores de tiro inducido",
+    "la contaminación por partículas en sistemas hidráulicos", "los planes de mantenimiento preventivo",
+    "el costo de mantenimiento por tonelada", "la disponibilidad de las calderas",
+    "los modos de falla de transportadores de banda", "la holgura de acoplamientos",
+]
+RESULTS = [
+    "con una mejora del {n}% en disponibilidad", "ahorrando {n} horas de paro al mes",
+    "en {n} semanas de trabajo", "con un retorno de la inversión de {n} meses",
+    "y bajó los costos un {n}%", "sobre {n} equipos críticos", "durante {n} meses de seguimiento",
+]
+CONNECTORS = [
+    "Además,", "Como resultado,", "Posteriormente,", "En la segunda etapa,", "Con base en los datos,",
+    "Finalmente,", "Durante el piloto,", "Para sostener el cambio,",
+]
+
+
+def sentence(rng):
+    result = rng.choice(RESULTS).format(n=rng.randint(5, 60))
+    text = f"{rng.choice(SUBJECTS)} {rng.choice(ACTIONS)} {rng.choice(OBJECTS)} {result}."
+    if rng.random() < 0.4:
+        text = f"{rng.choice(CONNECTORS)} {text}"
+    return text[0].upper() + text[1:]
+
+
+def proposal_text(rng, sentences=40, topic=None, company=None):
+    """Texto de una propuesta: título, resumen y varios párrafos."""
+    topic = topic or rng.choice(TOPICS)
+    company = company or rng.choice(COMPANIES)
+    paragraphs = [f"{topic} en {company}", f"Caso de estudio presentado por {company} sobre {topic.lower()}."]
+    body = [sentence(rng) for _ in range(sentences)]
+    for i in range(0, len(body), 5):
+        paragraphs.append(" ".join(body[i:i + 5]))
+    return "\n".join(paragraphs)
+
+# =========================
+# FORMATOS
+# =========================
+
+def _pdf_escape(line):
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_pdf(text, line_width=90):
+    """PDF mínimo de una página por cada 50 líneas (Helvetica, WinAnsi)."""
+    lines = []
+    for paragraph in text.split("\n"):
+        words, current = paragraph.split(), ""
+        for w in words:
+            if len(current) + len(w) + 1 > line_width:
+                lines.append(current)
+                current = w
+            else:
+                current = f"{current} {w}".strip()
+        lines.append(current)
+    pages = [lines[i:i + 50] for i in range(0, len(lines), 50)] or [[""]]
+
+    objects = []  # cuerpo de cada objeto (el número es índice + 1)
+    font_id, pages_id = 1, 2
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+    objects.append(None)  # /Pages: se llena al final
+    page_ids = []
+    for page_lines in pages:
+        ops = ["BT", "/F1 10 Tf", "14 TL", "50 780 Td"]
+        ops += [f"({_pdf_escape(line)}) Tj T*" for line in page_lines]
+        ops.append("ET")
+        stream = "\n".join(ops).encode("cp1252", errors="replace")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        content_id = len(objects)
+        objects.append((
+            f"<< /Type /Page /Parent {pages_id} 0 R /MediaBox [0 0 612 842] "
+            f"/Resources << /Font << /F1 {font_id} 0 R >> >> /Contents {content_id} 0 R >>"
+        ).encode())
+        page_ids.append(len(objects))
+    kids = " ".join(f"{i} 0 R" for i in page_ids)
+    objects[pages_id - 1] = f"<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>".encode()
+    objects.append(f"<< /Type /Catalog /Pages {pages_id} 0 R >>".encode())
+    catalog_id = len(objects)
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for i, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n" % i + body + b"\nendobj\n")
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for off in offsets:
+        out.write(b"%010d 00000 n \n" % off)
+    out.write(b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, catalog_id, xref))
+    return out.getvalue()
+
+
+def make_docx(text):
+    """DOCX mínimo (un párrafo por línea)."""
+    ns = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+    body = "".join(f"<w:p><w:r><w:t xml:space=\"preserve\">{escape(p)}</w:t></w:r></w:p>" for p in text.split("\n"))
+    document = f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?><w:document xmlns:w="{ns}"><w:body>{body}</w:body></w:document>'
+    content_types = (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/word/document.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+        '</Types>'
+    )
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("[Content_Types].xml", content_types)
+        zf.writestr("word/document.xml", document)
+    return buf.getvalue()
+
+
+if __name__ == "__main__":
+    print(proposal_text(random.Random(1)))
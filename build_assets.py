@@ -0,0 +1,346 @@
+"""
+Genera el CSS estático de la app (reemplaza el compilador JIT de Tailwind en el navegador).
+
+Escanea las plantillas (strings dentro de los .py) buscando clases estilo
+Tailwind, genera SOLO las reglas de las clases usadas, minifica y escribe un
+archivo con hash de contenido:
+
+    static/css/c4p.<hash>.css
+    static/css/manifest.json   ->  {"c4p.css": "css/c4p.<hash>.css"}
+
+La app lee el manifest al arrancar y sirve el archivo con cache inmutable.
+Correr después de modificar clases en las plantillas:
+
+    python build_assets.py
+"""
+import glob
+import hashlib
+import json
+import os
+import re
+import sys
+
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+CSS_DIR = os.path.join(BASE_DIR, "static", "css")
+MANIFEST_PATH = os.path.join(CSS_DIR, "manifest.json")
+BUNDLE_NAME = "c4p"
+
+SOURCES = ["call_for_papers_app.py"]
+
+FONT_STACK = "Inter,system-ui,-apple-system,'Segoe UI',Roboto,'Helvetica Neue',Arial,sans-serif"
+MONO_STACK = "ui-monospace,SFMono-Regular,Menlo,Monaco,Consolas,'Courier New',monospace"
+
+# =========================
+# TOKENS (subconjunto de Tailwind v3 que usa la app)
+# =========================
+
+PALETTE = {
+    "gray": ["f9fafb", "f3f4f6", "e5e7eb", "d1d5db", "9ca3af", "6b7280", "4b5563", "374151", "1f2937", "111827"],
+    "red": ["fef2f2", "fee2e2", "fecaca", "fca5a5", "f87171", "ef4444", "dc2626", "b91c1c", "991b1b", "7f1d1d"],
+    "yellow": ["fefce8", "fef9c3", "fef08a", "fde047", "facc15", "eab308", "ca8a04", "a16207", "854d0e", "713f12"],
+    "green": ["f0fdf4", "dcfce7", "bbf7d0", "86efac", "4ade80", "22c55e", "16a34a", "15803d", "166534", "14532d"],
+    "blue": ["eff6ff", "dbeafe", "bfdbfe", "93c5fd", "60a5fa", "3b82f6", "2563eb", "1d4ed8", "1e40af", "1e3a8a"],
+    "purple": ["faf5ff", "f3e8ff", "e9d5ff", "d8b4fe", "c084fc", "a855f7", "9333ea", "7e22ce", "6b21a8", "581c87"],
+}
+SHADES = ["50", "100", "200", "300", "400", "500", "600", "700", "800", "900"]
+
+COLORS = {"white": "ffffff", "black": "000000"}
+for family, values in PALETTE.items():
+    for shade, value in zip(SHADES, values):
+        COLORS[f"{family}-{shade}"] = value
+
+FONT_SIZES = {
+    "xs": ("0.75rem", "1rem"), "sm": ("0.875rem", "1.25rem"), "base": ("1rem", "1.5rem"),
+    "lg": ("1.125rem", "1.75rem"), "xl": ("1.25rem", "1.75rem"), "2xl": ("1.5rem", "2rem"),
+    "3xl": ("1.875rem", "2.25rem"), "4xl": ("2.25rem", "2.5rem"),
+}
+FONT_WEIGHTS = {"normal": "400", "medium": "500", "semibold": "600", "bold": "700", "extrabold": "800"}
+RADII = {"": "0.25rem", "sm": "0.125rem", "md": "0.375rem", "lg": "0.5rem", "xl": "0.75rem", "2xl": "1rem", "full": "9999px"}
+MAX_WIDTHS = {"sm": "24rem", "md": "28rem", "lg": "32rem", "xl": "36rem", "2xl": "42rem", "4xl": "56rem", "6xl": "72rem", "7xl": "80rem"}
+SHADOWS = {
+    "sm": "0 1px 2px 0 rgba(0,0,0,.05)",
+    "": "0 1px 3px 0 rgba(0,0,0,.1),0 1px 2px -1px rgba(0,0,0,.1)",
+    "md": "0 4px 6px -1px rgba(0,0,0,.1),0 2px 4px -2px rgba(0,0,0,.1)",
+    "lg": "0 10px 15px -3px rgba(0,0,0,.1),0 4px 6px -4px rgba(0,0,0,.1)",
+    "xl": "0 20px 25px -5px rgba(0,0,0,.1),0 8px 10px -6px rgba(0,0,0,.1)",
+    "2xl": "0 25px 50px -12px rgba(0,0,0,.25)",
+    "inner": "inset 0 2px 4px 0 rgba(0,0,0,.05)",
+}
+BREAKPOINTS = {"sm": "640px", "md": "768px", "lg": "1024px"}
+PSEUDO_VARIANTS = {"hover": ":hover", "focus": ":focus"}
+
+STATIC_RULES = {
+    "block": "display:block", "inline-block": "display:inline-block", "inline-flex": "display:inline-flex",
+    "flex": "display:flex", "grid": "display:grid", "hidden": "display:none",
+    "flex-col": "flex-direction:column", "flex-grow": "flex-grow:1", "flex-wrap": "flex-wrap:wrap",
+    "items-center": "align-items:center", "justify-between": "justify-content:space-between",
+    "justify-center": "justify-content:center", "col-span-full": "grid-column:1/-1",
+    "object-cover": "object-fit:cover", "overflow-x-auto": "overflow-x:auto",
+    "list-disc": "list-style-type:disc", "list-decimal": "list-style-type:decimal",
+    "list-inside": "list-style-position:inside",
+    "text-center": "text-align:center", "text-left": "text-align:left", "text-right": "text-align:right",
+    "uppercase": "text-transform:uppercase", "tracking-wider": "letter-spacing:.05em",
+    "leading-tight": "line-height:1.25", "whitespace-pre-line": "white-space:pre-line",
+    "whitespace-nowrap": "white-space:nowrap",
+    "underline": "text-decoration-line:underline", "font-mono": f"font-family:{MONO_STACK}",
+    "w-full": "width:100%", "w-auto": "width:auto", "min-w-full": "min-width:100%",
+    "min-h-screen": "min-height:100vh", "mx-auto": "margin-left:auto;margin-right:auto",
+    "ml-auto": "margin-left:auto",
+    "border-dashed": "border-style:dashed",
+    "transition": ("transition-property:color,background-color,border-color,text-decoration-color,"
+                   "fill,stroke,opacity,box-shadow,transform,filter;"
+                   "transition-timing-function:cubic-bezier(.4,0,.2,1);transition-duration:150ms"),
+    "ring": "--tw-ring-width:3px;box-shadow:0 0 0 var(--tw-ring-width) var(--tw-ring-color,rgba(59,130,246,.5))",
+}
+
+SPACING_PROPS = {
+    "p": ["padding"], "px": ["padding-left", "padding-right"], "py": ["padding-top", "padding-bottom"],
+    "pt": ["padding-top"], "pb": ["padding-bottom"], "pl": ["padding-left"], "pr": ["padding-right"],
+    "m": ["margin"], "mx": ["margin-left", "margin-right"], "my": ["margin-top", "margin-bottom"],
+    "mt": ["margin-top"], "mb": ["margin-bottom"], "ml": ["margin-left"], "mr": ["margin-right"],
+    "w": ["width"], "h": ["height"], "gap": ["gap"],
+}
+COLOR_PROPS = {"bg": "background-color", "text": "color", "border": "border-color"}
+
+SIBLINGS = ">:not([hidden])~:not([hidden])"
+
+# =========================
+# RESOLUCIÓN DE CLASES
+# =========================
+
+def spacing(value):
+    try:
+        n = float(value)
+    except ValueError:
+        return None
+    if n < 0 or n > 96:
+        return None
+    return "0px" if n == 0 else f"{n * 0.25:g}rem"
+
+
+def color(value):
+    """'gray-200', 'white/40', '[#2F4885]' -> valor CSS."""
+    alpha = None
+    if "/" in value and not value.startswith("["):
+        value, alpha = value.split("/", 1)
+    if value.startswith("[#") and value.endswith("]"):
+        hexv = value[2:-1]
+    else:
+        hexv = COLORS.get(value)
+    if not hexv or not re.fullmatch(r"[0-9a-fA-F]{6}", hexv):
+        return None
+    if alpha is None:
+        return f"#{hexv.lower()}"
+    if not alpha.isdigit():
+        return None
+    r, g, b = (int(hexv[i:i + 2], 16) for i in (0, 2, 4))
+    return f"rgba({r},{g},{b},{int(alpha) / 100:g})"
+
+
+def resolve(utility):
+    """Regresa (sufijo_selector, declaraciones) o None si no es una utilidad conocida."""
+    if utility in STATIC_RULES:
+        return "", STATIC_RULES[utility]
+
+    prefix, _, value = utility.partition("-")
+
+    if prefix in SPACING_PROPS and value:
+        v = spacing(value)
+        if v is None:
+            return None
+        return "", ";".join(f"{prop}:{v}" for prop in SPACING_PROPS[prefix])
+
+    if prefix == "space" and value[:2] in ("x-", "y-"):
+        v = spacing(value[2:])
+        if v is None:
+            return None
+        prop = "margin-left" if value[0] == "x" else "margin-top"
+        return SIBLINGS, f"{prop}:{v}"
+
+    if prefix == "text":
+        if value in FONT_SIZES:
+            size, line = FONT_SIZES[value]
+            return "", f"font-size:{size};line-height:{line}"
+        c = color(value)
+        return ("", f"color:{c}") if c else None
+
+    if prefix == "font" and value in FONT_WEIGHTS:
+        return "", f"font-weight:{FONT_WEIGHTS[value]}"
+
+    if prefix == "bg":
+        c = color(value)
+        return ("", f"background-color:{c}") if c else None
+
+    if prefix == "border":
+        if value == "":
+            return "", "border-width:1px"
+        if value.isdigit():
+            return "", f"border-width:{value}px"
+        sides = {"t": "top", "b": "bottom", "l": "left", "r": "right"}
+        side, _, width = value.partition("-")
+        if side in sides:
+            if width == "":
+                return "", f"border-{sides[side]}-width:1px"
+            if width.isdigit():
+                return "", f"border-{sides[side]}-width:{width}px"
+            return None
+        c = color(value)
+        return ("", f"border-color:{c}") if c else None
+
+    if prefix == "divide":
+        if value == "y":
+            return SIBLINGS, "border-top-width:1px;border-bottom-width:0"
+        if value == "x":
+            return SIBLINGS, "border-left-width:1px;border-right-width:0"
+        c = color(value)
+        return (SIBLINGS, f"border-color:{c}") if c else None
+
+    if prefix == "ring":
+        if value.isdigit():
+            return "", (f"--tw-ring-width:{value}px;"
+                        "box-shadow:0 0 0 var(--tw-ring-width) var(--tw-ring-color,rgba(59,130,246,.5))")
+        c = color(value)
+        return ("", f"--tw-ring-color:{c}") if c else None
+
+    if prefix == "rounded":
+        return ("", f"border-radius:{RADII[value]}") if value in RADII else None
+
+    if utility == "shadow" or prefix == "shadow":
+        key = "" if utility == "shadow" else value
+        return ("", f"box-shadow:{SHADOWS[key]}") if key in SHADOWS else None
+
+    if prefix == "max" and value.startswith("w-"):
+        w = MAX_WIDTHS.get(value[2:])
+        return ("", f"max-width:{w}") if w else None
+
+    if prefix == "grid" and value.startswith("cols-") and value[5:].isdigit():
+        return "", f"grid-template-columns:repeat({value[5:]},minmax(0,1fr))"
+
+    if prefix == "col" and value.startswith("span-") and value[5:].isdigit():
+        n = value[5:]
+        return "", f"grid-column:span {n}/span {n}"
+
+    if prefix in ("opacity", "duration") and value.isdigit():
+        if prefix == "opacity":
+            return "", f"opacity:{int(value) / 100:g}"
+        return "", f"transition-duration:{value}ms"
+
+    return None
+
+
+def escape(class_name):
+    return re.sub(r"([^A-Za-z0-9_-])", r"\\\1", class_name)
+
+
+def build_rule(class_name):
+    """Regresa (breakpoint, css) para una clase, o None si no aplica."""
+    *variants, utility = class_name.split(":")
+    if not utility:
+        return None
+
+    breakpoint = None
+    pseudo = ""
+    for v in variants:
+        if v in BREAKPOINTS and breakpoint is None:
+            breakpoint = v
+        elif v in PSEUDO_VARIANTS:
+            pseudo += PSEUDO_VARIANTS[v]
+        else:
+            return None
+
+    resolved = resolve(utility)
+    if resolved is None:
+        return None
+    suffix, declarations = resolved
+    return breakpoint, f".{escape(class_name)}{pseudo}{suffix}{{{declarations}}}"
+
+# =========================
+# CSS BASE
+# =========================
+
+PREFLIGHT = (
+    "*,::before,::after{box-sizing:border-box;border:0 solid #e5e7eb}"
+    f"html{{line-height:1.5;-webkit-text-size-adjust:100%;font-family:{FONT_STACK}}}"
+    "body{margin:0;line-height:inherit}"
+    "h1,h2,h3,h4,h5,h6{font-size:inherit;font-weight:inherit}"
+    "a{color:inherit;text-decoration:inherit}"
+    "b,strong{font-weight:bolder}"
+    "table{text-indent:0;border-color:inherit;border-collapse:collapse}"
+    "button,input,select,textarea{font-family:inherit;font-size:100%;font-weight:inherit;"
+    "line-height:inherit;color:inherit;margin:0;padding:0}"
+    "button{text-transform:none;background-color:transparent;background-image:none;cursor:pointer}"
+    "blockquote,dl,dd,h1,h2,h3,h4,h5,h6,hr,figure,p,pre{margin:0}"
+    "ol,ul,menu{list-style:none;margin:0;padding:0}"
+    "textarea{resize:vertical}"
+    "input::placeholder,textarea::placeholder{opacity:1;color:#9ca3af}"
+    "img,svg,video{display:block;vertical-align:middle;max-width:100%;height:auto}"
+    "[hidden]{display:none}"
+)
+
+# Antes vivían en el <style> de BASE_CSS
+APP_CSS = (
+    f"body{{font-family:{FONT_STACK};background-color:#DBDEE3}}"
+    ".cmc-blue{background-color:#2F4885}"
+    ".cmc-text-blue{color:#2F4885}"
+    ".cmc-gray{color:#818788}"
+    ".cmc-border{border-color:#818788}"
+    'input[type="text"],input[type="email"],input[type="tel"],input[type="url"],'
+    'input[type="file"],textarea,select{border:1px solid #DBDEE3}'
+)
+
+# =========================
+# BUILD
+# =========================
+
+TOKEN_RE = re.compile(r"[A-Za-z0-9_:\-\[\]#/.%]+")
+
+
+def collect_classes(paths):
+    classes = set()
+    for path in paths:
+        with open(path, encoding="utf-8") as fh:
+            classes.update(TOKEN_RE.findall(fh.read()))
+    return classes
+
+
+def generate_css(classes):
+    base, responsive = [], {bp: [] for bp in BREAKPOINTS}
+    for class_name in sorted(classes):
+        rule = build_rule(class_name)
+        if rule is None:
+            continue
+        breakpoint, css = rule
+        (responsive[breakpoint] if breakpoint else base).append(css)
+
+    # Orden: utilidades base, luego variantes con pseudo-clase, luego media queries
+    base.sort(key=lambda css: ":hover" in css or ":focus" in css)
+    parts = [PREFLIGHT, APP_CSS, *base]
+    for bp, rules in responsive.items():
+        if rules:
+            parts.append(f"@media (min-width:{BREAKPOINTS[bp]}){{{''.join(rules)}}}")
+    return "".join(parts)
+
+
+def build(sources=None):
+    paths = [os.path.join(BASE_DIR, s) for s in (sources or SOURCES)]
+    css = generate_css(collect_classes(paths))
+    digest = hashlib.sha256(css.encode("utf-8")).hexdigest()[:12]
+    filename = f"{BUNDLE_NAME}.{digest}.css"
+
+    os.makedirs(CSS_DIR, exist_ok=True)
+    for old in glob.glob(os.path.join(CSS_DIR, f"{BUNDLE_NAME}.*.css")):
+        if os.path.basename(old) != filename:
+            os.remove(old)
+
+    with open(os.path.join(CSS_DIR, filename), "w", encoding="utf-8") as fh:
+        fh.write(css)
+    with open(MANIFEST_PATH, "w", encoding="utf-8") as fh:
+        json.dump({f"{BUNDLE_NAME}.css": f"css/{filename}"}, fh, indent=2)
+        fh.write("\n")
+
+    return filename, len(css)
+
+
+if __name__ == "__main__":
+    name, size = build(sys.argv[1:] or None)
+    print(f"✅ CSS generado: static/css/{name} ({size / 1024:.1f} KB)")
@@ -1,7 +1,18 @@
+import gzip
+import hashlib
+import io
+import json
+import mimetypes
 import os
+import re
 import secrets
 import string
-from datetime import datetime
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from functools import wraps
 
 from urllib.parse import urlparse  # (se mantiene aunque ya no se use para CV/FOTO/VIDEO en esta versión)
 from flask_wtf import CSRFProtect
@@ -9,12 +20,18 @@ from flask_wtf.csrf import generate_csrf
 from flask_wtf import FlaskForm
 from flask import (
     Flask, request, redirect, url_for, flash,
-    session, render_template_string
+    session, render_template, render_template_string, get_flashed_messages,
+    abort, send_file, Response, g, has_app_context, has_request_context
 )
-from sqlalchemy import text
+from sqlalchemy import event, select, text, update
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session as FlaskSQLAlchemySession
 from sqlalchemy import case
+from sqlalchemy.exc import DBAPIError, IntegrityError, InterfaceError, OperationalError
+from markupsafe import escape
+from werkzeug.datastructures import FileStorage
 from werkzeug.security import generate_password_hash, check_password_hash
+from werkzeug.utils import secure_filename
 
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
@@ -26,6 +43,29 @@ import cloudinary.uploader
 import cloudinary.api
 #------------------------------#
 
+from db_engine import configure_engine, engine_options
+from db_resilience import DB_BREAKER_RESET_SECONDS, guard_for, install_resilience, is_circuit_open_error
+from proposal_stats import apply_deltas, flush_deltas, read_summary
+from query_cache import QueryCache, SingleFlight, bump_version as bump_data_version, current_version as current_data_version
+from notifications import enqueue_status_change
+from audit_log import AuditBuffer, format_cursor, parse_cursor, read_page, record as record_audit
+from proposal_search import HIGHLIGHT_END, HIGHLIGHT_START, document_texts, enqueue_document, search as search_documents
+from near_duplicates import duplicate_flags
+from storage import LocalStorage, create_storage
+from chunked_upload import ChunkedUploadError, ChunkedUploadSpool, OffsetMismatch
+
+# Opcional: normalización de fotos (sin Pillow se sube la foto tal cual)
+try:
+    from PIL import Image, ImageOps, features as pil_features
+except ImportError:
+    Image = None
+
+# Opcional: compresión brotli (si no está instalado se usa solo gzip)
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
 # =========================
 # CONFIGURACIÓN
 # =========================
@@ -46,35 +86,48 @@ DB_DIR = os.path.join(basedir, "data")
 os.makedirs(DB_DIR, exist_ok=True)
 DB_PATH = os.path.join(DB_DIR, "c4p_cmc.db")
 
-# ✅ Connection pooling & auto-reconnection for Postgres
-app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
-    "pool_pre_ping": True,  # Verifica conexiones antes de usarlas
-    "pool_recycle": 300,    # Recicla conexiones después de 5 minutos
-    "pool_size": 10,        # Número de conexiones a mantener
-    "max_overflow": 20,     # Conexiones adicionales cuando el pool está lleno
-    "connect_args": {
-        "connect_timeout": 10,
-        "keepalives": 1,
-        "keepalives_idle": 30,
-        "keepalives_interval": 10,
-        "keepalives_count": 5,
-    }
-}
-
 import os
 
 app.config["SQLALCHEMY_DATABASE_URI"] = os.getenv(
     "DATABASE_URL",
     "sqlite:///c4p_cmc.db"
 )
+
+# ✅ Pool y opciones según el dialecto (ver db_engine.py): keepalives/pool para
+# Postgres; WAL + busy_timeout para SQLite
+app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(app.config["SQLALCHEMY_DATABASE_URI"])
 app.config['SECRET_KEY'] = '9f3d8c7c8b1a4e9fbb9a4c0c9cbd0f47e7d9c0f5'
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 
+# ✅ Réplica de lectura opcional: las vistas de admin marcadas con @read_replica
+# leen de aquí en GET (ver sección RÉPLICA DE LECTURA)
+DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL")
+if DATABASE_REPLICA_URL:
+    app.config["SQLALCHEMY_BINDS"] = {
+        "replica": {"url": DATABASE_REPLICA_URL, **engine_options(DATABASE_REPLICA_URL)},
+    }
+
+class RoutingSession(FlaskSQLAlchemySession):
+    """Envía las lecturas a la réplica mientras la vista lo pida (g.db_route)."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and not self._flushing and has_app_context()
+                and g.get("db_route") == "replica" and "replica" in self._db.engines):
+            return self._db.engines["replica"]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
 # Límite de carga (ajusta si quieres)
 app.config["MAX_CONTENT_LENGTH"] = 100 * 1024 * 1024  # 100 MB
-db = SQLAlchemy(app)
+db = SQLAlchemy(app, session_options={"class_": RoutingSession})
 with app.app_context():
-    db.create_all()
+    for _bind_key, _engine in db.engines.items():
+        configure_engine(_engine)  # antes de la primera conexión
+        if _bind_key == "replica":
+            # Sin reintentos: si la réplica falla se lee del primario de inmediato
+            install_resilience(_engine, "replica", attempts=1)
+        else:
+            install_resilience(_engine, "primary")
+    db.create_all(bind_key=None)
 
 app.config.update(
     SECRET_KEY=os.environ.get("SECRET_KEY"),
@@ -105,6 +158,20 @@ cloudinary.config(
 )
 #-----------------------------#
 
+# =========================
+# ALMACENAMIENTO DE ARCHIVOS
+# =========================
+# STORAGE_BACKEND=cloudinary (default) | local
+# Con "local" los archivos viven en STORAGE_LOCAL_ROOT y se sirven en /files/...;
+# STORAGE_ACCEL_REDIRECT (p.ej. "/protected-files") delega el envío a nginx.
+
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "cloudinary")
+STORAGE_LOCAL_ROOT = os.getenv("STORAGE_LOCAL_ROOT", os.path.join(DB_DIR, "files"))
+STORAGE_ACCEL_REDIRECT = os.getenv("STORAGE_ACCEL_REDIRECT")
+app.config["USE_X_SENDFILE"] = os.getenv("STORAGE_X_SENDFILE") == "1"
+
+storage = create_storage(STORAGE_BACKEND, local_root=STORAGE_LOCAL_ROOT, url_prefix="/files")
+
 # =========================
 # ROLES / ADMINS (COMITÉ TÉCNICO)
 # =========================
@@ -130,20 +197,33 @@ def is_admin_user(user) -> bool:
 # HELPERS
 # =========================
 
-def upload_to_cloudinary(file, folder):
-    if not file or file.filename == "":
-        return None
+def upload_file(file, folder):
+    """Sube al backend configurado (STORAGE_BACKEND) y regresa la URL pública."""
+    return storage.save(file, folder)
 
-    result = cloudinary.uploader.upload(
-        file,
-        folder=folder,
-        upload_preset="c4p_public",  # 🔑 CLAVE
-        resource_type="auto",
-        use_filename=True,
-        unique_filename=True,
-        overwrite=False
-    )
-    return result.get("secure_url")
+# Pool compartido para subidas concurrentes (I/O de red, no CPU)
+UPLOAD_WORKERS = int(os.getenv("UPLOAD_WORKERS", "8"))
+upload_pool = ThreadPoolExecutor(max_workers=UPLOAD_WORKERS, thread_name_prefix="upload")
+
+def upload_files_concurrently(uploads):
+    """
+    uploads: {clave: (file, folder)} -> {clave: url o None}.
+    Las subidas corren en paralelo; una falla no cancela a las demás.
+    Las claves sin archivo no se suben y regresan None.
+    """
+    futures = {
+        key: upload_pool.submit(upload_file, f, folder)
+        for key, (f, folder) in uploads.items()
+        if f and f.filename
+    }
+
+    results = dict.fromkeys(uploads)
+    for key, future in futures.items():
+        try:
+            results[key] = future.result()
+        except Exception as e:
+            print(f"❌ Error al subir {key}:", e)
+    return results
 
 MAX_FILE_SIZES = {
     "cv": 5 * 1024 * 1024,       # 5 MB
@@ -171,6 +251,195 @@ def allowed_file(filename: str, file_type: str) -> bool:
         return False
     ext = filename.rsplit(".", 1)[1].lower()
     return ext in ALLOWED_EXTENSIONS.get(file_type, set())
+
+# =========================
+# FOTOS: normalización + derivados
+# =========================
+# La foto se decodifica, se corrige la orientación EXIF, se descartan los
+# metadatos y se re-codifica en tamaños fijos. El header solo descarga el avatar.
+
+PHOTO_DERIVATIVES = {
+    "avatar": ((96, 96), "crop"),       # header (36px, pantallas 2x/3x)
+    "card": ((480, 480), "fit"),        # vistas de admin
+    "original": ((1600, 1600), "fit"),  # "Ver Foto"
+}
+
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", "2"))
+# Pillow libera el GIL al decodificar/redimensionar/codificar
+image_pool = ThreadPoolExecutor(max_workers=IMAGE_WORKERS, thread_name_prefix="image")
+
+class InvalidImageError(ValueError):
+    pass
+
+def photo_format():
+    if pil_features.check("webp"):
+        return "WEBP", "webp", {"quality": 80, "method": 2}
+    return "JPEG", "jpg", {"quality": 82, "optimize": True, "progressive": True}
+
+def load_photo(data):
+    """bytes de la foto -> imagen RGB reducida al tamaño "original", sin orientación EXIF pendiente"""
+    try:
+        img = Image.open(io.BytesIO(data))
+        # thumbnail() usa draft/reduce: en JPEG grandes decodifica directo a escala reducida.
+        # Los derivados chicos salen de este "original" ya reducido, no de la foto completa.
+        img.thumbnail(PHOTO_DERIVATIVES["original"][0], Image.LANCZOS, reducing_gap=1.0)
+    except Exception as e:
+        raise InvalidImageError(str(e)) from e
+
+    img = ImageOps.exif_transpose(img)
+    if img.mode != "RGB":
+        img = img.convert("RGB")
+    img.load()  # los derivados leen la misma imagen desde varios hilos
+    return img
+
+def encode_derivative(img, size, mode):
+    """Un derivado de `img` -> (bytes, extensión)"""
+    fmt, ext, options = photo_format()
+    if mode == "crop":
+        out = ImageOps.fit(img, size, Image.LANCZOS)
+    else:
+        out = img.copy()
+        out.thumbnail(size, Image.LANCZOS, reducing_gap=2.0)
+    buf = io.BytesIO()
+    out.save(buf, fmt, **options)  # sin exif=: no se copian metadatos
+    return buf.getvalue(), ext
+
+def process_photo(data):
+    """bytes de la foto -> {derivado: (bytes, extensión)}"""
+    img = load_photo(data)
+    # Se encolan todos los derivados antes de esperar: se codifican en paralelo
+    futures = {
+        name: image_pool.submit(encode_derivative, img, size, mode)
+        for name, (size, mode) in PHOTO_DERIVATIVES.items()
+    }
+    return {name: future.result() for name, future in futures.items()}
+
+def photo_derivative_uploads(photo_file, folder):
+    """
+    Procesa la foto (derivados en el pool de imágenes) y regresa los archivos a subir
+    {"photo": ..., "photo_avatar": ..., "photo_card": ...}.
+    Lanza InvalidImageError si no es una imagen válida.
+    """
+    if Image is None:
+        return {"photo": (photo_file, folder)}
+
+    data = photo_file.read()
+    photo_file.seek(0)
+    variants = process_photo(data)
+
+    base = os.path.splitext(secure_filename(photo_file.filename))[0] or "foto"
+    keys = {"original": "photo", "avatar": "photo_avatar", "card": "photo_card"}
+    uploads = {}
+    for name, (body, ext) in variants.items():
+        suffix = "" if name == "original" else f"-{name}"
+        uploads[keys[name]] = (
+            FileStorage(stream=io.BytesIO(body), filename=f"{base}{suffix}.{ext}"),
+            folder,
+        )
+    return uploads
+
+# =========================
+# SUBIDA DIRECTA (navegador -> almacenamiento)
+# =========================
+# Con DIRECT_UPLOADS=1 y un backend que lo soporte, /profile y /submit piden
+# parámetros firmados a /uploads/sign, el navegador sube el archivo directo y
+# el form solo trae el descriptor (campo oculto <campo>_direct). Cada usuario
+# sube a su propia carpeta, así un descriptor ajeno no pasa la verificación.
+# Sin JS o si la firma falla, el form se envía como multipart normal.
+
+DIRECT_UPLOADS = os.getenv("DIRECT_UPLOADS") == "1"
+
+UPLOAD_FOLDERS = {
+    "cv": "c4p/profiles/cv",
+    "photo": "c4p/profiles/photos",
+    "proposal": "c4p/proposals/docs",
+}
+
+# Derivados de la foto como transformaciones de entrega (no pasa por el servidor)
+DIRECT_PHOTO_TRANSFORMATIONS = {
+    "photo": "c_limit,w_1600,h_1600,f_auto,q_auto",
+    "photo_avatar": "c_fill,g_face,w_96,h_96,f_auto,q_auto",
+    "photo_card": "c_limit,w_480,h_480,f_auto,q_auto",
+}
+
+class InvalidDirectUploadError(ValueError):
+    pass
+
+def direct_uploads_enabled():
+    return DIRECT_UPLOADS and storage.supports_direct_upload
+
+def direct_upload_folder(kind, user):
+    return f"{UPLOAD_FOLDERS[kind]}/u{user.id}"
+
+def direct_upload_from_form(kind, user):
+    """
+    Lee el descriptor del campo <kind>_direct y lo verifica.
+    Regresa dict (url, bytes, extension, original_filename), None si no hay
+    descriptor, o lanza InvalidDirectUploadError.
+    """
+    raw = request.form.get(f"{kind}_direct", "").strip()
+    if not raw or not direct_uploads_enabled():
+        return None
+    try:
+        descriptor = json.loads(raw)
+    except ValueError:
+        raise InvalidDirectUploadError("descriptor mal formado")
+    if not isinstance(descriptor, dict):
+        raise InvalidDirectUploadError("descriptor mal formado")
+
+    asset = storage.verify_direct_upload(descriptor, direct_upload_folder(kind, user))
+    if not asset:
+        raise InvalidDirectUploadError("descriptor no verificado")
+
+    # Tamaño y formato reales (del almacenamiento); si no cumple, se borra
+    if asset["extension"] not in ALLOWED_EXTENSIONS[kind] or asset["bytes"] > MAX_FILE_SIZES[kind]:
+        delete_file(asset["url"])
+        raise InvalidDirectUploadError("archivo fuera de límites")
+    return asset
+
+def direct_photo_urls(photo_url):
+    return {
+        key: storage.transformed_url(photo_url, transformation)
+        for key, transformation in DIRECT_PHOTO_TRANSFORMATIONS.items()
+    }
+
+def direct_upload_script():
+    if not direct_uploads_enabled():
+        return ""
+    return f'<script src="{url_for("static", filename="js/direct_upload.js")}" defer></script>'
+
+def direct_upload_attrs(kind):
+    """Atributos para el <input type=file> (vacío si la subida directa está apagada)."""
+    if not direct_uploads_enabled():
+        return ""
+    return f'data-direct-kind="{kind}"'
+
+# =========================
+# SUBIDAS REANUDABLES (por bloques)
+# =========================
+# Para conexiones inestables: el navegador manda el documento en bloques a
+# /uploads/chunked (init / append / finalize) y si se corta continúa desde el
+# último offset recibido. Los bloques se juntan en UPLOAD_SPOOL_DIR; el form
+# solo envía el upload_id y el archivo pasa al almacenamiento al crear la
+# propuesta. Si la subida directa está activa, tiene prioridad.
+
+UPLOAD_SPOOL_DIR = os.getenv("UPLOAD_SPOOL_DIR", os.path.join(DB_DIR, "spool"))
+UPLOAD_SPOOL_TTL = int(os.getenv("UPLOAD_SPOOL_TTL", str(24 * 3600)))
+CHUNKED_UPLOAD_CHUNK = 1024 * 1024       # tamaño de bloque sugerido al cliente
+CHUNKED_UPLOAD_MAX_CHUNK = 4 * 1024 * 1024
+CHUNKED_UPLOAD_KINDS = {"proposal"}
+
+upload_spool = ChunkedUploadSpool(UPLOAD_SPOOL_DIR, ttl=UPLOAD_SPOOL_TTL)
+
+def chunked_upload_attrs(kind):
+    if direct_uploads_enabled() or kind not in CHUNKED_UPLOAD_KINDS:
+        return ""
+    return f'data-chunked-kind="{kind}"'
+
+def chunked_upload_script():
+    if direct_uploads_enabled():
+        return ""
+    return f'<script src="{url_for("static", filename="js/chunked_upload.js")}" defer></script>'
 #------------------------------------------------------------------------#
 
 class DummyForm(FlaskForm):
@@ -192,6 +461,11 @@ class User(db.Model):
 
     role = db.Column(db.String(20), default="user")
 
+    # Sube con cada cambio del usuario o su perfil: llave de la cache de fragmentos (migración 5)
+    profile_version = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    # Aleatorio por fila: un id reutilizado no hereda fragmentos cacheados (migración 10)
+    cache_token = db.Column(db.String(16), default=lambda: secrets.token_hex(8))
+
     profile = db.relationship("Profile", backref="user", uselist=False)
     proposals = db.relationship("Proposal", backref="user", lazy="dynamic")
 
@@ -213,6 +487,8 @@ class Profile(db.Model):
 
     cv_url = db.Column(db.String(255))
     photo_url = db.Column(db.String(255))
+    photo_avatar_url = db.Column(db.String(255))   # derivados (migración 3)
+    photo_card_url = db.Column(db.String(255))
 
     certifications = db.Column(db.Text)
 
@@ -248,8 +524,41 @@ class Proposal(db.Model):
     venue = db.Column(db.String(50), nullable=False)
     status = db.Column(db.String(50), default="En revisión")
 
-    # Fecha de recepción (se crea via migración ligera si no existe en SQLite)
+    # Fecha de recepción (BDs anteriores: migración 1 en migrations.py)
     received_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+# Contadores del tablero (/admin/dashboard): se ajustan en la misma transacción
+# que el alta, cambio de estatus o borrado de la propuesta
+@event.listens_for(RoutingSession, "before_flush")
+def update_dashboard_counters(db_session, flush_context, instances):
+    by_status, by_day = flush_deltas(db_session, Proposal)
+    if by_status or by_day:
+        apply_deltas(db_session.connection(), by_status, by_day)
+
+
+class IdempotencyKey(db.Model):
+    """
+    Llave de idempotencia de un envío de formulario (/submit, /profile).
+    Un reintento con la misma llave recibe el resultado original sin repetir
+    la subida ni los inserts. Sin FK a users: las filas expiran solas (TTL).
+    """
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (db.UniqueConstraint("user_id", "key", name="uq_idempotency_user_key"),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, nullable=False)
+    key = db.Column(db.String(64), nullable=False)
+    scope = db.Column(db.String(50), nullable=False)           # endpoint del formulario
+    status = db.Column(db.String(20), nullable=False, default="pending")  # pending | done
+
+    # Resultado original (se repite tal cual en los reintentos)
+    location = db.Column(db.String(255))
+    message = db.Column(db.String(500))
+    category = db.Column(db.String(20))
+
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
 #----------------------------------------------------------------------------------------------------------------------#
 
 #----------------------------------------------------------------------------------------------------------------------------#
@@ -261,37 +570,56 @@ def generate_random_password(length=10):
     characters = string.ascii_letters + string.digits
     return "".join(secrets.choice(characters) for _ in range(length))
 
-def get_current_user():
-    """✅ Fixed: Added retry logic for database connection issues"""
-    max_retries = 3
-    retry_count = 0
-    
-    while retry_count < max_retries:
+def insert_if_absent(model, conflict_column, **values):
+    """
+    INSERT ... ON CONFLICT DO NOTHING RETURNING id en un solo statement.
+    Regresa el id nuevo, o None si ya existía una fila con ese valor único
+    (también si otro request la insertó al mismo tiempo). Solo ejecuta:
+    el commit queda a cargo de quien llama.
+    """
+    table = model.__table__
+    dialect = db.session.get_bind(mapper=model.__mapper__).dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        # Otros motores: INSERT normal dentro de un savepoint
         try:
-            db.session.rollback()  # Clean session if dirty
-            user_id = session.get("user_id")
-            if not user_id:
-                return None
-            
-            # Use get() instead of query to avoid potential stale connections
-            user = db.session.get(User, user_id)
-            return user
-            
-        except Exception as e:
-            retry_count += 1
-            print(f"⚠️ Database error in get_current_user (attempt {retry_count}/{max_retries}): {e}")
-            
-            try:
-                db.session.rollback()
-                db.session.close()
-            except Exception:
-                pass
-            
-            if retry_count >= max_retries:
-                print("❌ Max retries reached in get_current_user")
-                return None
-    
-    return None
+            with db.session.begin_nested():
+                result = db.session.execute(table.insert().values(**values).returning(table.c.id))
+                return result.scalar()
+        except IntegrityError:
+            return None
+
+    stmt = (
+        insert(table)
+        .values(**values)
+        .on_conflict_do_nothing(index_elements=[conflict_column])
+        .returning(table.c.id)
+    )
+    return db.session.execute(stmt).scalar()
+
+def get_current_user():
+    # Una carga por request: la ruta y render_internal_page lo piden, y el
+    # rollback de la segunda llamada expiraba al usuario (otro SELECT)
+    user_id = session.get("user_id")
+    cached = g.get("current_user")
+    if cached is not None and cached[0] == user_id:
+        return cached[1]
+
+    # Los reintentos ante caídas de conexión los hace db_resilience (al conectar,
+    # con backoff); si la BD no está disponible el error llega al handler de 503
+    db.session.rollback()  # Clean session if dirty
+    if not user_id:
+        return None
+
+    # Use get() instead of query to avoid potential stale connections
+    # (siempre del primario: un usuario recién creado puede no estar en la réplica)
+    with use_primary():
+        user = db.session.get(User, user_id)
+    g.current_user = (user_id, user)
+    return user
 
 def is_valid_public_url(url: str) -> bool:
     """Se mantiene por compatibilidad, aunque ya no se usa."""
@@ -303,64 +631,382 @@ def is_valid_public_url(url: str) -> bool:
     except Exception:
         return False
 
-def ensure_sqlite_columns():
+# url_for cuesta decenas de µs; en listados de miles de filas se arma la URL
+# una vez con un id centinela y por fila solo se inserta el id
+_URL_ID_SENTINEL = 987654321
+
+def url_builder(endpoint, key):
+    """Función id -> url_for(endpoint, **{key: id}) para rutas con un id entero."""
+    head, tail = url_for(endpoint, **{key: _URL_ID_SENTINEL}).split(str(_URL_ID_SENTINEL), 1)
+    return lambda value: f"{head}{value}{tail}"
+
+# =========================
+# IDEMPOTENCIA DE FORMULARIOS
+# =========================
+# Cada render del formulario lleva una llave aleatoria (campo oculto
+# idempotency_key). El primer POST con esa llave la reserva (pending) con un
+# commit propio; al terminar bien, la vista la marca como done en el MISMO
+# commit que guarda los datos. Un doble clic o reintento del navegador con la
+# misma llave recibe el mensaje y la redirección originales.
+
+IDEMPOTENCY_TTL = timedelta(hours=int(os.getenv("IDEMPOTENCY_TTL_HOURS", "24")))
+# Una llave "pending" más vieja que esto es de un request que murió a medias
+IDEMPOTENCY_PENDING_TIMEOUT = timedelta(minutes=2)
+IDEMPOTENCY_PURGE_INTERVAL = 600  # segundos entre limpiezas de llaves vencidas
+IDEMPOTENCY_KEY_RE = re.compile(r"^[A-Za-z0-9_-]{16,64}$")
+_last_idempotency_purge = 0.0
+
+def new_idempotency_key():
+    return secrets.token_urlsafe(24)
+
+def purge_expired_idempotency_keys():
+    global _last_idempotency_purge
+    now = time.time()
+    if now - _last_idempotency_purge < IDEMPOTENCY_PURGE_INTERVAL:
+        return
+    _last_idempotency_purge = now
+    IdempotencyKey.query.filter(IdempotencyKey.expires_at < datetime.utcnow()).delete(synchronize_session=False)
+    db.session.commit()
+
+def claim_idempotency_key(user_id, scope, key):
+    """Regresa (fila, reservada). Si no se reservó, la fila es de un envío previo."""
+    purge_expired_idempotency_keys()
+    now = datetime.utcnow()
+
+    row = IdempotencyKey.query.filter_by(user_id=user_id, key=key).first()
+    if row and (row.expires_at < now
+                or (row.status == "pending" and row.created_at < now - IDEMPOTENCY_PENDING_TIMEOUT)):
+        db.session.delete(row)
+        db.session.commit()
+        row = None
+    if row:
+        return row, False
+
+    row = IdempotencyKey(
+        user_id=user_id, key=key, scope=scope, status="pending",
+        created_at=now, expires_at=now + IDEMPOTENCY_TTL,
+    )
+    db.session.add(row)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Otro worker reservó la misma llave entre el SELECT y el INSERT
+        db.session.rollback()
+        return IdempotencyKey.query.filter_by(user_id=user_id, key=key).first(), False
+    return row, True
+
+def complete_idempotent_request(location, message, category="success"):
     """
-    Migración ligera (SQLite): agrega proposals.received_at si no existe.
-    No borra la BD.
+    Guarda el resultado del envío en la llave reservada. Llamar ANTES del
+    db.session.commit() de la vista para que quede en la misma transacción.
     """
-    try:
-        # Solo aplica en SQLite
-        uri = app.config.get("SQLALCHEMY_DATABASE_URI", "")
-        if not uri.startswith("sqlite:///"):
-            return
+    row = g.get("idempotency_key")
+    if row is None:
+        return
+    row.status = "done"
+    row.location = location
+    row.message = message
+    row.category = category
+
+def idempotent(in_progress_endpoint):
+    """
+    Decorador para vistas de formulario. `in_progress_endpoint`: a dónde
+    mandar un reintento que llega mientras el envío original sigue en curso.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            key = request.form.get("idempotency_key", "").strip() if request.method == "POST" else ""
+            user = get_current_user() if key else None
+            if not user or not IDEMPOTENCY_KEY_RE.match(key):
+                return view(*args, **kwargs)
+
+            row, claimed = claim_idempotency_key(user.id, request.endpoint, key)
+            if not claimed:
+                if row is not None and row.status == "done":
+                    if row.message:
+                        flash(row.message, row.category or "success")
+                    return redirect(row.location)
+                flash("Tu envío anterior todavía se está procesando.", "success")
+                return redirect(url_for(in_progress_endpoint))
+
+            g.idempotency_key = row
+            try:
+                return view(*args, **kwargs)
+            finally:
+                # Si la vista no terminó bien se libera la llave para poder reintentar
+                try:
+                    db.session.rollback()
+                    if row.status != "done":
+                        db.session.delete(row)
+                        db.session.commit()
+                except Exception as e:
+                    db.session.rollback()
+                    print("❌ Error al liberar llave de idempotencia:", e)
+        return wrapper
+    return decorator
+
+# =========================
+# RÉPLICA DE LECTURA
+# =========================
+# Con DATABASE_REPLICA_URL, los GET de las vistas de admin con @read_replica
+# leen de la réplica. Se usa el primario si:
+#   - la réplica no responde o su retraso pasa de REPLICA_MAX_LAG_SECONDS
+#     (se revisa cada REPLICA_CHECK_INTERVAL s; si falla, se descarta un rato);
+#   - el usuario escribió hace poco (read-your-writes): tras cualquier flush
+#     en un request, su sesión lee del primario por REPLICA_STICKY_SECONDS.
+# Si la réplica falla a medio request, la vista (solo lectura) se repite en
+# el primario. La autenticación (get_current_user) siempre va al primario.
+
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "10"))
+REPLICA_STICKY_SECONDS = float(os.getenv("REPLICA_STICKY_SECONDS", str(REPLICA_MAX_LAG_SECONDS)))
+REPLICA_CHECK_INTERVAL = 5
+REPLICA_RETRY_AFTER = 30
+
+# En un standby sin WAL pendiente el retraso es 0 aunque no haya escrituras recientes
+PG_REPLICA_LAG_SQL = """
+    SELECT CASE
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
 
-        # Verifica columnas existentes
-        rows = db.session.execute(text("PRAGMA table_info(proposals)")).fetchall()
-        existing_cols = {r[1] for r in rows}  # (cid, name, type, notnull, dflt_value, pk)
+_replica_state = {"checked_at": 0.0, "healthy": False, "lag": None, "down_until": 0.0}
+_replica_lock = threading.Lock()
 
-        if "received_at" not in existing_cols:
-            db.session.execute(text("ALTER TABLE proposals ADD COLUMN received_at DATETIME"))
-            db.session.execute(text("UPDATE proposals SET received_at = COALESCE(received_at, CURRENT_TIMESTAMP)"))
-            db.session.commit()
-            print("✅ Migración aplicada: proposals.received_at agregado.")
+def replica_lag(engine):
+    """Segundos de retraso de la réplica (SQLite y otros: 0 si responde)."""
+    with engine.connect() as conn:
+        if engine.dialect.name == "postgresql":
+            return float(conn.execute(text(PG_REPLICA_LAG_SQL)).scalar() or 0)
+        conn.execute(text("SELECT 1"))
+        return 0.0
+
+def mark_replica_down(error):
+    _replica_state.update(healthy=False, checked_at=0.0, down_until=time.time() + REPLICA_RETRY_AFTER)
+    print("⚠️ Réplica no disponible, se lee del primario:", error)
+
+def replica_available():
+    engine = db.engines.get("replica")
+    if engine is None:
+        return False
+
+    now = time.time()
+    if now < _replica_state["down_until"]:
+        return False
+    if now - _replica_state["checked_at"] < REPLICA_CHECK_INTERVAL:
+        return _replica_state["healthy"]
+    # Un solo hilo revisa; los demás usan el último resultado
+    if not _replica_lock.acquire(blocking=False):
+        return _replica_state["healthy"]
+    try:
+        lag = replica_lag(engine)
     except Exception as e:
-        print("⚠️ No se pudo aplicar migración ligera (received_at):", repr(e))
+        mark_replica_down(e)
+        return False
+    finally:
+        _replica_lock.release()
+
+    healthy = lag <= REPLICA_MAX_LAG_SECONDS
+    if not healthy:
+        print(f"⚠️ Réplica con {lag:.1f}s de retraso, se lee del primario")
+    _replica_state.update(checked_at=now, healthy=healthy, lag=lag)
+    return healthy
+
+@contextmanager
+def use_primary():
+    previous = g.get("db_route")
+    g.db_route = "primary"
+    try:
+        yield
+    finally:
+        g.db_route = previous
+
+def read_replica(view):
+    """Decorador: en GET la vista lee de la réplica si está disponible."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if (request.method != "GET"
+                or session.get("primary_until", 0) > time.time()
+                or not replica_available()):
+            return view(*args, **kwargs)
+
+        g.db_route = "replica"
         try:
+            return view(*args, **kwargs)
+        except DBAPIError as e:
             db.session.rollback()
-        except Exception:
-            pass
+            mark_replica_down(e)
+            g.db_route = "primary"
+            return view(*args, **kwargs)
+        finally:
+            g.db_route = None
+    return wrapper
+
+@event.listens_for(RoutingSession, "after_flush")
+def stick_to_primary_after_write(db_session, flush_context):
+    # read-your-writes: las siguientes lecturas de este usuario van al primario
+    # (se marca aquí y no en after_request para que la cache HTTP vea la sesión modificada)
+    if has_request_context() and "replica" in db.engines:
+        session["primary_until"] = time.time() + REPLICA_STICKY_SECONDS
+
+@event.listens_for(RoutingSession, "do_orm_execute")
+def stick_to_primary_after_bulk_write(orm_execute_state):
+    # INSERT/UPDATE/DELETE ejecutados directo (p.ej. insert_if_absent) no pasan por flush
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        stick_to_primary_after_write(orm_execute_state.session, None)
 
-# ==== Eliminar registro ============ #        
-def delete_from_cloudinary(file_url):
-    if not file_url:
-        return
+# =========================
+# BD NO DISPONIBLE
+# =========================
+# Un error de conexión que llegue hasta aquí (reintentos agotados, breaker
+# abierto, desconexión a media consulta, "database is locked") responde 503
+# con Retry-After en vez de un 500, para todas las rutas. Los errores de
+# datos (IntegrityError, etc.) siguen siendo 500.
 
+DB_UNAVAILABLE_MESSAGE = "El servicio no está disponible en este momento. Por favor, intenta nuevamente en unos segundos."
+
+@app.errorhandler(OperationalError)
+@app.errorhandler(InterfaceError)
+def database_unavailable(error):
     try:
-        # Extraer public_id desde la URL
-        parts = file_url.split("/upload/")
-        if len(parts) < 2:
-            return
+        db.session.rollback()
+    except Exception:
+        pass
+    circuit_open = is_circuit_open_error(error)
+    if not circuit_open:  # la apertura del breaker ya se registró una vez
+        print(f"❌ Error de BD en {request.method} {request.path}: {error}")
+
+    retry_after = str(int(DB_BREAKER_RESET_SECONDS)) if circuit_open else "5"
+    if request.path.startswith("/uploads/") or request.is_json:
+        return {"error": DB_UNAVAILABLE_MESSAGE}, 503, {"Retry-After": retry_after}
+    return DB_UNAVAILABLE_MESSAGE, 503, {"Retry-After": retry_after, "Content-Type": "text/plain; charset=utf-8"}
+
+# =========================
+# CACHE DE LISTADOS
+# =========================
+# Resultados de los listados de admin cacheados por (listado, filtros), con la
+# versión de datos con la que se calcularon; ver query_cache.py. La versión se
+# sube en la misma transacción de cualquier escritura sobre propuestas o
+# usuarios, así que una entrada nunca se sirve después de un cambio (en ningún
+# worker): el siguiente request la reemplaza.
+
+query_cache = QueryCache()
+
+# Páginas completas que varios revisores piden a la vez: un cálculo por worker
+# y llave, reutilizado SINGLE_FLIGHT_TTL segundos
+single_flight = SingleFlight()
+
+CACHE_VERSIONED_TABLES = {"proposals", "users"}
+
+def cached_listing(listing, params, compute, shared=True, version=None):
+    if version is None:
+        version = current_data_version(db.session.connection())
+    return query_cache.get_or_compute(listing, params, version, compute, shared=shared)
+
+@event.listens_for(RoutingSession, "before_flush")
+def bump_data_version_on_flush(db_session, flush_context, instances):
+    changed = any(isinstance(obj, (Proposal, User)) for obj in db_session.new) or any(
+        isinstance(obj, (Proposal, User)) for obj in db_session.deleted
+    ) or any(
+        isinstance(obj, (Proposal, User)) and db_session.is_modified(obj) for obj in db_session.dirty
+    )
+    if changed:
+        bump_data_version(db_session.connection())
 
-        public_id_with_ext = parts[1]
-        public_id = os.path.splitext(public_id_with_ext)[0]
+@event.listens_for(RoutingSession, "do_orm_execute")
+def bump_data_version_on_bulk_write(orm_execute_state):
+    # INSERT/UPDATE/DELETE directos (p.ej. insert_if_absent en /register)
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, "table", None)
+        if getattr(table, "name", None) in CACHE_VERSIONED_TABLES:
+            bump_data_version(orm_execute_state.session.connection())
 
-        cloudinary.uploader.destroy(
-            public_id,
-            resource_type="raw"
+# =========================
+# CACHE DE FRAGMENTOS
+# =========================
+# HTML de las vistas de admin de un candidato (perfil, ficha de usuario)
+# cacheado por (usuario, cache_token, profile_version); cache_token distingue a
+# un usuario nuevo que reutiliza el id de uno borrado. La versión se sube con un UPDATE en
+# el mismo flush que cambia al usuario o su perfil; se hace por Core (no en el
+# objeto) para no marcar al User como modificado y no invalidar los listados.
+
+FRAGMENT_CACHE_SIZE = int(os.getenv("FRAGMENT_CACHE_SIZE", "1000"))
+
+fragment_cache = QueryCache(maxsize=FRAGMENT_CACHE_SIZE)
+
+def profile_version_of(user_id):
+    """profile_version del usuario, o None si no existe."""
+    return db.session.execute(select(User.profile_version).where(User.id == user_id)).scalar()
+
+def fragment_version_of(user_id):
+    """(cache_token, profile_version) del usuario, o None si no existe."""
+    return db.session.execute(
+        select(User.cache_token, User.profile_version).where(User.id == user_id)
+    ).first()
+
+def cached_fragment(name, user_id, version, render):
+    token, profile_version = version
+    return fragment_cache.get_or_compute(name, {"user_id": user_id, "token": token}, profile_version, render)
+
+@event.listens_for(RoutingSession, "before_flush")
+def bump_profile_version_on_flush(db_session, flush_context, instances):
+    user_ids = set()
+    for obj in list(db_session.new) + list(db_session.dirty) + list(db_session.deleted):
+        if obj in db_session.dirty and not db_session.is_modified(obj):
+            continue
+        if isinstance(obj, Profile):
+            user_ids.add(obj.user_id if obj.user_id is not None else getattr(obj.user, "id", None))
+        elif isinstance(obj, User) and obj not in db_session.new:
+            user_ids.add(obj.id)
+    user_ids.discard(None)
+    if user_ids:
+        db_session.connection().execute(
+            update(User.__table__)
+            .where(User.__table__.c.id.in_(sorted(user_ids)))
+            .values(profile_version=User.__table__.c.profile_version + 1)
         )
 
+# =========================
+# AUDITORÍA
+# =========================
+# Acciones de admin en la bitácora (audit_log.py). Los cambios de estatus y
+# ediciones se encolan en memoria después del commit y se insertan en lote;
+# los borrados se escriben en la misma transacción (record_audit).
+
+with app.app_context():
+    audit_buffer = AuditBuffer(db.engine)
+
+AUDIT_PAGE_SIZE = 50
+
+# ==== Eliminar registro ============ #
+def delete_file(file_url):
+    if not file_url:
+        return
+    try:
+        storage.delete(file_url)
     except Exception as e:
-        print("❌ Error al eliminar en Cloudinary:", e)        
+        print("❌ Error al eliminar archivo:", e)
 #-----------UTILIDADES--------------------------------------------------------------------------------------------------#
 
 # =========================
 # UI / TEMPLATES
 # =========================
 
-BASE_CSS = """
+# CSS precompilado por build_assets.py (clases usadas, minificado, nombre con hash)
+CSS_MANIFEST_PATH = os.path.join(basedir, "static", "css", "manifest.json")
+
+# Inter se carga sin bloquear el render (fallback: fuentes del sistema)
+FONTS_HTML = """
+<link rel="preconnect" href="https://fonts.googleapis.com">
+<link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>
+<link rel="stylesheet" href="https://fonts.googleapis.com/css2?family=Inter:wght@400;600;700&display=swap" media="print" onload="this.media='all'">
+"""
+
+# Solo si no se ha corrido build_assets.py (desarrollo)
+LEGACY_CDN_CSS = """
 <script src="https://cdn.tailwindcss.com"></script>
 <style>
-@import url('https://fonts.googleapis.com/css2?family=Inter:wght@400;600;700&display=swap');
 body { font-family: 'Inter', sans-serif; background-color: #DBDEE3; }
 .cmc-blue { background-color: #2F4885; }
 .cmc-text-blue { color: #2F4885; }
@@ -373,6 +1019,121 @@ input[type="text"], input[type="email"], input[type="tel"], input[type="url"], i
 </style>
 """
 
+def load_base_css():
+    try:
+        with open(CSS_MANIFEST_PATH, encoding="utf-8") as fh:
+            bundle = json.load(fh)["c4p.css"]
+    except (OSError, ValueError, KeyError):
+        print("⚠️ CSS precompilado no encontrado (python build_assets.py); usando Tailwind CDN.")
+        return LEGACY_CDN_CSS + FONTS_HTML
+    href = f"{app.static_url_path}/{bundle}"
+    return f'<link rel="stylesheet" href="{href}">' + FONTS_HTML
+
+BASE_CSS = load_base_css()
+
+# =========================
+# CACHE HTTP + COMPRESIÓN
+# =========================
+
+IMMUTABLE_ASSET_RE = re.compile(
+    "^" + re.escape(app.static_url_path) + r"/css/c4p\.[0-9a-f]{12}\.css$"
+)
+
+COMPRESS_MIN_SIZE = 1024              # bytes; abajo de esto no vale la pena
+COMPRESS_MAX_PASSTHROUGH = 1024 * 1024  # archivos estáticos que se comprimen en memoria
+COMPRESSIBLE_MIMETYPES = {
+    "text/html", "text/css", "text/plain", "application/json", "application/javascript",
+}
+
+# Páginas públicas (sin sesión) que pueden guardar proxies/CDN
+PUBLIC_CACHE_ENDPOINTS = {"index": "public, max-age=300"}
+
+# Respuestas comprimidas de assets inmutables: (path, encoding) -> bytes
+_compressed_assets = {}
+
+def choose_encoding():
+    accepted = request.accept_encodings
+    if brotli is not None and accepted["br"]:
+        return "br"
+    if accepted["gzip"]:
+        return "gzip"
+    return None
+
+def compress_body(data, encoding):
+    if encoding == "br":
+        return brotli.compress(data, quality=5)
+    return gzip.compress(data, compresslevel=6)
+
+def apply_cache_headers(response):
+    if IMMUTABLE_ASSET_RE.match(request.path):
+        # El nombre cambia con el contenido: se puede cachear "para siempre"
+        response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        return
+
+    if response.mimetype != "text/html" or request.method not in ("GET", "HEAD"):
+        return
+
+    public_policy = PUBLIC_CACHE_ENDPOINTS.get(request.endpoint)
+    # Si la sesión cambió (p.ej. se consumieron mensajes flash) la respuesta es personal
+    if public_policy and not session.modified and "Set-Cookie" not in response.headers:
+        response.headers["Cache-Control"] = public_policy
+        response.vary.add("Cookie")
+    else:
+        # Páginas con sesión: solo el navegador, revalidando con ETag débil
+        response.headers["Cache-Control"] = "private, no-cache"
+        response.add_etag(weak=True)
+        response.make_conditional(request)
+
+def apply_compression(response):
+    if response.status_code != 200 or "Content-Encoding" in response.headers:
+        return
+    if response.mimetype not in COMPRESSIBLE_MIMETYPES:
+        return
+    if response.direct_passthrough:
+        length = response.content_length
+        if length is None or length > COMPRESS_MAX_PASSTHROUGH:
+            return
+
+    response.vary.add("Accept-Encoding")
+    encoding = choose_encoding()
+    if encoding is None:
+        return
+
+    immutable = IMMUTABLE_ASSET_RE.match(request.path) is not None
+    cache_key = (request.path, encoding)
+    if immutable and cache_key in _compressed_assets:
+        body = _compressed_assets[cache_key]
+    else:
+        response.direct_passthrough = False
+        data = response.get_data()
+        if len(data) < COMPRESS_MIN_SIZE:
+            return
+        body = compress_body(data, encoding)
+        if immutable:
+            _compressed_assets[cache_key] = body
+
+    response.direct_passthrough = False
+    response.set_data(body)
+    response.headers["Content-Encoding"] = encoding
+
+@app.after_request
+def http_cache_and_compress(response):
+    apply_cache_headers(response)
+    apply_compression(response)
+    return response
+
+# Plantillas inline compiladas una vez por proceso (render_template_string
+# vuelve a parsear y compilar en cada llamada); pocas fuentes distintas
+_compiled_templates = {}
+
+def render_inline_template(source, **context):
+    template = _compiled_templates.get(source)
+    if template is None:
+        template = _compiled_templates[source] = app.jinja_env.from_string(source)
+    return render_template(template, **context)
+
+PAGE_CONTENT_MARKER = "<!--CONTENT-->"
+
 def render_internal_page(title, content_html):
     user = get_current_user()
     is_admin = is_admin_user(user)
@@ -386,7 +1147,8 @@ def render_internal_page(title, content_html):
     if user and not is_admin:
         photo = ""
         if user.profile and user.profile.photo_url:
-            photo = f'<img src="{user.profile.photo_url}" alt="Foto" class="w-9 h-9 rounded-full object-cover border border-white/40 shadow-sm">'
+            avatar_url = user.profile.photo_avatar_url or user.profile.photo_url
+            photo = f'<img src="{avatar_url}" alt="Foto" width="36" height="36" class="w-9 h-9 rounded-full object-cover border border-white/40 shadow-sm">'
         else:
             photo = '<div class="w-9 h-9 rounded-full bg-white/20 flex items-center justify-center text-white text-sm font-bold">👤</div>'
 
@@ -457,13 +1219,154 @@ def render_internal_page(title, content_html):
     </body>
     </html>
     """
-    return render_template_string(
+    # El contenido (varios MB en los listados de admin) no pasa por Jinja: se
+    # renderiza el layout con una marca y ahí se inserta el HTML ya armado
+    page = render_inline_template(
         template_html,
         title=title,
         base_css=BASE_CSS,
-        content_html=content_html,
+        content_html=PAGE_CONTENT_MARKER,
         user_badge_html=user_badge_html
     )
+    head, tail = page.split(PAGE_CONTENT_MARKER, 1)
+    return "".join((head, content_html, tail))
+
+# =========================
+# LANDING (cache del render)
+# =========================
+# La landing es estática salvo los mensajes flash: el resto se renderiza una
+# vez por proceso (y opcionalmente se guarda en disco en HOME_CACHE_DIR) y en
+# cada visita solo se inserta la región de mensajes.
+
+HOME_FLASH_MARKER = "<!--FLASH-->"
+
+HOME_HTML = """
+<!DOCTYPE html>
+<html lang="es">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Convocatoria C4P 2026 | CMC</title>
+    {{ base_css|safe }}
+</head>
+<body class="bg-[#DBDEE3] min-h-screen flex flex-col">
+    <div class="flex-grow py-12 px-4 sm:px-6 lg:px-8">
+        <div class="max-w-6xl mx-auto bg-white p-8 md:p-12 rounded-2xl shadow-2xl">
+            <div class="grid md:grid-cols-2 gap-12">
+                <div>
+                    <h1 class="text-4xl font-extrabold cmc-text-blue mb-2">EL LLAMADO A LOS EXPERTOS DEL MANTENIMIENTO Y LA CONFIABILIDAD</h1>
+                    <h2 class="text-2xl cmc-text-blue mb-6 font-semibold">Convocatoria Anual 2026</h2>
+
+                    <p class="text-[#818788] mb-4">
+                        Es el momento de que formes parte de esta gran red de expertos y compartas tus conocimientos, experiencias y buenas prácticas con la comunidad del Congreso de Mantenimiento & Confiabilidad (CMC).
+                    </p>
+                    <p class="text-xl font-bold cmc-blue inline-block px-3 py-1 rounded text-white mb-6">#YoSoyCMC</p>
+
+                    <h3 class="text-xl font-bold cmc-text-blue mb-3">¡Conoce nuestras sedes 2026!</h3>
+                    <ul class="list-disc list-inside cmc-gray space-y-1 ml-4 mb-6">
+                        <li>Cartagena, Colombia — 13 al 16 de julio 2026</li>
+                        <li>Monterrey, México — 7 al 10 de septiembre 2026</li>
+                        <li>Santiago, Chile — 9 al 12 de noviembre 2026</li>
+                    </ul>
+
+                    <h3 class="text-xl font-bold cmc-text-blue mb-4">¿Qué debes hacer para postularte?</h3>
+                    <ol class="space-y-3 cmc-gray">
+                        <li><span class="font-bold">1) Regístrate:</span> Completa tu registro con un correo activo.</li>
+                        <li><span class="font-bold">2) Guarda tu contraseña única:</span> La plataforma la genera automáticamente.</li>
+                        <li><span class="font-bold">3) Inicia sesión:</span> Entra con tu correo y contraseña.</li>
+                        <li><span class="font-bold">4) Completa tu perfil:</span> Incluye tu CV y Foto (archivo).</li>
+                        <li><span class="font-bold">5) Envía tu propuesta:</span> Sube tu propuesta en PDF/Word y selecciona sede(s).</li>
+                    </ol>
+
+                    <p class="text-sm cmc-gray mt-6">Soporte: contacto@cmc-latam.com</p>
+                </div>
+
+                <div class="bg-[#DBDEE3] p-6 rounded-xl shadow-inner flex flex-col space-y-6">
+
+                    <!--FLASH-->
+
+                    <div id="login-form-container" class="bg-white p-6 rounded-lg shadow-md">
+                        <h3 class="text-2xl font-bold cmc-text-blue mb-4">Iniciar Sesión</h3>
+                        <form method="POST" action="{{ url_for('login') }}" class="space-y-4">
+                            <input type="text" name="email" placeholder="Correo Electrónico" required class="w-full p-3 rounded-lg border-2 cmc-border focus:ring-2 focus:ring-blue-500">
+                            <input type="password" name="password" placeholder="Contraseña Única" required class="w-full p-3 rounded-lg border-2 cmc-border focus:ring-2 focus:ring-blue-500">
+                            <button type="submit" class="w-full cmc-blue text-white py-3 rounded-lg font-bold hover:opacity-90 transition shadow-md">Ingresar</button>                           
+                        </form>
+                    </div>
+
+                    <div class="bg-white p-6 rounded-lg shadow-md">
+                        <h3 class="text-2xl font-bold cmc-text-blue mb-4">Registro Rápido</h3>
+                         <form method="POST" action="{{ url_for('register') }}" class="space-y-4">
+                            <input type="text" name="full_name" placeholder="Nombre Completo" required class="w-full p-3 rounded-lg border-2 cmc-border focus:ring-2 focus:ring-blue-500">
+                            <input type="text" name="email" placeholder="Correo Electrónico" required class="w-full p-3 rounded-lg border-2 cmc-border focus:ring-2 focus:ring-blue-500">
+                            <button type="submit" class="w-full bg-green-600 text-white py-3 rounded-lg font-bold hover:bg-green-700 transition shadow-md">Registrarme</button>
+                        </form>
+                        <p class="text-sm cmc-gray mt-4">
+                            Al registrarte se generará una contraseña única y se mostrará en pantalla. Guárdala de inmediato.
+                        </p>
+                    </div>
+
+                </div>
+            </div>
+        </div>
+    </div>
+</body>
+</html>
+"""
+
+HOME_FLASH_TEMPLATE = app.jinja_env.from_string("""
+<div class="mt-2">
+    {% for category, message in messages %}
+    <div class="p-3 mb-2 rounded-lg text-sm {% if category == 'success' %}bg-green-100 text-green-800{% else %}bg-red-100 text-red-800{% endif %}">
+        {{ message|safe }}
+    </div>
+    {% endfor %}
+</div>
+""")
+
+HOME_CACHE_DIR = os.getenv("HOME_CACHE_DIR")
+
+# script_root -> (html antes de los mensajes, html después)
+_home_shell_cache = {}
+
+def render_home_shell():
+    html = render_template_string(HOME_HTML, base_css=BASE_CSS)
+    head, tail = html.split(HOME_FLASH_MARKER, 1)
+    return head, tail
+
+def get_home_shell():
+    key = request.script_root
+    shell = _home_shell_cache.get(key)
+    if shell is not None:
+        return shell
+
+    cache_file = None
+    if HOME_CACHE_DIR:
+        # El nombre depende de la plantilla y del CSS: un deploy nuevo no lee HTML viejo
+        signature = hashlib.sha256((HOME_HTML + BASE_CSS + key).encode("utf-8")).hexdigest()[:16]
+        cache_file = os.path.join(HOME_CACHE_DIR, f"home-{signature}.html")
+        try:
+            with open(cache_file, encoding="utf-8") as fh:
+                cached = fh.read()
+            if HOME_FLASH_MARKER in cached:
+                shell = tuple(cached.split(HOME_FLASH_MARKER, 1))
+        except OSError:
+            pass
+
+    if shell is None:
+        shell = render_home_shell()
+        if cache_file:
+            try:
+                os.makedirs(HOME_CACHE_DIR, exist_ok=True)
+                tmp_path = f"{cache_file}.{os.getpid()}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as fh:
+                    fh.write(HOME_FLASH_MARKER.join(shell))
+                os.replace(tmp_path, cache_file)
+            except OSError as e:
+                print("⚠️ No se pudo guardar la landing en disco:", e)
+
+    _home_shell_cache[key] = shell
+    return shell
 
 # =========================
 # AUTH + HOME
@@ -477,90 +1380,10 @@ def index():
             return redirect(url_for("admin_proposals"))
         return redirect(url_for("profile"))
 
-    HOME_HTML = """
-    <!DOCTYPE html>
-    <html lang="es">
-    <head>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>Convocatoria C4P 2026 | CMC</title>
-        {{ base_css|safe }}
-    </head>
-    <body class="bg-[#DBDEE3] min-h-screen flex flex-col">
-        <div class="flex-grow py-12 px-4 sm:px-6 lg:px-8">
-            <div class="max-w-6xl mx-auto bg-white p-8 md:p-12 rounded-2xl shadow-2xl">
-                <div class="grid md:grid-cols-2 gap-12">
-                    <div>
-                        <h1 class="text-4xl font-extrabold cmc-text-blue mb-2">EL LLAMADO A LOS EXPERTOS DEL MANTENIMIENTO Y LA CONFIABILIDAD</h1>
-                        <h2 class="text-2xl cmc-text-blue mb-6 font-semibold">Convocatoria Anual 2026</h2>
-
-                        <p class="text-[#818788] mb-4">
-                            Es el momento de que formes parte de esta gran red de expertos y compartas tus conocimientos, experiencias y buenas prácticas con la comunidad del Congreso de Mantenimiento & Confiabilidad (CMC).
-                        </p>
-                        <p class="text-xl font-bold cmc-blue inline-block px-3 py-1 rounded text-white mb-6">#YoSoyCMC</p>
-
-                        <h3 class="text-xl font-bold cmc-text-blue mb-3">¡Conoce nuestras sedes 2026!</h3>
-                        <ul class="list-disc list-inside cmc-gray space-y-1 ml-4 mb-6">
-                            <li>Cartagena, Colombia — 13 al 16 de julio 2026</li>
-                            <li>Monterrey, México — 7 al 10 de septiembre 2026</li>
-                            <li>Santiago, Chile — 9 al 12 de noviembre 2026</li>
-                        </ul>
-
-                        <h3 class="text-xl font-bold cmc-text-blue mb-4">¿Qué debes hacer para postularte?</h3>
-                        <ol class="space-y-3 cmc-gray">
-                            <li><span class="font-bold">1) Regístrate:</span> Completa tu registro con un correo activo.</li>
-                            <li><span class="font-bold">2) Guarda tu contraseña única:</span> La plataforma la genera automáticamente.</li>
-                            <li><span class="font-bold">3) Inicia sesión:</span> Entra con tu correo y contraseña.</li>
-                            <li><span class="font-bold">4) Completa tu perfil:</span> Incluye tu CV y Foto (archivo).</li>
-                            <li><span class="font-bold">5) Envía tu propuesta:</span> Sube tu propuesta en PDF/Word y selecciona sede(s).</li>
-                        </ol>
-
-                        <p class="text-sm cmc-gray mt-6">Soporte: contacto@cmc-latam.com</p>
-                    </div>
-
-                    <div class="bg-[#DBDEE3] p-6 rounded-xl shadow-inner flex flex-col space-y-6">
-
-                        {% with messages = get_flashed_messages(with_categories=true) %}
-                            {% if messages %}
-                                <div class="mt-2">
-                                    {% for category, message in messages %}
-                                    <div class="p-3 mb-2 rounded-lg text-sm {% if category == 'success' %}bg-green-100 text-green-800{% else %}bg-red-100 text-red-800{% endif %}">
-                                        {{ message|safe }}
-                                    </div>
-                                    {% endfor %}
-                                </div>
-                            {% endif %}
-                        {% endwith %}
-
-                        <div id="login-form-container" class="bg-white p-6 rounded-lg shadow-md">
-                            <h3 class="text-2xl font-bold cmc-text-blue mb-4">Iniciar Sesión</h3>
-                            <form method="POST" action="{{ url_for('login') }}" class="space-y-4">
-                                <input type="text" name="email" placeholder="Correo Electrónico" required class="w-full p-3 rounded-lg border-2 cmc-border focus:ring-2 focus:ring-blue-500">
-                                <input type="password" name="password" placeholder="Contraseña Única" required class="w-full p-3 rounded-lg border-2 cmc-border focus:ring-2 focus:ring-blue-500">
-                                <button type="submit" class="w-full cmc-blue text-white py-3 rounded-lg font-bold hover:opacity-90 transition shadow-md">Ingresar</button>                           
-                            </form>
-                        </div>
-
-                        <div class="bg-white p-6 rounded-lg shadow-md">
-                            <h3 class="text-2xl font-bold cmc-text-blue mb-4">Registro Rápido</h3>
-                             <form method="POST" action="{{ url_for('register') }}" class="space-y-4">
-                                <input type="text" name="full_name" placeholder="Nombre Completo" required class="w-full p-3 rounded-lg border-2 cmc-border focus:ring-2 focus:ring-blue-500">
-                                <input type="text" name="email" placeholder="Correo Electrónico" required class="w-full p-3 rounded-lg border-2 cmc-border focus:ring-2 focus:ring-blue-500">
-                                <button type="submit" class="w-full bg-green-600 text-white py-3 rounded-lg font-bold hover:bg-green-700 transition shadow-md">Registrarme</button>
-                            </form>
-                            <p class="text-sm cmc-gray mt-4">
-                                Al registrarte se generará una contraseña única y se mostrará en pantalla. Guárdala de inmediato.
-                            </p>
-                        </div>
-
-                    </div>
-                </div>
-            </div>
-        </div>
-    </body>
-    </html>
-    """
-    return render_template_string(HOME_HTML, base_css=BASE_CSS)
+    messages = get_flashed_messages(with_categories=True)
+    flash_html = HOME_FLASH_TEMPLATE.render(messages=messages) if messages else ""
+    head, tail = get_home_shell()
+    return head + flash_html + tail
 
 
 @app.route("/register", methods=["POST"])
@@ -573,26 +1396,29 @@ def register():
         flash("Completa nombre y correo.", "error")
         return redirect(url_for("index"))
 
-    existing = User.query.filter_by(email=email).first()
-    if existing:
-        flash(
-            "Este correo ya se registró anteriormente. "
-            "Si perdiste tu contraseña, por favor escribe a "
-            "<span class='font-semibold'>contacto@cmc-latam.com</span> para solicitar recuperación.",
-            "error"
-        )
-        return redirect(url_for("index"))
-
+    # Se hashea antes de tocar la BD: la verificación de duplicado y el alta
+    # son un solo INSERT ... ON CONFLICT DO NOTHING (sin carrera entre dos
+    # registros simultáneos con el mismo correo)
     unique_password = generate_random_password()
     hashed_password = generate_password_hash(unique_password, method="pbkdf2:sha256")
 
-    new_user = User(
+    new_user_id = insert_if_absent(
+        User, "email",
         full_name=full_name,
         email=email,
         password_hash=hashed_password,
-        unique_password=unique_password
+        unique_password=unique_password,
+        role="user",
     )
-    db.session.add(new_user)
+    if new_user_id is None:
+        db.session.rollback()
+        flash(
+            "Este correo ya se registró anteriormente. "
+            "Si perdiste tu contraseña, por favor escribe a "
+            "<span class='font-semibold'>contacto@cmc-latam.com</span> para solicitar recuperación.",
+            "error"
+        )
+        return redirect(url_for("index"))
     db.session.commit()
 
     flash_message = (
@@ -600,7 +1426,7 @@ def register():
         f'<span class="font-mono font-bold text-lg bg-green-200 p-1 rounded-md text-gray-900">{unique_password}</span>. '
         "Guárdala de inmediato. Ahora puedes iniciar sesión."
     )
-    session["user_id"] = new_user.id
+    session["user_id"] = new_user_id
     flash(flash_message, "success")
     return redirect(url_for("profile"))
 
@@ -609,52 +1435,35 @@ def register():
 @csrf.exempt
 @limiter.limit("5 per minute")
 def login():
-    """✅ Fixed: Added retry logic and better error handling"""
     email = request.form.get("email", "").strip().lower()
     password = request.form.get("password", "").strip()
 
-    max_retries = 3
-    retry_count = 0
-    
-    while retry_count < max_retries:
-        try:
-            # Clean session before query
-            db.session.rollback()
-            
-            user = User.query.filter_by(email=email).first()
-            
-            if user and check_password_hash(user.password_hash, password):
-                session["user_id"] = user.id
+    try:
+        # Clean session before query
+        db.session.rollback()
+        user = User.query.filter_by(email=email).first()
+    except DBAPIError as e:
+        # db_resilience ya reintentó la conexión con backoff (o el breaker está abierto)
+        db.session.rollback()
+        print(f"⚠️ Login error: {e}")
+        flash("Error de conexión. Por favor, intenta nuevamente en unos segundos.", "error")
+        return redirect(url_for("index"))
 
-                # NUEVO ------------ registrar último login
-                #user.last_login_at = datetime.utcnow()
-                #db.session.commit()
+    if user and check_password_hash(user.password_hash, password):
+        session["user_id"] = user.id
 
-                if is_admin_user(user):
-                    flash("Bienvenido administrador.", "success")
-                    return redirect(url_for("admin_proposals"))
+        # NUEVO ------------ registrar último login
+        #user.last_login_at = datetime.utcnow()
+        #db.session.commit()
 
-                flash("Inicio de sesión exitoso.", "success")
-                return redirect(url_for("profile"))
-            
-            # Invalid credentials (don't retry)
-            flash("Credenciales inválidas.", "error")
-            return redirect(url_for("index"))
-            
-        except Exception as e:
-            retry_count += 1
-            print(f"⚠️ Login error (attempt {retry_count}/{max_retries}): {e}")
-            
-            try:
-                db.session.rollback()
-                db.session.close()
-            except Exception:
-                pass
-            
-            if retry_count >= max_retries:
-                flash("Error de conexión. Por favor, intenta nuevamente en unos segundos.", "error")
-                return redirect(url_for("index"))
-    
+        if is_admin_user(user):
+            flash("Bienvenido administrador.", "success")
+            return redirect(url_for("admin_proposals"))
+
+        flash("Inicio de sesión exitoso.", "success")
+        return redirect(url_for("profile"))
+
+    # Invalid credentials
     flash("Credenciales inválidas.", "error")
     return redirect(url_for("index"))
 
@@ -665,11 +1474,165 @@ def logout():
     flash("Sesión cerrada correctamente.", "success")
     return redirect(url_for("index"))
 
+# =========================
+# SUBIDA DIRECTA: FIRMA
+# =========================
+
+@app.route("/uploads/sign", methods=["POST"])
+@limiter.limit("30 per minute")
+def sign_direct_upload():
+    user = get_current_user()
+    if not user or is_admin_user(user):
+        return {"error": "No autorizado"}, 403
+    if not direct_uploads_enabled():
+        return {"error": "Subida directa no disponible"}, 404
+
+    kind = (request.get_json(silent=True) or {}).get("kind")
+    if kind not in UPLOAD_FOLDERS:
+        return {"error": "Tipo de archivo inválido"}, 400
+
+    params = storage.direct_upload_params(direct_upload_folder(kind, user), ALLOWED_EXTENSIONS[kind])
+    # Solo para validar en el navegador; el servidor vuelve a revisar el descriptor
+    params["max_bytes"] = MAX_FILE_SIZES[kind]
+    params["extensions"] = sorted(ALLOWED_EXTENSIONS[kind])
+    return params, 200, {"Cache-Control": "no-store"}
+
+@app.route("/uploads/discard", methods=["POST"])
+@limiter.limit("30 per minute")
+def discard_direct_uploads():
+    """
+    Borra subidas directas que el form ya no va a usar (otra del mismo envío
+    falló y se recurre al multipart). Solo descriptores verificados de la
+    carpeta del propio usuario.
+    """
+    user = get_current_user()
+    if not user or is_admin_user(user):
+        return {"error": "No autorizado"}, 403
+    if not direct_uploads_enabled():
+        return {"error": "Subida directa no disponible"}, 404
+
+    uploads = (request.get_json(silent=True) or {}).get("uploads")
+    if not isinstance(uploads, list) or len(uploads) > len(UPLOAD_FOLDERS):
+        return {"error": "Solicitud inválida"}, 400
+
+    deleted = 0
+    for item in uploads:
+        if not isinstance(item, dict) or item.get("kind") not in UPLOAD_FOLDERS:
+            continue
+        descriptor = item.get("descriptor")
+        if not isinstance(descriptor, dict):
+            continue
+        asset = storage.verify_direct_upload(descriptor, direct_upload_folder(item["kind"], user))
+        if asset:
+            delete_file(asset["url"])
+            deleted += 1
+    return {"deleted": deleted}, 200, {"Cache-Control": "no-store"}
+
+# =========================
+# SUBIDAS REANUDABLES: init / append / finalize
+# =========================
+
+def chunked_upload_user():
+    user = get_current_user()
+    if not user or is_admin_user(user):
+        return None
+    return user
+
+def chunked_upload_error(e):
+    body = {"error": str(e)}
+    if isinstance(e, OffsetMismatch):
+        body["offset"] = e.offset
+    return body, e.status, {"Cache-Control": "no-store"}
+
+@app.route("/uploads/chunked", methods=["POST"])
+@limiter.limit("20 per minute")
+def chunked_upload_init():
+    user = chunked_upload_user()
+    if not user:
+        return {"error": "No autorizado"}, 403
+
+    data = request.get_json(silent=True) or {}
+    kind = data.get("kind")
+    # Se conserva el nombre original (con acentos): de ahí sale el título de la propuesta
+    filename = os.path.basename(str(data.get("filename") or "").replace("\\", "/"))[:255]
+    try:
+        size = int(data.get("size"))
+    except (TypeError, ValueError):
+        size = 0
+
+    if kind not in CHUNKED_UPLOAD_KINDS:
+        return {"error": "Tipo de archivo inválido"}, 400
+    if not allowed_file(filename, kind):
+        return {"error": "Formato de archivo no permitido"}, 400
+    if not 0 < size <= MAX_FILE_SIZES[kind]:
+        return {"error": "Tamaño de archivo inválido"}, 400
+
+    meta = upload_spool.create(user.id, kind, filename, size)
+    return {
+        "upload_id": meta["id"],
+        "offset": 0,
+        "size": size,
+        "chunk_size": CHUNKED_UPLOAD_CHUNK,
+    }, 201, {"Cache-Control": "no-store"}
+
+@app.route("/uploads/chunked/<upload_id>", methods=["GET"])
+@limiter.limit("60 per minute")
+def chunked_upload_status(upload_id):
+    user = chunked_upload_user()
+    if not user:
+        return {"error": "No autorizado"}, 403
+    try:
+        meta = upload_spool.status(upload_id, user.id)
+    except ChunkedUploadError as e:
+        return chunked_upload_error(e)
+    return {
+        "upload_id": upload_id,
+        "offset": meta["offset"],
+        "size": meta["size"],
+        "assembled": meta["assembled"],
+        "chunk_size": CHUNKED_UPLOAD_CHUNK,
+    }, 200, {"Cache-Control": "no-store"}
+
+@app.route("/uploads/chunked/<upload_id>", methods=["PUT"])
+@limiter.limit("240 per minute")
+def chunked_upload_append(upload_id):
+    user = chunked_upload_user()
+    if not user:
+        return {"error": "No autorizado"}, 403
+    if (request.content_length or 0) > CHUNKED_UPLOAD_MAX_CHUNK:
+        return {"error": "Bloque demasiado grande"}, 413
+
+    offset = request.args.get("offset", type=int)
+    if offset is None or offset < 0:
+        return {"error": "offset inválido"}, 400
+    data = request.get_data(cache=False)
+    try:
+        new_offset = upload_spool.append(
+            upload_id, user.id, offset, data, request.headers.get("X-Chunk-SHA256")
+        )
+    except ChunkedUploadError as e:
+        return chunked_upload_error(e)
+    return {"upload_id": upload_id, "offset": new_offset}, 200, {"Cache-Control": "no-store"}
+
+@app.route("/uploads/chunked/<upload_id>/finalize", methods=["POST"])
+@limiter.limit("20 per minute")
+def chunked_upload_finalize(upload_id):
+    user = chunked_upload_user()
+    if not user:
+        return {"error": "No autorizado"}, 403
+    checksum = (request.get_json(silent=True) or {}).get("sha256")
+    try:
+        meta = upload_spool.assemble(upload_id, user.id, checksum)
+    except ChunkedUploadError as e:
+        return chunked_upload_error(e)
+    return {"upload_id": upload_id, "size": meta["size"], "assembled": True}, 200, {"Cache-Control": "no-store"}
+
 # =========================
 # PERFIL
 # =========================
 
 @app.route("/profile", methods=["GET", "POST"])
+@idempotent(in_progress_endpoint="profile")
 def profile():
     form = DummyForm()
     user = get_current_user()  # Mover esta asignación afuera, para que siempre exista
@@ -692,38 +1655,88 @@ def profile():
     ]
 
     if request.method == "POST":
-        if user.profile is None:
-            db.session.add(profile_data)
-            user.profile = profile_data
-
-        user.full_name = request.form.get("full_name", "").strip()
-
-        profile_data.phone = request.form.get("phone", "").strip()
-        profile_data.country = request.form.get("country", "").strip()
-        profile_data.linkedin_url = request.form.get("linkedin_url", "").strip()
-
         cv_file = request.files.get("cv_file")
         photo_file = request.files.get("photo_file")
 
-        if cv_file and cv_file.filename:
+        # Archivos que el navegador ya subió directo (solo llega el descriptor)
+        try:
+            cv_direct = direct_upload_from_form("cv", user)
+            photo_direct = direct_upload_from_form("photo", user)
+        except InvalidDirectUploadError as e:
+            print("❌ Subida directa rechazada:", e)
+            flash("No se pudo verificar el archivo subido. Intente nuevamente.", "error")
+            return redirect(url_for("profile"))
+
+        has_cv = bool(not cv_direct and cv_file and cv_file.filename)
+        has_photo = bool(not photo_direct and photo_file and photo_file.filename)
+
+        # 1️⃣ Validar tipo y tamaño de AMBOS archivos antes de cualquier subida
+        if has_cv:
             if not allowed_file(cv_file.filename, "cv"):
                 flash("CV inválido. Formatos permitidos: PDF, DOC, DOCX.", "error")
                 return redirect(url_for("profile"))
-            cv_url = upload_to_cloudinary(cv_file, "c4p/profiles/cv")
-            if not cv_url:
-                flash("Error al subir el CV.", "error")
+            if not validate_file_size(cv_file, "cv"):
+                flash("El CV no debe exceder 5 MB.", "error")
                 return redirect(url_for("profile"))
-            profile_data.cv_url = cv_url
 
-        if photo_file and photo_file.filename:
+        if has_photo:
             if not allowed_file(photo_file.filename, "photo"):
                 flash("Foto inválida. Formatos permitidos: JPG, JPEG, PNG.", "error")
                 return redirect(url_for("profile"))
-            photo_url = upload_to_cloudinary(photo_file, "c4p/profiles/photos")
-            if not photo_url:
-                flash("Error al subir la foto.", "error")
+            if not validate_file_size(photo_file, "photo"):
+                flash("La foto no debe exceder 3 MB.", "error")
                 return redirect(url_for("profile"))
-            profile_data.photo_url = photo_url
+            try:
+                photo_uploads = photo_derivative_uploads(photo_file, "c4p/profiles/photos")
+            except InvalidImageError:
+                flash("Foto inválida: no se pudo leer la imagen.", "error")
+                return redirect(url_for("profile"))
+
+        if not (has_cv or cv_direct) and not profile_data.cv_url:
+            flash("Por favor sube tu CV (obligatorio).", "error")
+            return redirect(url_for("profile"))
+
+        if not (has_photo or photo_direct) and not profile_data.photo_url:
+            flash("Por favor sube tu Foto profesional (obligatorio).", "error")
+            return redirect(url_for("profile"))
+
+        # 2️⃣ Subir CV y foto en paralelo
+        uploads = {}
+        if has_cv:
+            uploads["cv"] = (cv_file, "c4p/profiles/cv")
+        if has_photo:
+            uploads.update(photo_uploads)
+        uploaded = upload_files_concurrently(uploads) if uploads else {}
+        if cv_direct:
+            uploaded["cv"] = cv_direct["url"]
+        if photo_direct:
+            uploaded.update(direct_photo_urls(photo_direct["url"]))
+
+        if not all(uploaded.values()):
+            # No dejar archivos huérfanos si solo una de las dos subidas funcionó
+            for url in uploaded.values():
+                if url:
+                    delete_file(url)
+            flash("Error al subir el CV." if not uploaded.get("cv", True) else "Error al subir la foto.", "error")
+            return redirect(url_for("profile"))
+
+        # 3️⃣ Guardar datos (un solo commit cuando ambas subidas terminaron)
+        if user.profile is None:
+            db.session.add(profile_data)
+            user.profile = profile_data
+
+        user.full_name = request.form.get("full_name", "").strip()
+
+        profile_data.phone = request.form.get("phone", "").strip()
+        profile_data.country = request.form.get("country", "").strip()
+        profile_data.linkedin_url = request.form.get("linkedin_url", "").strip()
+
+        if "cv" in uploaded:
+            profile_data.cv_url = uploaded["cv"]
+        if "photo" in uploaded:
+            profile_data.photo_url = uploaded["photo"]
+            profile_data.photo_avatar_url = uploaded.get("photo_avatar")
+            profile_data.photo_card_url = uploaded.get("photo_card")
 
         profile_data.certifications = request.form.get("certifications", "").strip()
 
@@ -735,26 +1748,10 @@ def profile():
         profile_data.action_field = request.form.get("action_field", "").strip()
         profile_data.speaker_experience = request.form.get("speaker_experience", "").strip()
 
-        if not profile_data.cv_url:
-            flash("Por favor sube tu CV (obligatorio).", "error")
-            return redirect(url_for("profile"))
-
-        if not profile_data.photo_url:
-            flash("Por favor sube tu Foto profesional (obligatorio).", "error")
-            return redirect(url_for("profile"))
-        
-        #CV
-        if cv_file and not validate_file_size(cv_file, "cv"):
-            flash("El CV no debe exceder 5 MB.", "error")
-            return redirect(url_for("profile"))
-
-        #FOTO
-        if not validate_file_size(photo_file, "photo"):
-            flash("La foto no debe exceder 3 MB.", "error")
-            return redirect(url_for("profile"))
-
+        message = "¡Perfil actualizado exitosamente!"
+        complete_idempotent_request(url_for("submit_proposal"), message)
         db.session.commit()
-        flash("¡Perfil actualizado exitosamente!", "success")
+        flash(message, "success")
         return redirect(url_for("submit_proposal"))
 
     country_options = "".join(
@@ -763,8 +1760,11 @@ def profile():
     )
 
     PROFILE_HTML = """
-    <form method="POST" class="space-y-6" enctype="multipart/form-data">
+    <form method="POST" class="space-y-6" enctype="multipart/form-data" data-sign-url="{{ url_for('sign_direct_upload') }}" data-discard-url="{{ url_for('discard_direct_uploads') }}">
         <input type="hidden" name="csrf_token" value="{{ csrf_token() }}">
+        <input type="hidden" name="idempotency_key" value="{{ idempotency_key }}">
+        <input type="hidden" name="cv_direct" value="">
+        <input type="hidden" name="photo_direct" value="">
         <div class="grid grid-cols-1 md:grid-cols-2 gap-6">
             <div class="col-span-full">
                 <h3 class="text-xl font-semibold mb-3 cmc-text-blue border-b cmc-border pb-2">1. Datos Personales</h3>
@@ -800,7 +1800,7 @@ def profile():
 
             <div class="col-span-full">
                 <label class="block text-sm font-medium cmc-text-blue">CV (obligatorio) - Subir archivo</label>
-                <input type="file" name="cv_file" accept=".pdf,.doc,.docx" class="mt-1 block w-full p-2 rounded-lg border focus:ring focus:ring-blue-200">
+                <input type="file" name="cv_file" accept=".pdf,.doc,.docx" {{ direct_attrs.cv|safe }} class="mt-1 block w-full p-2 rounded-lg border focus:ring focus:ring-blue-200">
                 <p class="text-xs text-gray-600 mt-1">
                     Formatos permitidos: PDF, DOC, DOCX.
                     {% if profile.cv_url %}
@@ -811,7 +1811,7 @@ def profile():
 
             <div class="col-span-full">
                 <label class="block text-sm font-medium cmc-text-blue">Foto profesional (obligatorio) - Subir archivo</label>
-                <input type="file" name="photo_file" accept=".jpg,.jpeg,.png" class="mt-1 block w-full p-2 rounded-lg border focus:ring focus:ring-blue-200">
+                <input type="file" name="photo_file" accept=".jpg,.jpeg,.png" {{ direct_attrs.photo|safe }} class="mt-1 block w-full p-2 rounded-lg border focus:ring focus:ring-blue-200">
                 <p class="text-xs text-gray-600 mt-1">
                     Formatos permitidos: JPG, JPEG, PNG.
                     {% if profile.photo_url %}
@@ -878,12 +1878,16 @@ def profile():
             Guardar y Actualizar Perfil
         </button>
     </form>
+    {{ direct_upload_script|safe }}
     """
-    rendered = render_template_string(
+    rendered = render_inline_template(
         PROFILE_HTML,
         user=user,
         profile=profile_data,
-        country_options=country_options
+        country_options=country_options,
+        direct_attrs={kind: direct_upload_attrs(kind) for kind in ("cv", "photo")},
+        direct_upload_script=direct_upload_script(),
+        idempotency_key=new_idempotency_key()
     )
 
     return render_internal_page("Mi Perfil de Candidato", rendered)
@@ -892,9 +1896,63 @@ def profile():
 # ENVIAR PROPUESTA (UI: instrucciones + archivo + sedes)
 # =========================
 
+def create_proposals(user, doc_url, filename, venues, after_commit=None):
+    """
+    Crea una propuesta por sede para un documento ya subido y redirige.
+    after_commit corre solo si el alta quedó guardada (p.ej. liberar el spool).
+    """
+    try:
+        # 3️⃣ Título automático basado en el nombre del archivo
+        base_name = os.path.splitext(filename)[0]
+        title_auto = base_name.replace("_", " ").strip() or "Propuesta en documento"
+
+        # 4️⃣ Placeholders (compatibilidad BD vieja)
+        session_type_value = "DOCUMENTO"
+        category_value = "Documento"
+        placeholder_text = "Ver documento adjunto en 'Documento de apoyo'."
+        video_url_value = doc_url
+
+        # 5️⃣ Crear propuestas (una por sede)
+        for venue in venues:
+            new_proposal = Proposal(
+                user_id=user.id,
+                title=title_auto,
+                session_type=session_type_value,
+                instructional_objective=placeholder_text,
+                detailed_process=placeholder_text,
+                learning_outcome=placeholder_text,
+                category=category_value,
+                supporting_doc_url=doc_url,
+                video_url=video_url_value,
+                venue=venue,
+                status="En revisión",
+                received_at=datetime.utcnow()
+            )
+            db.session.add(new_proposal)
+
+        # Texto del documento para la búsqueda de admin (lo extrae proposal_search.py)
+        enqueue_document(db.session.connection(), doc_url)
+
+        # 6️⃣ Commit único y seguro (incluye la llave de idempotencia)
+        message = f'¡Propuesta "{title_auto}" en revisión para la(s) {len(venues)} sede(s) con éxito!'
+        complete_idempotent_request(url_for("proposals_list"), message)
+        db.session.commit()
+
+    except Exception as e:
+        db.session.rollback()
+        flash("No se pudo enviar la propuesta. Intente nuevamente.", "error")
+        print("❌ Error al guardar propuesta:", e)
+        return redirect(url_for("submit_proposal"))
+
+    if after_commit:
+        after_commit()
+    flash(message, "success")
+    return redirect(url_for("proposals_list"))
+
 @app.route("/submit", methods=["GET", "POST"])
 @csrf.exempt
 @limiter.limit("3 per minute")
+@idempotent(in_progress_endpoint="proposals_list")
 def submit_proposal():
     user = get_current_user()
     if not user:
@@ -917,6 +1975,47 @@ def submit_proposal():
         proposal_file = request.files.get("proposal_file")
         venues = request.form.getlist("venues")
 
+        try:
+            proposal_direct = direct_upload_from_form("proposal", user)
+        except InvalidDirectUploadError as e:
+            print("❌ Subida directa rechazada:", e)
+            flash("No se pudo verificar el archivo subido. Intente nuevamente.", "error")
+            return redirect(url_for("submit_proposal"))
+
+        if proposal_direct:
+            if not venues:
+                delete_file(proposal_direct["url"])
+                flash("Debe seleccionar al menos una sede.", "error")
+                return redirect(url_for("submit_proposal"))
+            filename = f'{proposal_direct["original_filename"]}.{proposal_direct["extension"]}'
+            return create_proposals(user, proposal_direct["url"], filename, venues)
+
+        # Documento que llegó por bloques (/uploads/chunked): solo viene el upload_id
+        upload_id = request.form.get("proposal_upload_id", "").strip()
+        if upload_id:
+            spooled = upload_spool.assembled(upload_id, user.id)
+            if not spooled:
+                flash("La carga del archivo expiró o no terminó. Vuelva a seleccionarlo.", "error")
+                return redirect(url_for("submit_proposal"))
+            if not venues:
+                flash("Debe seleccionar al menos una sede.", "error")
+                return redirect(url_for("submit_proposal"))
+
+            meta, spool_path = spooled
+            try:
+                with open(spool_path, "rb") as fh:
+                    doc_url = upload_file(FileStorage(stream=fh, filename=meta["filename"]), UPLOAD_FOLDERS["proposal"])
+                if not doc_url:
+                    raise ValueError("Error al subir el archivo")
+            except Exception as e:
+                flash("No se pudo enviar la propuesta. Intente nuevamente.", "error")
+                print("❌ Error al subir propuesta:", e)
+                return redirect(url_for("submit_proposal"))
+
+            # Si el commit falla, el spool sigue ahí y el reintento no vuelve a subir bloques
+            return create_proposals(user, doc_url, meta["filename"], venues,
+                                    after_commit=lambda: upload_spool.discard(upload_id))
+
         if not proposal_file or not proposal_file.filename:
             flash("Debe cargar un archivo con su propuesta (PDF o Word).", "error")
             return redirect(url_for("submit_proposal"))
@@ -949,50 +2048,17 @@ def submit_proposal():
             return redirect(url_for("submit_proposal"))
         
         try:
-            # 2️⃣ Subir archivo a Cloudinary
-            doc_url = upload_to_cloudinary(proposal_file, "c4p/proposals/docs")
+            # 2️⃣ Subir archivo al almacenamiento
+            doc_url = upload_file(proposal_file, "c4p/proposals/docs")
             if not doc_url:
                 raise ValueError("Error al subir el archivo")
-
-            # 3️⃣ Título automático basado en el nombre del archivo
-            base_name = os.path.splitext(proposal_file.filename)[0]
-            title_auto = base_name.replace("_", " ").strip() or "Propuesta en documento"
-
-            # 4️⃣ Placeholders (compatibilidad BD vieja)
-            session_type_value = "DOCUMENTO"
-            category_value = "Documento"
-            placeholder_text = "Ver documento adjunto en 'Documento de apoyo'."
-            video_url_value = doc_url
-
-            # 5️⃣ Crear propuestas (una por sede)
-            for venue in venues:
-                new_proposal = Proposal(
-                    user_id=user.id,
-                    title=title_auto,
-                    session_type=session_type_value,
-                    instructional_objective=placeholder_text,
-                    detailed_process=placeholder_text,
-                    learning_outcome=placeholder_text,
-                    category=category_value,
-                    supporting_doc_url=doc_url,
-                    video_url=video_url_value,
-                    venue=venue,
-                    status="En revisión",
-                    received_at=datetime.utcnow()
-                )
-                db.session.add(new_proposal)
-
-            # 6️⃣ Commit único y seguro
-            db.session.commit()
-            flash(f'¡Propuesta "{title_auto}" en revisión para la(s) {len(venues)} sede(s) con éxito!', "success")
-            return redirect(url_for("proposals_list"))
-        
-        # ⛔ NO debe ejecutarse ningún código después de este bloque para POST
         except Exception as e:
-            db.session.rollback()
             flash("No se pudo enviar la propuesta. Intente nuevamente.", "error")
-            print("❌ Error al guardar propuesta:", e)
+            print("❌ Error al subir propuesta:", e)
             return redirect(url_for("submit_proposal"))
+
+        # ⛔ NO debe ejecutarse ningún código después de este bloque para POST
+        return create_proposals(user, doc_url, proposal_file.filename, venues)
 #---------------------------------------------NUEVO BLOQUE-------------------------------------------------#
 
 #----------------------------------------ELIMINADO---------------------------------------------------------#
@@ -1094,11 +2160,14 @@ def submit_proposal():
                 asistente de alineación del CMC. Este proceso permite asegurar claridad, alineación y comparabilidad entre las propuestas recibidas.
             </p>
 
-        <form method="POST" class="space-y-6" enctype="multipart/form-data">
-            <input type="hidden" name="csrf_token" value="{{ csrf_token() }}">
+        <form method="POST" class="space-y-6" enctype="multipart/form-data" data-sign-url="{url_for('sign_direct_upload')}" data-discard-url="{url_for('discard_direct_uploads')}" data-chunked-url="{url_for('chunked_upload_init')}">
+            <input type="hidden" name="csrf_token" value="{generate_csrf()}">
+            <input type="hidden" name="proposal_direct" value="">
+            <input type="hidden" name="proposal_upload_id" value="">
+            <input type="hidden" name="idempotency_key" value="{new_idempotency_key()}">
             <div>
                 <label class="block text-sm font-medium cmc-text-blue">Archivo de Propuesta (obligatorio) *</label>
-                <input type="file" name="proposal_file" accept=".pdf,.doc,.docx" required
+                <input type="file" name="proposal_file" accept=".pdf,.doc,.docx" required {direct_upload_attrs("proposal")} {chunked_upload_attrs("proposal")}
                        class="mt-1 block w-full p-3 rounded-lg border focus:ring focus:ring-blue-200">
                 <p class="text-xs text-gray-600 mt-1">
                     Formatos permitidos: PDF, DOC, DOCX.
@@ -1115,6 +2184,8 @@ def submit_proposal():
                 Enviar Propuesta
             </button>
         </form>
+        {direct_upload_script()}
+        {chunked_upload_script()}
     </div>
     """
 
@@ -1209,35 +2280,8 @@ def proposals_list():
 # ADMIN - TABLA PROPUESTAS + CAMBIO ESTATUS
 # =========================
 
-@app.route("/admin/proposals", methods=["GET", "POST"])
-@csrf.exempt
-def admin_proposals():
-    user = get_current_user()
-    csrf_token = generate_csrf()
-    if not user:
-        flash("Debe iniciar sesión.", "error")
-        return redirect(url_for("index"))
-    if not is_admin_user(user):
-        flash("Acceso no autorizado.", "error")
-        return redirect(url_for("profile"))
-
-    if request.method == "POST":
-        proposal_id = request.form.get("proposal_id", "").strip()
-        new_status = request.form.get("new_status", "").strip()
-
-        if proposal_id and new_status:
-            p = db.session.get(Proposal, int(proposal_id))
-            if p:
-                p.status = new_status
-                db.session.commit()
-                flash("Estatus actualizado correctamente.", "success")
-            else:
-                flash("Propuesta no encontrada.", "error")
-        else:
-            flash("Acción inválida.", "error")
-
-        return redirect(url_for("admin_proposals"))
-
+def load_admin_proposal_rows():
+    """Filas de la tabla de admin en una sola consulta (JSON-serializables para la cache)."""
     # Orden por sede: Colombia -> México -> Chile
     venue_order = case(
         (Proposal.venue == "Colombia, Cartagena", 1),
@@ -1246,63 +2290,98 @@ def admin_proposals():
         else_=99
     )
 
-    proposals = (
-        Proposal.query
+    rows = (
+        db.session.query(
+            Proposal.id, Proposal.user_id, Proposal.venue, Proposal.status,
+            Proposal.received_at, Proposal.supporting_doc_url,
+            User.full_name, User.email,
+        )
         .join(User, User.id == Proposal.user_id)
         .order_by(venue_order.asc(), Proposal.received_at.desc(), Proposal.id.desc())
         .all()
     )
 
+    # Documentos con algún casi duplicado (near_duplicates.py; el extractor sube la versión de datos)
+    flagged_urls = {
+        u for (u,) in db.session.execute(
+            select(document_texts.c.doc_url).where(
+                document_texts.c.id.in_(select(duplicate_flags.c.doc_id))
+                | document_texts.c.id.in_(select(duplicate_flags.c.match_doc_id))
+            )
+        )
+    }
+
+    result = []
+    for r in rows:
+        received = "—"
+        try:
+            if r.received_at:
+                # Formato día-mes-año (received_at es naive en UTC)
+                received = r.received_at.replace(tzinfo=None).strftime("%d-%m-%Y")
+        except Exception:
+            received = "—"
+        result.append({
+            "id": r.id,
+            "user_id": r.user_id,
+            "venue": r.venue,
+            "status": r.status,
+            "received": received,
+            "supporting_doc_url": r.supporting_doc_url,
+            "possible_duplicate": r.supporting_doc_url in flagged_urls,
+            "full_name": r.full_name,
+            "email": r.email,
+        })
+    return result
+
+def render_admin_proposal_rows(version):
+    """<tr> de la tabla de admin; nada por sesión (el borrado usa el form compartido de la página)."""
+    # Filas ya listas para la tabla (cache por versión de datos: CACHE DE LISTADOS)
+    proposals = cached_listing("admin_proposals", {}, load_admin_proposal_rows, version=version)
+
     STATUS_OPTIONS = ["En revisión", "Aceptada", "Rechazada", "En reserva"]
+    candidate_url = url_builder("admin_candidate_profile", "user_id")
+    delete_url = url_builder("delete_proposal", "proposal_id")
+    duplicates_url = url_for("admin_duplicates")
 
-    rows = ""
+    rows = []
     last_venue = None
     for p in proposals:
         # separador entre sedes (línea de contorno)
-        if last_venue is not None and p.venue != last_venue:
-            rows += """
+        if last_venue is not None and p["venue"] != last_venue:
+            rows.append("""
             <tr>
                 <td colspan="7" class="px-0 py-0">
                     <div class="border-t-4 border-[#2F4885] my-1"></div>
                 </td>
             </tr>
-            """
-        last_venue = p.venue
+            """)
+        last_venue = p["venue"]
 
         doc_link = '<span class="cmc-gray">—</span>'
-        if p.supporting_doc_url:
-            doc_link = f'<a class="cmc-text-blue font-semibold hover:underline" href="{p.supporting_doc_url}" target="_blank">Ver archivo</a>'
+        if p["supporting_doc_url"]:
+            doc_link = f'<a class="cmc-text-blue font-semibold hover:underline" href="{p["supporting_doc_url"]}" target="_blank">Ver archivo</a>'
+        if p.get("possible_duplicate"):
+            doc_link += f'<div><a class="text-xs text-red-600 font-semibold hover:underline" href="{duplicates_url}">Posible duplicado</a></div>'
 
         # Nombre candidato clicable al perfil admin
-        candidate_name = p.user.full_name if p.user else f"User {p.user_id}"
-        candidate_link = f'<a class="cmc-text-blue font-semibold hover:underline" href="{url_for("admin_candidate_profile", user_id=p.user_id)}">{candidate_name}</a>'
-
-        received = "—"
-        try:
-            if p.received_at:
-                # Primero conviertes a UTC explícitamente (si no lo está)
-                dt_utc = p.received_at.replace(tzinfo=None)  # si ya es naive en UTC, omite esto
-                # Formateas en el formato deseado (día-mes-año hora:minuto)
-                received = dt_utc.strftime("%d-%m-%Y")
-        except Exception:
-            received = "—"
+        candidate_link = f'<a class="cmc-text-blue font-semibold hover:underline" href="{candidate_url(p["user_id"])}">{p["full_name"]}</a>'
 
         options_html = "".join(
-            f'<option value="{s}" {"selected" if s == p.status else ""}>{s}</option>'
+            f'<option value="{s}" {"selected" if s == p["status"] else ""}>{s}</option>'
             for s in STATUS_OPTIONS
         )
 
-        rows += f"""
+        rows.append(f"""
         <tr class="border-b hover:bg-gray-50 transition duration-150">
-            <td class="px-3 py-4">{p.id}</td>
-            <td class="px-3 py-4">{candidate_link}<div class="text-xs cmc-gray">{p.user.email if p.user else ''}</div></td>
-            <td class="px-3 py-4">{p.venue}</td>
-            <td class="px-3 py-4">{received}</td>
+            <td class="px-3 py-4">{p["id"]}</td>
+            <td class="px-3 py-4">{candidate_link}<div class="text-xs cmc-gray">{p["email"]}</div></td>
+            <td class="px-3 py-4">{p["venue"]}</td>
+            <td class="px-3 py-4">{p["received"]}</td>
             <td class="px-3 py-4">{doc_link}</td>
             <td class="px-3 py-4">
                 <form method="POST" class="flex items-center space-x-2">
                     <input type="hidden" name="csrf_token" value="{{ csrf_token() }}">
-                    <input type="hidden" name="proposal_id" value="{p.id}">
+                    <input type="hidden" name="proposal_id" value="{p["id"]}">
                     <select name="new_status" class="p-2 rounded-lg border">
                         {options_html}
                     </select>
@@ -1311,29 +2390,79 @@ def admin_proposals():
                     </button>
                 </form>
             </td>
-            <td class="px-3 py-4">{p.status}</td>
+            <td class="px-3 py-4">{p["status"]}</td>
             <td class="px-3 py-4">
-                <form method="POST"
-                    action="{url_for('delete_proposal', proposal_id=p.id)}"
-                    onsubmit="return confirm('¿Eliminar esta propuesta? Esta acción no se puede deshacer.')">
-                  <input type="hidden" name="csrf_token" value="{csrf_token}">
-                  <button type="submit"
-                          class="bg-red-600 text-white px-3 py-2 rounded-lg font-semibold hover:bg-red-700 transition">
-                        Eliminar
-                    </button>
-                </form>
+                <button type="submit" form="delete-proposal-form"
+                        formaction="{delete_url(p["id"])}"
+                        class="bg-red-600 text-white px-3 py-2 rounded-lg font-semibold hover:bg-red-700 transition">
+                    Eliminar
+                </button>
             </td>
         </tr>
-        """
+        """)
+
+    return "".join(rows)
+
+@app.route("/admin/proposals", methods=["GET", "POST"])
+@csrf.exempt
+@read_replica
+def admin_proposals():
+    user = get_current_user()
+    csrf_token = generate_csrf()
+    if not user:
+        flash("Debe iniciar sesión.", "error")
+        return redirect(url_for("index"))
+    if not is_admin_user(user):
+        flash("Acceso no autorizado.", "error")
+        return redirect(url_for("profile"))
+
+    if request.method == "POST":
+        proposal_id = request.form.get("proposal_id", "").strip()
+        new_status = request.form.get("new_status", "").strip()
+
+        if proposal_id and new_status:
+            p = db.session.get(Proposal, int(proposal_id))
+            if p:
+                old_status = p.status
+                if new_status != old_status:
+                    p.status = new_status
+                    # Aviso al candidato en la misma transacción; lo envía notifications.py
+                    enqueue_status_change(db.session.connection(), p, p.user.email, old_status)
+                db.session.commit()
+                if new_status != old_status:
+                    audit_buffer.append(user, "proposal.status", "proposal", p.id, {
+                        "user_id": p.user_id, "venue": p.venue, "old": old_status, "new": new_status,
+                    })
+                flash("Estatus actualizado correctamente.", "success")
+            else:
+                flash("Propuesta no encontrada.", "error")
+        else:
+            flash("Acción inválida.", "error")
+
+        return redirect(url_for("admin_proposals"))
+
+    # Un solo cálculo para los requests concurrentes del worker (single-flight)
+    version = current_data_version(db.session.connection())
+    rows = single_flight.do(f"admin_proposals:v{version}", lambda: render_admin_proposal_rows(version))
 
     HTML = f"""
     <div class="flex items-center justify-between mb-6">
         <h3 class="text-xl font-semibold cmc-text-blue">Propuestas recibidas</h3>
         <div class="space-x-2">
+            <a href="{url_for('admin_dashboard')}" class="bg-white border border-[#2F4885] text-[#2F4885] px-4 py-2 rounded-lg font-semibold hover:bg-gray-50 transition">Tablero</a>
+            <a href="{url_for('admin_search')}" class="bg-white border border-[#2F4885] text-[#2F4885] px-4 py-2 rounded-lg font-semibold hover:bg-gray-50 transition">Buscar</a>
+            <a href="{url_for('admin_duplicates')}" class="bg-white border border-[#2F4885] text-[#2F4885] px-4 py-2 rounded-lg font-semibold hover:bg-gray-50 transition">Duplicados</a>
+            <a href="{url_for('admin_audit')}" class="bg-white border border-[#2F4885] text-[#2F4885] px-4 py-2 rounded-lg font-semibold hover:bg-gray-50 transition">Auditoría</a>
             <a href="{url_for('admin_passwords')}" class="bg-white border border-[#2F4885] text-[#2F4885] px-4 py-2 rounded-lg font-semibold hover:bg-gray-50 transition">Contraseñas</a>
         </div>
     </div>
 
+    <!-- Un solo form de borrado (con el token de la sesión) para todos los botones de la tabla -->
+    <form id="delete-proposal-form" method="POST"
+        onsubmit="return confirm('¿Eliminar esta propuesta? Esta acción no se puede deshacer.')">
+        <input type="hidden" name="csrf_token" value="{csrf_token}">
+    </form>
+
     <div class="overflow-x-auto shadow-md rounded-lg">
         <table class="min-w-full divide-y divide-gray-200">
             <thead class="bg-[#2F4885] text-white">
@@ -1360,21 +2489,9 @@ def admin_proposals():
 # ADMIN - PERFIL DEL CANDIDATO (LECTURA)
 # =========================
 
-@app.route("/admin/candidate/<int:user_id>")
-def admin_candidate_profile(user_id):
-    user = get_current_user()
-    if not user:
-        flash("Debe iniciar sesión.", "error")
-        return redirect(url_for("index"))
-    if not is_admin_user(user):
-        flash("Acceso no autorizado.", "error")
-        return redirect(url_for("profile"))
-
+def render_candidate_profile(user_id):
+    """Contenido de /admin/candidate/<id> (sin layout); se cachea por profile_version."""
     cand = db.session.get(User, user_id)
-    if not cand:
-        flash("Candidato no encontrado.", "error")
-        return redirect(url_for("admin_proposals"))
-
     prof = cand.profile
 
     cv_link = '<span class="cmc-gray">—</span>'
@@ -1384,6 +2501,11 @@ def admin_candidate_profile(user_id):
     photo_link = '<span class="cmc-gray">—</span>'
     if prof and prof.photo_url:
         photo_link = f'<a class="cmc-text-blue font-semibold hover:underline" href="{prof.photo_url}" target="_blank">Ver Foto</a>'
+        if prof.photo_card_url:
+            photo_link = (
+                f'<img src="{prof.photo_card_url}" alt="Foto" loading="lazy" width="160" height="160" '
+                f'class="w-40 h-40 rounded-lg object-cover shadow-sm mb-2">' + photo_link
+            )
 
     linkedin_link = '<span class="cmc-gray">—</span>'
     if prof and prof.linkedin_url:
@@ -1440,6 +2562,28 @@ def admin_candidate_profile(user_id):
         </div>
     </div>
     """
+    return HTML
+
+@app.route("/admin/candidate/<int:user_id>")
+@read_replica
+def admin_candidate_profile(user_id):
+    user = get_current_user()
+    if not user:
+        flash("Debe iniciar sesión.", "error")
+        return redirect(url_for("index"))
+    if not is_admin_user(user):
+        flash("Acceso no autorizado.", "error")
+        return redirect(url_for("profile"))
+
+    version = fragment_version_of(user_id)
+    if version is None:
+        flash("Candidato no encontrado.", "error")
+        return redirect(url_for("admin_proposals"))
+
+    # Vista repetida: ni consultas ni armado del HTML (CACHE DE FRAGMENTOS)
+    HTML = cached_fragment(
+        "admin_candidate_profile", user_id, version, lambda: render_candidate_profile(user_id)
+    )
     return render_internal_page("Admin | Perfil de Candidato", HTML)
 
 # =========================
@@ -1447,6 +2591,7 @@ def admin_candidate_profile(user_id):
 # =========================
 
 @app.route("/admin/passwords", methods=["GET"])
+@read_replica
 def admin_passwords():
     user = get_current_user()
     if not user:
@@ -1461,32 +2606,39 @@ def admin_passwords():
 
     q = (request.args.get("q") or "").strip().lower()
 
-    query = User.query.filter(User.email.notin_(list(ADMIN_EMAILS)))
-    if q:
-        like = f"%{q}%"
-        query = query.filter((User.email.ilike(like)) | (User.full_name.ilike(like)))
+    def load_rows():
+        query = db.session.query(User.id, User.full_name, User.email, User.unique_password).filter(
+            User.email.notin_(list(ADMIN_EMAILS))
+        )
+        if q:
+            like = f"%{q}%"
+            query = query.filter((User.email.ilike(like)) | (User.full_name.ilike(like)))
+        return [row._asdict() for row in query.order_by(User.id.desc()).all()]
 
-    users = query.order_by(User.id.desc()).all()
+    # Solo en memoria (shared=False): son contraseñas en claro, no van a disco
+    users = cached_listing("admin_passwords", {"q": q}, load_rows, shared=False)
 
-    rows = ""
-    for u in users:
-        rows += f"""
+    view_url = url_builder("admin_user_view", "user_id")
+    edit_url = url_builder("admin_user_edit", "user_id")
+    delete_url = url_builder("admin_user_delete", "user_id")
+
+    rows = "".join(f"""
         <tr class="border-b hover:bg-gray-50 transition duration-150">
             <td class="px-3 py-4">
-                <a href="{url_for('admin_user_view', user_id=u.id)}"
+                <a href="{view_url(u["id"])}"
                 class="cmc-text-blue font-semibold hover:underline">
-                {u.full_name}
+                {u["full_name"]}
                 </a>
             </td>
-            <td class="px-3 py-4">{u.email}</td>
-            <td class="px-3 py-4 font-mono">{u.unique_password}</td>
+            <td class="px-3 py-4">{u["email"]}</td>
+            <td class="px-3 py-4 font-mono">{u["unique_password"]}</td>
             <td class="px-3 py-4 flex gap-2">
-                <a href="{url_for('admin_user_edit', user_id=u.id)}"
+                <a href="{edit_url(u["id"])}"
                 class="text-sm bg-yellow-500 text-white px-3 py-1 rounded hover:opacity-90">
                 Editar
                 </a>
                 <form method="POST"
-                    action="{url_for('admin_user_delete', user_id=u.id)}"
+                    action="{delete_url(u["id"])}"
                     onsubmit="return confirm('¿Eliminar este usuario? Esta acción no se puede deshacer.')">
                   <input type="hidden" name="csrf_token" value="{csrf_token}">
                   <button type="submit"
@@ -1496,7 +2648,7 @@ def admin_passwords():
                 </form>
             </td>
         </tr>
-        """
+        """ for u in users)
 
     HTML = f"""
     <div class="flex items-center justify-between mb-4">
@@ -1534,6 +2686,364 @@ def admin_passwords():
     """
     return render_internal_page("Admin | Contraseñas", HTML)
 
+# =========================
+# ADMIN - TABLERO
+# =========================
+@app.route("/admin/dashboard")
+@read_replica
+def admin_dashboard():
+    user = get_current_user()
+    if not user:
+        flash("Debe iniciar sesión.", "error")
+        return redirect(url_for("index"))
+    if not is_admin_user(user):
+        flash("Acceso no autorizado.", "error")
+        return redirect(url_for("profile"))
+
+    # Lee las tablas de resumen (proposal_stats.py), no hace GROUP BY sobre proposals
+    by_status, by_day = read_summary(db.session.connection())
+
+    VENUES = ["Colombia, Cartagena", "México, Monterrey", "Chile, Santiago"]
+    STATUS_OPTIONS = ["En revisión", "Aceptada", "Rechazada", "En reserva"]
+    venues = VENUES + sorted({v for v, _ in by_status} - set(VENUES))
+    statuses = STATUS_OPTIONS + sorted({st for _, st in by_status} - set(STATUS_OPTIONS))
+
+    header = "".join(
+        f'<th class="px-3 py-3 text-left text-xs font-medium uppercase tracking-wider">{st}</th>'
+        for st in statuses
+    )
+    rows = ""
+    for v in venues:
+        cells = "".join(f'<td class="px-3 py-4">{by_status.get((v, st), 0)}</td>' for st in statuses)
+        total = sum(by_status.get((v, st), 0) for st in statuses)
+        rows += f"""
+        <tr class="border-b hover:bg-gray-50 transition duration-150">
+            <td class="px-3 py-4 font-semibold cmc-text-blue">{v}</td>
+            {cells}
+            <td class="px-3 py-4 font-semibold">{total}</td>
+        </tr>
+        """
+    totals = "".join(
+        f'<td class="px-3 py-4 font-semibold">{sum(by_status.get((v, st), 0) for v in venues)}</td>'
+        for st in statuses
+    )
+
+    # Últimos 30 días con envíos
+    days = sorted(by_day.items(), reverse=True)[:30]
+    day_rows = "".join(
+        f"""
+        <tr class="border-b">
+            <td class="px-3 py-2">{d.strftime("%d-%m-%Y")}</td>
+            <td class="px-3 py-2 font-semibold">{n}</td>
+        </tr>
+        """
+        for d, n in days
+    )
+
+    HTML = f"""
+    <div class="flex items-center justify-between mb-6">
+        <h3 class="text-xl font-semibold cmc-text-blue">Tablero de revisión</h3>
+        <a href="{url_for('admin_proposals')}" class="bg-[#2F4885] text-white px-4 py-2 rounded-lg font-semibold hover:opacity-90 transition">Volver a Propuestas</a>
+    </div>
+
+    <div class="overflow-x-auto shadow-md rounded-lg mb-6">
+        <table class="min-w-full divide-y divide-gray-200">
+            <thead class="bg-[#2F4885] text-white">
+                <tr>
+                    <th class="px-3 py-3 text-left text-xs font-medium uppercase tracking-wider">Sede</th>
+                    {header}
+                    <th class="px-3 py-3 text-left text-xs font-medium uppercase tracking-wider">Total</th>
+                </tr>
+            </thead>
+            <tbody class="bg-white divide-y divide-gray-200">
+                {rows}
+                <tr class="bg-gray-50">
+                    <td class="px-3 py-4 font-semibold cmc-text-blue">Total</td>
+                    {totals}
+                    <td class="px-3 py-4 font-semibold">{sum(by_status.values())}</td>
+                </tr>
+            </tbody>
+        </table>
+    </div>
+
+    <h3 class="text-xl font-semibold cmc-text-blue mb-4">Propuestas por día de recepción</h3>
+    <div class="overflow-x-auto shadow-md rounded-lg">
+        <table class="min-w-full divide-y divide-gray-200">
+            <thead class="bg-[#2F4885] text-white">
+                <tr>
+                    <th class="px-3 py-3 text-left text-xs font-medium uppercase tracking-wider">Fecha</th>
+                    <th class="px-3 py-3 text-left text-xs font-medium uppercase tracking-wider">Propuestas</th>
+                </tr>
+            </thead>
+            <tbody class="bg-white divide-y divide-gray-200">
+                {day_rows or '<tr><td colspan="2" class="px-6 py-8 text-center cmc-gray">Sin propuestas.</td></tr>'}
+            </tbody>
+        </table>
+    </div>
+    """
+    return render_internal_page("Admin | Tablero", HTML)
+
+# =========================
+# ADMIN - BÚSQUEDA EN DOCUMENTOS
+# =========================
+SEARCH_RESULTS_LIMIT = 50
+
+def highlight_snippet(snippet):
+    """Escapa el fragmento y cambia las marcas del índice por <mark>."""
+    return str(escape(snippet or "")).replace(HIGHLIGHT_START, "<mark>").replace(HIGHLIGHT_END, "</mark>")
+
+@app.route("/admin/search")
+@read_replica
+def admin_search():
+    user = get_current_user()
+    if not user:
+        flash("Debe iniciar sesión.", "error")
+        return redirect(url_for("index"))
+    if not is_admin_user(user):
+        flash("Acceso no autorizado.", "error")
+        return redirect(url_for("profile"))
+
+    q = (request.args.get("q") or "").strip()[:200]
+    hits = search_documents(db.session.connection(), q, limit=SEARCH_RESULTS_LIMIT) if q else []
+
+    # Propuestas (una por sede) de cada documento encontrado, en una consulta
+    by_doc = {}
+    if hits:
+        rows = (
+            db.session.query(
+                Proposal.id, Proposal.title, Proposal.venue, Proposal.status,
+                Proposal.supporting_doc_url, Proposal.user_id, User.full_name,
+            )
+            .join(User, User.id == Proposal.user_id)
+            .filter(Proposal.supporting_doc_url.in_([h["doc_url"] for h in hits]))
+            .order_by(Proposal.id)
+            .all()
+        )
+        for r in rows:
+            by_doc.setdefault(r.supporting_doc_url, []).append(r)
+
+    results = ""
+    for h in hits:
+        props = by_doc.get(h["doc_url"])
+        if not props:
+            continue  # documento de una propuesta ya eliminada
+        first = props[0]
+        venues = ", ".join(f"{escape(p.venue)} ({escape(p.status)})" for p in props)
+        results += f"""
+        <div class="border rounded-lg p-4 mb-3">
+            <div class="flex items-center justify-between">
+                <a class="cmc-text-blue font-semibold hover:underline" href="{h["doc_url"]}" target="_blank">{escape(first.title)}</a>
+                <span class="text-xs cmc-gray">#{", #".join(str(p.id) for p in props)}</span>
+            </div>
+            <div class="text-sm mt-1">
+                <a class="cmc-text-blue hover:underline" href="{url_for('admin_candidate_profile', user_id=first.user_id)}">{escape(first.full_name)}</a>
+                <span class="cmc-gray"> · {venues}</span>
+            </div>
+            <p class="text-sm text-gray-700 mt-2">{highlight_snippet(h["snippet"])}</p>
+        </div>
+        """
+
+    if q and not results:
+        results = '<p class="text-center cmc-gray py-8">Sin resultados.</p>'
+
+    HTML = f"""
+    <div class="flex items-center justify-between mb-6">
+        <h3 class="text-xl font-semibold cmc-text-blue">Buscar en el contenido de las propuestas</h3>
+        <a href="{url_for('admin_proposals')}" class="bg-[#2F4885] text-white px-4 py-2 rounded-lg font-semibold hover:opacity-90 transition">Volver a Propuestas</a>
+    </div>
+
+    <form method="GET" class="flex gap-2 mb-6">
+        <input type="text" name="q" value="{escape(q)}" placeholder="p.ej. análisis de vibraciones"
+               class="w-full p-3 rounded-lg border focus:ring focus:ring-blue-200">
+        <button type="submit" class="bg-[#2F4885] text-white px-4 py-2 rounded-lg font-semibold hover:opacity-90 transition">Buscar</button>
+    </form>
+
+    {results}
+    """
+    return render_internal_page("Admin | Búsqueda", HTML)
+
+# =========================
+# ADMIN - CASI DUPLICADOS
+# =========================
+DUPLICATES_LIMIT = 100
+
+@app.route("/admin/duplicates")
+@read_replica
+def admin_duplicates():
+    user = get_current_user()
+    if not user:
+        flash("Debe iniciar sesión.", "error")
+        return redirect(url_for("index"))
+    if not is_admin_user(user):
+        flash("Acceso no autorizado.", "error")
+        return redirect(url_for("profile"))
+
+    # Pares más recientes; el join descarta documentos ya purgados
+    newer, older = document_texts.alias("newer"), document_texts.alias("older")
+    pairs = db.session.execute(
+        select(newer.c.doc_url, older.c.doc_url, duplicate_flags.c.similarity, duplicate_flags.c.detected_at)
+        .select_from(duplicate_flags)
+        .join(newer, newer.c.id == duplicate_flags.c.doc_id)
+        .join(older, older.c.id == duplicate_flags.c.match_doc_id)
+        .order_by(duplicate_flags.c.detected_at.desc(), duplicate_flags.c.id.desc())
+        .limit(DUPLICATES_LIMIT)
+    ).all()
+
+    # Propuestas (una por sede) de cada documento, en una consulta
+    by_doc = {}
+    if pairs:
+        urls = {p[0] for p in pairs} | {p[1] for p in pairs}
+        rows = (
+            db.session.query(
+                Proposal.id, Proposal.title, Proposal.venue, Proposal.status,
+                Proposal.supporting_doc_url, Proposal.user_id, User.full_name, User.email,
+            )
+            .join(User, User.id == Proposal.user_id)
+            .filter(Proposal.supporting_doc_url.in_(urls))
+            .order_by(Proposal.id)
+            .all()
+        )
+        for r in rows:
+            by_doc.setdefault(r.supporting_doc_url, []).append(r)
+
+    def side(doc_url, props):
+        first = props[0]
+        venues = ", ".join(f"{escape(p.venue)} ({escape(p.status)})" for p in props)
+        return f"""
+            <div class="w-full">
+                <a class="cmc-text-blue font-semibold hover:underline" href="{doc_url}" target="_blank">{escape(first.title)}</a>
+                <span class="text-xs cmc-gray">#{", #".join(str(p.id) for p in props)}</span>
+                <div class="text-sm mt-1">
+                    <a class="cmc-text-blue hover:underline" href="{url_for('admin_candidate_profile', user_id=first.user_id)}">{escape(first.full_name)}</a>
+                    <span class="cmc-gray"> · {escape(first.email)}</span>
+                </div>
+                <div class="text-sm cmc-gray">{venues}</div>
+            </div>
+        """
+
+    results = ""
+    for newer_url, older_url, sim, detected_at in pairs:
+        a, b = by_doc.get(newer_url), by_doc.get(older_url)
+        if not a or not b:
+            continue  # propuesta eliminada
+        same_candidate = a[0].user_id == b[0].user_id
+        results += f"""
+        <div class="border rounded-lg p-4 mb-3">
+            <div class="flex items-center justify-between mb-2">
+                <span class="font-semibold {"cmc-gray" if same_candidate else "text-red-600"}">
+                    {round(sim * 100)}% similar · {"mismo candidato" if same_candidate else "distinto candidato"}
+                </span>
+                <span class="text-xs cmc-gray">{detected_at.strftime("%d-%m-%Y %H:%M")} UTC</span>
+            </div>
+            <div class="flex gap-2">
+                {side(newer_url, a)}
+                {side(older_url, b)}
+            </div>
+        </div>
+        """
+
+    HTML = f"""
+    <div class="flex items-center justify-between mb-6">
+        <h3 class="text-xl font-semibold cmc-text-blue">Propuestas casi duplicadas</h3>
+        <a href="{url_for('admin_proposals')}" class="bg-[#2F4885] text-white px-4 py-2 rounded-lg font-semibold hover:opacity-90 transition">Volver a Propuestas</a>
+    </div>
+    <p class="text-sm cmc-gray mb-4">Documentos con contenido muy parecido (MinHash, similitud estimada de Jaccard); los más recientes primero.</p>
+
+    {results or '<p class="text-center cmc-gray py-8">Sin casi duplicados.</p>'}
+    """
+    return render_internal_page("Admin | Duplicados", HTML)
+
+# =========================
+# ADMIN - AUDITORÍA
+# =========================
+AUDIT_ACTION_LABELS = {
+    "proposal.status": "Cambio de estatus",
+    "proposal.delete": "Propuesta eliminada",
+    "user.edit": "Usuario editado",
+    "user.delete": "Usuario eliminado",
+}
+
+@app.route("/admin/audit")
+def admin_audit():
+    user = get_current_user()
+    if not user:
+        flash("Debe iniciar sesión.", "error")
+        return redirect(url_for("index"))
+    if not is_admin_user(user):
+        flash("Acceso no autorizado.", "error")
+        return redirect(url_for("profile"))
+
+    entity_type = request.args.get("entity_type") or None
+    if entity_type not in (None, "proposal", "user"):
+        entity_type = None
+    entity_id = request.args.get("entity_id", type=int)
+    before = parse_cursor(request.args.get("before"))
+
+    # Lo que este worker tiene en el buffer se escribe antes de leer
+    audit_buffer.flush()
+    entries, next_cursor = read_page(
+        db.session.connection(), AUDIT_PAGE_SIZE,
+        before=before, entity_type=entity_type, entity_id=entity_id,
+    )
+
+    rows = ""
+    for e in entries:
+        if e["entity_type"] == "proposal":
+            entity = f"Propuesta #{e['entity_id']}"
+        else:
+            entity = f'<a class="cmc-text-blue font-semibold hover:underline" href="{url_for("admin_audit", entity_type="user", entity_id=e["entity_id"])}">Usuario #{e["entity_id"]}</a>'
+        details = json.loads(e["details"]) if e["details"] else {}
+        details_html = "<br>".join(f"<b>{escape(k)}:</b> {escape(v)}" for k, v in details.items())
+        rows += f"""
+        <tr class="border-b hover:bg-gray-50 transition duration-150">
+            <td class="px-3 py-4 whitespace-nowrap">{e["created_at"].strftime("%d-%m-%Y %H:%M:%S")}</td>
+            <td class="px-3 py-4">{escape(e["actor_email"] or "—")}</td>
+            <td class="px-3 py-4">{AUDIT_ACTION_LABELS.get(e["action"], escape(e["action"]))}</td>
+            <td class="px-3 py-4">{entity}</td>
+            <td class="px-3 py-4 text-xs">{details_html}</td>
+        </tr>
+        """
+
+    filters = {"entity_type": entity_type, "entity_id": entity_id}
+    nav = ""
+    if before:
+        nav += f'<a href="{url_for("admin_audit", **filters)}" class="cmc-text-blue font-semibold hover:underline">« Más recientes</a>'
+    if next_cursor:
+        nav += f'<a href="{url_for("admin_audit", before=format_cursor(next_cursor), **filters)}" class="cmc-text-blue font-semibold hover:underline ml-auto">Anteriores »</a>'
+
+    title = "Bitácora de auditoría"
+    if entity_type:
+        title += f" · {'propuesta' if entity_type == 'proposal' else 'usuario'}" + (f" #{entity_id}" if entity_id else "")
+
+    HTML = f"""
+    <div class="flex items-center justify-between mb-6">
+        <h3 class="text-xl font-semibold cmc-text-blue">{title}</h3>
+        <div class="space-x-2">
+            {f'<a href="{url_for("admin_audit")}" class="bg-white border border-[#2F4885] text-[#2F4885] px-4 py-2 rounded-lg font-semibold hover:bg-gray-50 transition">Todo</a>' if entity_type else ""}
+            <a href="{url_for('admin_proposals')}" class="bg-[#2F4885] text-white px-4 py-2 rounded-lg font-semibold hover:opacity-90 transition">Volver a Propuestas</a>
+        </div>
+    </div>
+
+    <div class="overflow-x-auto shadow-md rounded-lg">
+        <table class="min-w-full divide-y divide-gray-200">
+            <thead class="bg-[#2F4885] text-white">
+                <tr>
+                    <th class="px-3 py-3 text-left text-xs font-medium uppercase tracking-wider">Fecha (UTC)</th>
+                    <th class="px-3 py-3 text-left text-xs font-medium uppercase tracking-wider">Admin</th>
+                    <th class="px-3 py-3 text-left text-xs font-medium uppercase tracking-wider">Acción</th>
+                    <th class="px-3 py-3 text-left text-xs font-medium uppercase tracking-wider">Entidad</th>
+                    <th class="px-3 py-3 text-left text-xs font-medium uppercase tracking-wider">Detalle</th>
+                </tr>
+            </thead>
+            <tbody class="bg-white divide-y divide-gray-200">
+                {rows or '<tr><td colspan="5" class="px-6 py-8 text-center cmc-gray">Sin registros.</td></tr>'}
+            </tbody>
+        </table>
+    </div>
+    <div class="flex mt-4">{nav}</div>
+    """
+    return render_internal_page("Admin | Auditoría", HTML)
+
 # =========================
 # ADMIN - ELIMINAR PROPUESTAS
 # =========================
@@ -1552,13 +3062,20 @@ def delete_proposal(proposal_id):
     proposal = Proposal.query.get_or_404(proposal_id)
 
     try:
-        # 1️⃣ Eliminar archivo en Cloudinary
-        delete_from_cloudinary(proposal.supporting_doc_url)
+        doc_url = proposal.supporting_doc_url
 
-        # 2️⃣ Eliminar registro en Neon
+        # 1️⃣ Eliminar registro en Neon (con su entrada de auditoría, misma transacción)
+        record_audit(db.session.connection(), user, "proposal.delete", "proposal", proposal.id, {
+            "user_id": proposal.user_id, "title": proposal.title, "venue": proposal.venue,
+            "status": proposal.status, "supporting_doc_url": doc_url,
+        })
         db.session.delete(proposal)
         db.session.commit()
 
+        # 2️⃣ Eliminar archivo (el mismo documento se comparte entre sedes)
+        if doc_url and not Proposal.query.filter_by(supporting_doc_url=doc_url).first():
+            delete_file(doc_url)
+
         flash("Propuesta eliminada correctamente.", "success")
 
     except Exception as e:
@@ -1569,14 +3086,9 @@ def delete_proposal(proposal_id):
     return redirect(url_for("admin_proposals"))
 
 # NUEVO -------------------------------- ADMINPASSWORD
-@app.route("/admin/users/<int:user_id>")
-def admin_user_view(user_id):
-    user = get_current_user()
-    if not user or not is_admin_user(user):
-        flash("Acceso no autorizado.", "error")
-        return redirect(url_for("index"))
-
-    target = User.query.get_or_404(user_id)
+def render_user_view(user_id):
+    """Contenido de /admin/users/<id> (sin layout); se cachea por profile_version."""
+    target = db.session.get(User, user_id)
     profile = target.profile
 
     HTML = f"""
@@ -1603,7 +3115,21 @@ def admin_user_view(user_id):
         </a>
     </div>
     """
+    return HTML
+
+@app.route("/admin/users/<int:user_id>")
+@read_replica
+def admin_user_view(user_id):
+    user = get_current_user()
+    if not user or not is_admin_user(user):
+        flash("Acceso no autorizado.", "error")
+        return redirect(url_for("index"))
+
+    version = fragment_version_of(user_id)
+    if version is None:
+        abort(404)
 
+    HTML = cached_fragment("admin_user_view", user_id, version, lambda: render_user_view(user_id))
     return render_internal_page("Admin | Perfil Usuario", HTML)
 
 # NUEVO -------------------------------- eliminar usuarios
@@ -1626,18 +3152,24 @@ def admin_user_delete(user_id):
         return redirect(url_for("admin_passwords"))
 
     try:
+        # Misma transacción que el borrado: si no se borra, no queda entrada
+        record_audit(db.session.connection(), admin, "user.delete", "user", u.id, {
+            "email": u.email, "full_name": u.full_name, "proposals": u.proposals.count(),
+        })
+
         # eliminar propuestas del usuario objetivo
         for p in u.proposals.all():
             if p.supporting_doc_url:
-                delete_from_cloudinary(p.supporting_doc_url)
+                delete_file(p.supporting_doc_url)
             db.session.delete(p)
 
         # eliminar perfil
         if u.profile:
             if u.profile.cv_url:
-                delete_from_cloudinary(u.profile.cv_url)
-            if u.profile.photo_url:
-                delete_from_cloudinary(u.profile.photo_url)
+                delete_file(u.profile.cv_url)
+            for url in (u.profile.photo_url, u.profile.photo_avatar_url, u.profile.photo_card_url):
+                if url:
+                    delete_file(url)
             db.session.delete(u.profile)
 
         # eliminar usuario
@@ -1665,10 +3197,14 @@ def admin_user_edit(user_id):
     u = User.query.get_or_404(user_id)
 
     if request.method == "POST":
+        before = {"full_name": u.full_name, "email": u.email}
         u.full_name = request.form.get("full_name", "").strip()
         u.email = request.form.get("email", "").strip().lower()
 
         db.session.commit()
+        changes = {k: [old, getattr(u, k)] for k, old in before.items() if getattr(u, k) != old}
+        if changes:
+            audit_buffer.append(user_admin, "user.edit", "user", u.id, changes)
         flash("Usuario actualizado correctamente.", "success")
         return redirect(url_for("admin_passwords"))
 
@@ -1701,16 +3237,62 @@ def admin_user_edit(user_id):
 
     return render_internal_page("Editar Usuario", HTML)
 
+# =========================
+# ARCHIVOS LOCALES (STORAGE_BACKEND=local)
+# =========================
+
+@app.route("/files/<path:key>")
+def serve_file(key):
+    if not isinstance(storage, LocalStorage):
+        abort(404)
+    try:
+        path = storage.path_for(key)
+    except ValueError:
+        abort(404)
+    if not os.path.isfile(path):
+        abort(404)
+
+    mimetype = mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+    if STORAGE_ACCEL_REDIRECT:
+        # nginx envía el archivo (internal location); Python no toca los bytes
+        response = Response(mimetype=mimetype)
+        response.headers["X-Accel-Redirect"] = f"{STORAGE_ACCEL_REDIRECT.rstrip('/')}/{key}"
+    else:
+        # send_file: streaming por bloques, Range/206, ETag y If-Modified-Since
+        response = send_file(path, mimetype=mimetype, conditional=True, etag=True, max_age=31536000)
+        response.headers["Accept-Ranges"] = "bytes"
+
+    # El contenido de una llave nunca cambia (cada subida tiene la suya)
+    response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+    return response
+
 # =========================
 # BOOTSTRAP ADMINS (ADMIN + COMITÉ TÉCNICO)
 # =========================
 
 def bootstrap_admins():
+    # Cada worker corre esto al arrancar: solo se escribe si algo cambió, y el
+    # pbkdf2 se calcula antes de tocar la sesión para no retener el lock de
+    # escritura (en SQLite los demás workers esperarían "database is locked").
+    existing = {
+        u.email.lower(): u
+        for u in User.query.filter(db.func.lower(User.email).in_(list(ADMIN_EMAILS))).all()
+    }
+    pending = {}
     for email, pwd in ADMIN_USERS.items():
         email_l = email.lower()
-        u = User.query.filter_by(email=email_l).first()
-        hashed = generate_password_hash(pwd, method="pbkdf2:sha256")
+        u = existing.get(email_l)
+        if u and u.unique_password == pwd and u.role == "admin":
+            continue
+        pending[email_l] = (pwd, generate_password_hash(pwd, method="pbkdf2:sha256"))
 
+    if not pending:
+        db.session.rollback()
+        return
+
+    for email_l, (pwd, hashed) in pending.items():
+        u = existing.get(email_l)
         if u:
             u.password_hash = hashed
             u.unique_password = pwd
@@ -1728,23 +3310,37 @@ def bootstrap_admins():
     db.session.commit()
 
 with app.app_context():
-    db.create_all()
-    ensure_sqlite_columns()
+    # Los cambios de esquema se aplican en el despliegue con `python migrations.py`
+    db.create_all(bind_key=None)  # nunca en la réplica
     bootstrap_admins()
 
     inspector = db.inspect(db.engine)
     print("📦 Tablas existentes:", inspector.get_table_names())
 
-if __name__ == "__main__":
-    port = int(os.environ.get("PORT", 10000))
-    app.run(host="0.0.0.0", port=port)
-
 @app.route("/health")
 def health_check():
     """Health check endpoint para monitoring"""
+    resilience = {
+        ("primary" if key is None else key): guard_for(engine).snapshot()
+        for key, engine in db.engines.items()
+        if guard_for(engine)
+    }
     try:
         # Test database connection
         db.session.execute(text("SELECT 1"))
-        return {"status": "healthy", "database": "connected"}, 200
+        return {"status": "healthy", "database": "connected", "resilience": resilience,
+                "query_cache": query_cache.snapshot(),
+                "single_flight": single_flight.snapshot(),
+                "fragment_cache": fragment_cache.snapshot(),
+                "audit_log": audit_buffer.snapshot()}, 200
     except Exception as e:
-        return {"status": "unhealthy", "error": str(e)}, 500
\ No newline at end of file
+        db.session.rollback()
+        return {"status": "unhealthy", "error": str(e), "resilience": resilience,
+                "query_cache": query_cache.snapshot(),
+                "single_flight": single_flight.snapshot(),
+                "fragment_cache": fragment_cache.snapshot(),
+                "audit_log": audit_buffer.snapshot()}, 500
+
+if __name__ == "__main__":
+    port = int(os.environ.get("PORT", 10000))
+    app.run(host="0.0.0.0", port=port)
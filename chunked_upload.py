@@ -0,0 +1,221 @@
+"""
+Subidas reanudables por bloques, con spool en disco local.
+
+Protocolo (ver rutas /uploads/chunked en la app):
+
+    1. init      -> upload_id; se declaran nombre y tamaño total
+    2. append    -> bloque en `offset` con su sha256. Si el offset no coincide
+                    con lo ya recibido se responde el offset actual para que
+                    el cliente continúe desde ahí (p.ej. tras cortarse la red)
+    3. finalize  -> valida tamaño y sha256 del archivo completo y lo marca
+                    como listo; el form de la propuesta solo manda el upload_id
+                    y la app lo pasa al almacenamiento al crear la propuesta
+
+Cada subida son dos archivos en `root`: <id>.part (bytes recibidos) y
+<id>.json (metadatos). El offset es siempre el tamaño real de <id>.part, así
+que sobrevive reinicios y funciona con varios workers en el mismo host.
+Los spools sin actividad por más de `ttl` segundos se borran con gc().
+"""
+import fcntl
+import hashlib
+import json
+import os
+import re
+import secrets
+import tempfile
+import time
+
+UPLOAD_ID_RE = re.compile(r"^[A-Za-z0-9_-]{22}$")
+HASH_CHUNK = 1024 * 1024
+
+
+class ChunkedUploadError(Exception):
+    status = 400
+
+
+class UploadNotFound(ChunkedUploadError):
+    status = 404
+
+
+class OffsetMismatch(ChunkedUploadError):
+    status = 409
+
+    def __init__(self, offset):
+        super().__init__(f"offset esperado: {offset}")
+        self.offset = offset
+
+
+class ChecksumMismatch(ChunkedUploadError):
+    status = 422
+
+
+class ChunkedUploadSpool:
+    def __init__(self, root, ttl=24 * 3600, gc_interval=600):
+        self.root = os.path.abspath(root)
+        self.ttl = ttl
+        self.gc_interval = gc_interval
+        self._last_gc = 0.0
+        os.makedirs(self.root, exist_ok=True)
+
+    # ---- archivos ----
+
+    def _paths(self, upload_id):
+        if not UPLOAD_ID_RE.match(upload_id or ""):
+            raise UploadNotFound("upload_id inválido")
+        base = os.path.join(self.root, upload_id)
+        return base + ".json", base + ".part"
+
+    def _read_meta(self, upload_id):
+        meta_path, _ = self._paths(upload_id)
+        try:
+            with open(meta_path, encoding="utf-8") as fh:
+                return json.load(fh)
+        except (FileNotFoundError, ValueError):
+            raise UploadNotFound("la subida no existe o expiró")
+
+    def _write_meta(self, meta):
+        meta_path, _ = self._paths(meta["id"])
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, prefix=".meta-")
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            json.dump(meta, fh)
+        os.replace(tmp_path, meta_path)
+
+    def _owned(self, upload_id, owner):
+        meta = self._read_meta(upload_id)
+        if meta["owner"] != owner:
+            # Misma respuesta que si no existiera: no se revela el id ajeno
+            raise UploadNotFound("la subida no existe o expiró")
+        return meta
+
+    # ---- protocolo ----
+
+    def create(self, owner, kind, filename, size):
+        self.maybe_gc()
+        upload_id = secrets.token_urlsafe(16)
+        meta = {
+            "id": upload_id,
+            "owner": owner,
+            "kind": kind,
+            "filename": filename,
+            "size": size,
+            "created_at": time.time(),
+            "assembled": False,
+        }
+        _, part_path = self._paths(upload_id)
+        open(part_path, "xb").close()
+        self._write_meta(meta)
+        return meta
+
+    def status(self, upload_id, owner):
+        meta = self._owned(upload_id, owner)
+        _, part_path = self._paths(upload_id)
+        try:
+            meta["offset"] = os.path.getsize(part_path)
+        except FileNotFoundError:
+            raise UploadNotFound("la subida no existe o expiró")
+        return meta
+
+    def append(self, upload_id, owner, offset, data, checksum):
+        """Agrega `data` en `offset`; regresa el nuevo offset."""
+        meta = self._owned(upload_id, owner)
+        if meta["assembled"]:
+            raise ChunkedUploadError("la subida ya fue finalizada")
+        if hashlib.sha256(data).hexdigest() != (checksum or "").lower():
+            raise ChecksumMismatch("el checksum del bloque no coincide")
+        if offset + len(data) > meta["size"]:
+            raise ChunkedUploadError("el bloque excede el tamaño declarado")
+
+        meta_path, part_path = self._paths(upload_id)
+        try:
+            fh = open(part_path, "r+b")
+        except FileNotFoundError:
+            raise UploadNotFound("la subida no existe o expiró")
+        with fh:
+            # Dos workers pueden recibir reintentos del mismo bloque
+            fcntl.flock(fh, fcntl.LOCK_EX)
+            current = os.fstat(fh.fileno()).st_size
+            if offset < current and offset + len(data) <= current:
+                # Reintento de un bloque ya guardado (se perdió la respuesta)
+                return current
+            if offset != current:
+                raise OffsetMismatch(current)
+            fh.seek(current)
+            fh.write(data)
+            fh.flush()
+            new_offset = current + len(data)
+        os.utime(meta_path)
+        return new_offset
+
+    def assemble(self, upload_id, owner, checksum):
+        """Valida tamaño y sha256 del archivo completo y lo marca como listo."""
+        meta = self.status(upload_id, owner)
+        if meta["assembled"]:
+            if meta["sha256"] != (checksum or "").lower():
+                raise ChecksumMismatch("el checksum del archivo no coincide")
+            return meta
+        if meta["offset"] != meta["size"]:
+            raise OffsetMismatch(meta["offset"])
+
+        _, part_path = self._paths(upload_id)
+        digest = hashlib.sha256()
+        with open(part_path, "rb") as fh:
+            for chunk in iter(lambda: fh.read(HASH_CHUNK), b""):
+                digest.update(chunk)
+        if digest.hexdigest() != (checksum or "").lower():
+            raise ChecksumMismatch("el checksum del archivo no coincide")
+
+        meta.pop("offset")
+        meta["assembled"] = True
+        meta["sha256"] = digest.hexdigest()
+        self._write_meta(meta)
+        return meta
+
+    def assembled(self, upload_id, owner):
+        """(meta, ruta del archivo) de una subida finalizada, o None."""
+        try:
+            meta = self._owned(upload_id, owner)
+        except UploadNotFound:
+            return None
+        if not meta["assembled"]:
+            return None
+        _, part_path = self._paths(upload_id)
+        if not os.path.exists(part_path):
+            return None
+        return meta, part_path
+
+    def discard(self, upload_id):
+        for path in self._paths(upload_id):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    # ---- limpieza ----
+
+    def gc(self, now=None):
+        """Borra spools sin actividad por más de `ttl`; regresa cuántos archivos."""
+        now = now or time.time()
+        removed = 0
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            stem, ext = os.path.splitext(name)
+            stale_tmp = name.startswith(".meta-")
+            if not stale_tmp and ext not in (".json", ".part"):
+                continue
+            try:
+                if now - os.path.getmtime(path) <= self.ttl:
+                    continue
+                if ext == ".part" and os.path.exists(os.path.join(self.root, stem + ".json")):
+                    # El .part cuenta como activo mientras su .json lo esté
+                    if now - os.path.getmtime(os.path.join(self.root, stem + ".json")) <= self.ttl:
+                        continue
+                os.remove(path)
+                removed += 1
+            except FileNotFoundError:
+                continue
+        self._last_gc = now
+        return removed
+
+    def maybe_gc(self):
+        if time.time() - self._last_gc >= self.gc_interval:
+            self.gc()
@@ -1,21 +1,58 @@
+"""
+Limpia rutas legacy "/uploads/..." (archivos locales de la versión anterior).
+
+Procesa por bloques de llave primaria con un commit por bloque, así que no
+bloquea toda la tabla y se puede reanudar:
+
+    python cleanup_legacy_columns.py --dry-run
+    python cleanup_legacy_columns.py --chunk-size 500
+    python cleanup_legacy_columns.py --only proposals --start-after 120000
+"""
+import argparse
 import os
-from SQLAlchemy import create_engine, text
 
-engine = create_engine(os.environ["DATABASE_URL"])
+from batch_update import batched_update, count_matching
+from db_engine import create_engine_for
+
+CLEANUPS = {
+    "profiles": ("cv_url = NULL", "cv_url LIKE '/uploads/%'"),
+    "proposals": ("supporting_doc_url = NULL", "supporting_doc_url LIKE '/uploads/%'"),
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Limpieza de URLs legacy /uploads/")
+    parser.add_argument("--database-url", default=os.environ.get("DATABASE_URL"))
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--dry-run", action="store_true", help="solo cuenta las filas afectadas")
+    parser.add_argument("--only", choices=sorted(CLEANUPS), help="procesa una sola tabla")
+    parser.add_argument("--start-after", type=int, help="reanuda después de este id")
+    args = parser.parse_args(argv)
+
+    if not args.database_url:
+        parser.error("define DATABASE_URL o usa --database-url")
+
+    engine = create_engine_for(args.database_url)
+    tables = [args.only] if args.only else list(CLEANUPS)
 
-with engine.begin() as conn:
     print("🧹 Limpiando valores legacy...")
+    for table in tables:
+        set_clause, where_clause = CLEANUPS[table]
+
+        if args.dry_run:
+            n = count_matching(engine, table, where_clause, start_after=args.start_after)
+            print(f"🔎 {table}: {n} filas por limpiar")
+            continue
+
+        n = batched_update(
+            engine, table, set_clause, where_clause,
+            chunk_size=args.chunk_size,
+            start_after=args.start_after,
+        )
+        print(f"✅ {table}: {n} filas limpiadas")
 
-    conn.execute(text("""
-        UPDATE profile
-        SET cv_url = NULL
-        WHERE cv_url LIKE '/uploads/%'
-    """))
+    print("✅ Limpieza completada")
 
-    conn.execute(text("""
-        UPDATE proposal
-        SET supporting_doc_url = NULL
-        WHERE supporting_doc_url LIKE '/uploads/%'
-    """))
 
-    print("✅ Limpieza completada")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Opciones de engine según el dialecto de DATABASE_URL.
+
+- PostgreSQL (psycopg): QueuePool con pre-ping/reciclado y keepalives TCP.
+- SQLite: sin connect_args de psycopg; cada conexión nueva activa WAL
+  (lectores no bloquean al escritor), synchronous=NORMAL (seguro con WAL),
+  busy_timeout (esperar el lock en vez de fallar con "database is locked") y
+  mmap_size para lecturas. SQLITE_TUNING=0 lo desactiva (p.ej. en discos de
+  red, donde WAL no funciona).
+
+La usan la app (Flask-SQLAlchemy), migrations.py y los benchmarks.
+"""
+import os
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+
+PG_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+PG_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+
+SQLITE_TUNING = os.getenv("SQLITE_TUNING", "1") != "0"
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+
+
+def is_sqlite(url):
+    return make_url(url).get_backend_name() == "sqlite"
+
+
+def engine_options(url):
+    """kwargs para create_engine / SQLALCHEMY_ENGINE_OPTIONS."""
+    url = make_url(url)
+    backend = url.get_backend_name()
+
+    if backend == "sqlite":
+        if url.database in (None, "", ":memory:"):
+            # En memoria: SQLAlchemy usa SingletonThreadPool, no hay nada que ajustar
+            return {}
+        return {
+            "pool_pre_ping": False,  # archivo local: no hay conexiones "muertas"
+            "connect_args": {
+                # Timeout del driver (segundos), además del busy_timeout de abajo
+                "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000,
+                # Las conexiones del pool se usan desde distintos hilos (nunca a la vez)
+                "check_same_thread": False,
+            },
+        }
+
+    options = {
+        "pool_pre_ping": True,  # Verifica conexiones antes de usarlas
+        "pool_recycle": 300,    # Recicla conexiones después de 5 minutos
+        "pool_size": PG_POOL_SIZE,
+        "max_overflow": PG_MAX_OVERFLOW,
+    }
+    if backend == "postgresql":
+        options["connect_args"] = {
+            "connect_timeout": 10,
+            "keepalives": 1,
+            "keepalives_idle": 30,
+            "keepalives_interval": 10,
+            "keepalives_count": 5,
+        }
+    return options
+
+
+def _sqlite_on_connect(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"PRAGMA busy_timeout = {SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.execute("PRAGMA journal_mode = WAL")
+        cursor.execute("PRAGMA synchronous = NORMAL")
+        cursor.execute(f"PRAGMA mmap_size = {SQLITE_MMAP_SIZE}")
+    finally:
+        cursor.close()
+
+
+def configure_engine(engine):
+    """Instala los PRAGMA de SQLite en cada conexión nueva del engine."""
+    if engine.dialect.name == "sqlite" and SQLITE_TUNING and engine.url.database not in (None, "", ":memory:"):
+        if not event.contains(engine, "connect", _sqlite_on_connect):
+            event.listen(engine, "connect", _sqlite_on_connect)
+    return engine
+
+
+def create_engine_for(url, **kwargs):
+    return configure_engine(create_engine(url, **{**engine_options(url), **kwargs}))
@@ -0,0 +1,187 @@
+"""
+Resiliencia de conexiones a la BD, instalada en cada engine (no por ruta).
+
+- Reintentos al CONECTAR con backoff exponencial y jitter completo: una
+  conexión nueva (o la que reemplaza a una caída detectada por pre-ping) se
+  reintenta hasta DB_RETRY_ATTEMPTS veces, esperando random(0, base * 2^n)
+  con tope DB_RETRY_MAX_DELAY. Solo se reintenta la conexión, nunca una
+  consulta ya enviada: así no se repiten escrituras.
+- Circuit breaker por engine: con DB_BREAKER_THRESHOLD fallas (conexiones
+  que no se logran o desconexiones a media consulta) dentro de
+  DB_BREAKER_RESET_SECONDS se abre y las conexiones fallan al instante
+  durante DB_BREAKER_RESET_SECONDS; luego deja pasar un intento (medio
+  abierto) y se cierra si funciona.
+- Métricas (intentos, reintentos, fallas, aperturas, rechazos) por engine,
+  expuestas en /health.
+
+Los errores salen como errores del driver (sqlalchemy.exc.OperationalError),
+igual que una caída real, así que el manejo existente sigue funcionando.
+El estado es por proceso (cada worker tiene su breaker).
+"""
+import os
+import random
+import threading
+import time
+import weakref
+from collections import deque
+
+from sqlalchemy import event
+
+DB_RETRY_ATTEMPTS = int(os.getenv("DB_RETRY_ATTEMPTS", "4"))
+DB_RETRY_BASE_DELAY = float(os.getenv("DB_RETRY_BASE_DELAY", "0.1"))
+DB_RETRY_MAX_DELAY = float(os.getenv("DB_RETRY_MAX_DELAY", "2.0"))
+DB_BREAKER_THRESHOLD = int(os.getenv("DB_BREAKER_THRESHOLD", "5"))
+DB_BREAKER_RESET_SECONDS = float(os.getenv("DB_BREAKER_RESET_SECONDS", "30"))
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+CIRCUIT_OPEN_MESSAGE = "circuit breaker abierto"
+
+_guards = weakref.WeakKeyDictionary()
+
+
+class CircuitBreaker:
+    def __init__(self, threshold=DB_BREAKER_THRESHOLD, reset_seconds=DB_BREAKER_RESET_SECONDS, clock=time.monotonic):
+        self.threshold = threshold
+        self.reset_seconds = reset_seconds
+        self.clock = clock
+        self.state = CLOSED
+        self.failures = deque()  # momentos de las fallas recientes
+        self.opened_at = 0.0
+        self._trial_started = None
+        self._lock = threading.Lock()
+
+    def retry_after(self):
+        return max(0.0, self.opened_at + self.reset_seconds - self.clock())
+
+    def allow(self):
+        """True si se puede intentar; en medio abierto pasa un solo intento a la vez."""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            now = self.clock()
+            if self.state == OPEN and self.retry_after() > 0:
+                return False
+            # Un intento de prueba que nunca reportó resultado no bloquea para siempre
+            if self._trial_started is not None and now - self._trial_started < self.reset_seconds:
+                return False
+            self.state = HALF_OPEN
+            self._trial_started = now
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.state = CLOSED
+            self.failures.clear()
+            self._trial_started = None
+
+    def record_failure(self):
+        """Regresa True si esta falla abrió el breaker."""
+        with self._lock:
+            now = self.clock()
+            self.failures.append(now)
+            while self.failures and now - self.failures[0] > self.reset_seconds:
+                self.failures.popleft()
+            self._trial_started = None
+            if self.state == HALF_OPEN or (self.state == CLOSED and len(self.failures) >= self.threshold):
+                self.state = OPEN
+                self.opened_at = now
+                return True
+            return False
+
+
+def backoff_delay(attempt, base=DB_RETRY_BASE_DELAY, cap=DB_RETRY_MAX_DELAY, rng=random.random):
+    """Jitter completo: espera aleatoria entre 0 y min(cap, base * 2^attempt)."""
+    return rng() * min(cap, base * (2 ** attempt))
+
+
+class ConnectionGuard:
+    """Reintentos + breaker + métricas de un engine."""
+
+    def __init__(self, name, attempts=DB_RETRY_ATTEMPTS, breaker=None, sleep=time.sleep):
+        self.name = name
+        self.attempts = max(1, attempts)
+        self.breaker = breaker or CircuitBreaker()
+        self.sleep = sleep
+        self.metrics = {
+            "connects": 0,          # conexiones nuevas logradas
+            "retries": 0,           # reintentos de conexión
+            "connect_failures": 0,  # conexiones que agotaron los reintentos
+            "disconnects": 0,       # conexiones caídas a media consulta
+            "breaker_opened": 0,
+            "short_circuited": 0,   # conexiones rechazadas con el breaker abierto
+        }
+        self._lock = threading.Lock()
+
+    def _count(self, key):
+        with self._lock:
+            self.metrics[key] += 1
+
+    def _failure(self):
+        if self.breaker.record_failure():
+            self._count("breaker_opened")
+            print(f"❌ BD '{self.name}' no disponible: circuit breaker abierto por {self.breaker.reset_seconds:.0f}s")
+
+    def connect(self, connect_fn, dbapi):
+        if not self.breaker.allow():
+            self._count("short_circuited")
+            raise dbapi.OperationalError(
+                f"{CIRCUIT_OPEN_MESSAGE} para la BD '{self.name}' "
+                f"(reintenta en {self.breaker.retry_after():.0f}s)"
+            )
+
+        for attempt in range(self.attempts):
+            try:
+                conn = connect_fn()
+            except dbapi.Error as e:
+                if attempt + 1 >= self.attempts:
+                    self._count("connect_failures")
+                    self._failure()
+                    raise
+                self._count("retries")
+                delay = backoff_delay(attempt)
+                print(f"⚠️ BD '{self.name}': error al conectar (intento {attempt + 1}/{self.attempts}), "
+                      f"reintento en {delay * 1000:.0f} ms: {e}")
+                self.sleep(delay)
+            else:
+                self._count("connects")
+                self.breaker.record_success()
+                return conn
+
+    def on_error(self, context):
+        # Sin conexión (falló el connect) ya se contó en connect()
+        if context.is_disconnect and context.connection is not None:
+            self._count("disconnects")
+            self._failure()
+
+    def snapshot(self):
+        with self._lock:
+            data = dict(self.metrics)
+        data["state"] = self.breaker.state
+        data["recent_failures"] = len(self.breaker.failures)
+        if self.breaker.state == OPEN:
+            data["retry_after"] = round(self.breaker.retry_after(), 1)
+        return data
+
+
+def install_resilience(engine, name, attempts=DB_RETRY_ATTEMPTS):
+    """Instala reintentos/breaker en el engine (una vez) y regresa su guard."""
+    guard = _guards.get(engine)
+    if guard is not None:
+        return guard
+    guard = ConnectionGuard(name, attempts=attempts)
+
+    @event.listens_for(engine, "do_connect")
+    def _connect(dialect, conn_rec, cargs, cparams):
+        return guard.connect(lambda: dialect.connect(*cargs, **cparams), dialect.loaded_dbapi)
+
+    event.listen(engine, "handle_error", guard.on_error)
+    _guards[engine] = guard
+    return guard
+
+
+def guard_for(engine):
+    return _guards.get(engine)
+
+
+def is_circuit_open_error(error):
+    return CIRCUIT_OPEN_MESSAGE in str(error)
@@ -0,0 +1,262 @@
+"""
+Migraciones versionadas del esquema.
+
+Se ejecutan UNA vez por despliegue (no en cada worker de gunicorn):
+
+    python migrations.py            # aplica las migraciones pendientes
+    python migrations.py --status   # muestra versión actual y pendientes
+
+La versión aplicada se guarda en la tabla `schema_version`. Cada migración
+debe ser idempotente (revisa el esquema antes de alterarlo) para poder
+correr sobre BDs creadas antes de existir este control.
+"""
+import os
+import sys
+from datetime import datetime
+
+from sqlalchemy import inspect, text
+
+from batch_update import batched_update
+from db_engine import create_engine_for
+
+# =========================
+# CONFIG
+# =========================
+
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+
+# Mismo default que la app: Flask-SQLAlchemy resuelve "sqlite:///c4p_cmc.db" dentro de instance/
+DEFAULT_DATABASE_URL = "sqlite:///" + os.path.join(BASE_DIR, "instance", "c4p_cmc.db")
+
+# Llave del advisory lock (Postgres) para que dos despliegues no migren a la vez
+PG_LOCK_KEY = 20260101
+
+CHUNK_SIZE = int(os.getenv("MIGRATION_CHUNK_SIZE", "1000"))
+
+
+def get_engine(url=None):
+    return create_engine_for(url or os.getenv("DATABASE_URL", DEFAULT_DATABASE_URL))
+
+
+def column_names(conn, table):
+    insp = inspect(conn)
+    if not insp.has_table(table):
+        return None
+    return {c["name"] for c in insp.get_columns(table)}
+
+# =========================
+# MIGRACIONES
+# =========================
+# Cada función recibe el engine. Los cambios de esquema van en su propia
+# transacción; los backfills usan batched_update (commit por bloque).
+
+def m001_proposals_received_at(engine):
+    with engine.begin() as conn:
+        cols = column_names(conn, "proposals")
+        if cols is None or "received_at" in cols:
+            return
+        conn.execute(text("ALTER TABLE proposals ADD COLUMN received_at TIMESTAMP"))
+
+    batched_update(
+        engine, "proposals",
+        set_clause="received_at = CURRENT_TIMESTAMP",
+        where_clause="received_at IS NULL",
+        chunk_size=CHUNK_SIZE,
+    )
+
+
+def m002_clear_legacy_upload_urls(engine):
+    # Rutas locales "/uploads/..." de la versión anterior (ya no existen en disco)
+    with engine.connect() as conn:
+        has_profiles = column_names(conn, "profiles") is not None
+        has_proposals = column_names(conn, "proposals") is not None
+
+    if has_profiles:
+        batched_update(
+            engine, "profiles",
+            set_clause="cv_url = NULL",
+            where_clause="cv_url LIKE '/uploads/%'",
+            chunk_size=CHUNK_SIZE,
+        )
+    if has_proposals:
+        batched_update(
+            engine, "proposals",
+            set_clause="supporting_doc_url = NULL",
+            where_clause="supporting_doc_url LIKE '/uploads/%'",
+            chunk_size=CHUNK_SIZE,
+        )
+
+
+def m003_profile_photo_derivatives(engine):
+    with engine.begin() as conn:
+        cols = column_names(conn, "profiles")
+        if cols is None:
+            return
+        for col in ("photo_avatar_url", "photo_card_url"):
+            if col not in cols:
+                conn.execute(text(f"ALTER TABLE profiles ADD COLUMN {col} VARCHAR(255)"))
+
+
+def m004_dashboard_counters(engine):
+    # Tablas de resumen del tablero + llenado inicial desde proposals
+    from proposal_stats import metadata as stats_metadata
+    from proposal_stats import reconcile
+    with engine.connect() as conn:
+        has_proposals = column_names(conn, "proposals") is not None
+    if not has_proposals:
+        # BD nueva: la app crea proposals al arrancar y los contadores empiezan en cero
+        stats_metadata.create_all(engine)
+        return
+    reconcile(engine)
+
+
+def m005_users_profile_version(engine):
+    # Llave de la cache de fragmentos de las vistas de admin del candidato
+    with engine.begin() as conn:
+        cols = column_names(conn, "users")
+        if cols is None or "profile_version" in cols:
+            return
+        conn.execute(text("ALTER TABLE users ADD COLUMN profile_version INTEGER NOT NULL DEFAULT 0"))
+
+
+def m006_notification_outbox(engine):
+    # Outbox de avisos de cambio de estatus (notifications.py)
+    from notifications import metadata as outbox_metadata
+    outbox_metadata.create_all(engine)
+
+
+def m007_audit_log(engine):
+    # Bitácora de auditoría + triggers append-only (audit_log.py)
+    from audit_log import metadata as audit_metadata
+    audit_metadata.create_all(engine)
+
+
+def m008_document_texts(engine):
+    # Texto extraído de los documentos + índice de búsqueda (proposal_search.py);
+    # los documentos existentes se encolan con `python proposal_search.py --backfill`
+    from proposal_search import metadata as search_metadata
+    search_metadata.create_all(engine)
+
+
+def m009_near_duplicates(engine):
+    # Firmas MinHash y pares casi duplicados (near_duplicates.py); para los
+    # documentos ya extraídos: `python near_duplicates.py --rebuild`
+    from near_duplicates import metadata as duplicates_metadata
+    duplicates_metadata.create_all(engine)
+
+
+def m010_users_cache_token(engine):
+    # Parte de la llave de la cache de fragmentos que no se reutiliza (SQLite
+    # reusa el id más alto si se borra el último usuario; profile_version vuelve a 0)
+    with engine.begin() as conn:
+        cols = column_names(conn, "users")
+        if cols is None or "cache_token" in cols:
+            return
+        conn.execute(text("ALTER TABLE users ADD COLUMN cache_token VARCHAR(16)"))
+        random_hex = "lower(hex(randomblob(8)))" if conn.dialect.name == "sqlite" else "substr(md5(random()::text || id::text), 1, 16)"
+
+    batched_update(
+        engine, "users",
+        set_clause=f"cache_token = {random_hex}",
+        where_clause="cache_token IS NULL",
+        chunk_size=CHUNK_SIZE,
+    )
+
+
+def m011_data_versions(engine):
+    # Versión de datos de la cache de listados de admin (query_cache.py)
+    from query_cache import metadata as cache_metadata
+    cache_metadata.create_all(engine)
+
+
+MIGRATIONS = [
+    (1, "proposals.received_at", m001_proposals_received_at),
+    (2, "limpiar URLs legacy /uploads/", m002_clear_legacy_upload_urls),
+    (3, "profiles: derivados de foto", m003_profile_photo_derivatives),
+    (4, "contadores del tablero", m004_dashboard_counters),
+    (5, "users.profile_version", m005_users_profile_version),
+    (6, "notification_outbox", m006_notification_outbox),
+    (7, "audit_log", m007_audit_log),
+    (8, "document_texts + índice de búsqueda", m008_document_texts),
+    (9, "firmas y pares casi duplicados", m009_near_duplicates),
+    (10, "users.cache_token", m010_users_cache_token),
+    (11, "data_versions", m011_data_versions),
+]
+
+# =========================
+# RUNNER
+# =========================
+
+def ensure_version_table(engine):
+    with engine.begin() as conn:
+        conn.execute(text("""
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INTEGER PRIMARY KEY,
+                description VARCHAR(200) NOT NULL,
+                applied_at TIMESTAMP NOT NULL
+            )
+        """))
+
+
+def current_version(engine):
+    with engine.connect() as conn:
+        return conn.execute(text("SELECT COALESCE(MAX(version), 0) FROM schema_version")).scalar()
+
+
+def pending_migrations(engine):
+    version = current_version(engine)
+    return [m for m in MIGRATIONS if m[0] > version]
+
+
+def migrate(engine):
+    ensure_version_table(engine)
+
+    lock_conn = None
+    if engine.dialect.name == "postgresql":
+        lock_conn = engine.connect()
+        lock_conn.execute(text("SELECT pg_advisory_lock(:k)"), {"k": PG_LOCK_KEY})
+        lock_conn.commit()
+
+    try:
+        pending = pending_migrations(engine)
+        if not pending:
+            print(f"✅ Esquema al día (versión {current_version(engine)}).")
+            return 0
+
+        for version, description, fn in pending:
+            print(f"🔁 Aplicando migración {version}: {description}")
+            fn(engine)
+            with engine.begin() as conn:
+                conn.execute(
+                    text("""
+                        INSERT INTO schema_version (version, description, applied_at)
+                        VALUES (:v, :d, :t)
+                    """),
+                    {"v": version, "d": description, "t": datetime.utcnow()}
+                )
+            print(f"✅ Migración {version} aplicada")
+
+        return len(pending)
+    finally:
+        if lock_conn is not None:
+            lock_conn.execute(text("SELECT pg_advisory_unlock(:k)"), {"k": PG_LOCK_KEY})
+            lock_conn.commit()
+            lock_conn.close()
+
+
+def print_status(engine):
+    ensure_version_table(engine)
+    print(f"📦 Versión actual: {current_version(engine)}")
+    for version, description, _ in pending_migrations(engine):
+        print(f"   pendiente {version}: {description}")
+
+# =========================
+# RUN
+# =========================
+
+if __name__ == "__main__":
+    engine = get_engine()
+    if "--status" in sys.argv[1:]:
+        print_status(engine)
+    else:
+        migrate(engine)
@@ -0,0 +1,279 @@
+"""
+Detección de propuestas casi duplicadas (MinHash + LSH) sobre el texto
+extraído de los documentos (proposal_search.py).
+
+- Firma: el texto se normaliza (minúsculas, sin acentos ni puntuación), se
+  parte en shingles de SHINGLE_SIZE palabras y se resume en NUM_PERM
+  mínimos (MinHash). La fracción de mínimos iguales entre dos firmas estima
+  la similitud de Jaccard entre los documentos. Se calcula en el pool de
+  procesos del extractor, junto con la extracción.
+- Índice: LSH con LSH_BANDS bandas de NUM_PERM / LSH_BANDS filas, en memoria
+  del extractor; se carga de `document_signatures` y se pone al día de forma
+  incremental antes de cada pasada. Un documento nuevo se compara solo con
+  los que comparten alguna banda y se confirma con la firma completa
+  (similitud >= NEAR_DUP_THRESHOLD).
+- Los pares se guardan en `duplicate_flags` en la misma transacción que el
+  texto extraído (segundos después del envío) y se ven en /admin/duplicates
+  y como aviso en /admin/proposals.
+
+Reconstrucción completa (p.ej. al cambiar parámetros):
+
+    python near_duplicates.py --rebuild
+    python near_duplicates.py --status
+"""
+import argparse
+import hashlib
+import os
+import random
+import re
+import sys
+import unicodedata
+from array import array
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Float, Index, Integer, LargeBinary, MetaData, Table, UniqueConstraint, func, select
+
+from query_cache import bump_version as bump_data_version
+
+NUM_PERM = 128
+LSH_BANDS = 32                  # 32 bandas x 4 filas: umbral de candidatos ~0.42
+SHINGLE_SIZE = 5
+MIN_SHINGLES = 20               # textos más cortos no se comparan (títulos, documentos vacíos)
+NEAR_DUP_THRESHOLD = float(os.getenv("NEAR_DUP_THRESHOLD", "0.5"))
+
+MERSENNE_PRIME = (1 << 61) - 1
+
+# Permutaciones fijas (mismas en todos los procesos y despliegues: las firmas se guardan)
+_perm_rng = random.Random(0xC4F)
+PERMUTATIONS = [
+    (_perm_rng.randrange(1, MERSENNE_PRIME), _perm_rng.randrange(0, MERSENNE_PRIME))
+    for _ in range(NUM_PERM)
+]
+
+# doc_id / match_doc_id son document_texts.id; purge_orphans borra también aquí
+metadata = MetaData()
+
+document_signatures = Table(
+    "document_signatures", metadata,
+    Column("doc_id", Integer, primary_key=True),
+    Column("signature", LargeBinary, nullable=False),   # NUM_PERM enteros de 64 bits
+    Column("indexed_at", DateTime, nullable=False),
+)
+
+duplicate_flags = Table(
+    "duplicate_flags", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("doc_id", Integer, nullable=False),         # el que se indexó después
+    Column("match_doc_id", Integer, nullable=False),   # el que ya estaba en el índice
+    Column("similarity", Float, nullable=False),
+    Column("detected_at", DateTime, nullable=False),
+    UniqueConstraint("doc_id", "match_doc_id", name="uq_duplicate_flags_pair"),
+    Index("ix_duplicate_flags_match", "match_doc_id"),
+)
+
+# =========================
+# FIRMAS
+# =========================
+
+def normalize_words(text):
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return re.findall(r"[a-z0-9]+", text)
+
+
+def shingles(text, size=SHINGLE_SIZE):
+    words = normalize_words(text)
+    return {
+        int.from_bytes(hashlib.blake2b(" ".join(words[i:i + size]).encode(), digest_size=8).digest(), "little")
+        for i in range(len(words) - size + 1)
+    }
+
+
+def minhash(text):
+    """Firma MinHash (tupla de NUM_PERM enteros) o None si el texto es muy corto."""
+    values = shingles(text or "")
+    if len(values) < MIN_SHINGLES:
+        return None
+    p = MERSENNE_PRIME
+    return tuple(min((a * x + b) % p for x in values) for a, b in PERMUTATIONS)
+
+
+def pack(signature):
+    return array("Q", signature).tobytes()
+
+
+def unpack(data):
+    values = array("Q")
+    values.frombytes(data)
+    return tuple(values)
+
+
+def similarity(a, b):
+    """Jaccard estimada: fracción de mínimos iguales."""
+    return sum(1 for x, y in zip(a, b) if x == y) / len(a)
+
+# =========================
+# ÍNDICE LSH (en memoria)
+# =========================
+
+class LshIndex:
+    def __init__(self, bands=LSH_BANDS, num_perm=NUM_PERM):
+        assert num_perm % bands == 0
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.buckets = [defaultdict(list) for _ in range(bands)]
+        self.signatures = {}
+
+    def _keys(self, signature):
+        r = self.rows
+        for band in range(self.bands):
+            yield band, hash(signature[band * r:(band + 1) * r])
+
+    def add(self, doc_id, signature):
+        self.signatures[doc_id] = signature
+        for band, key in self._keys(signature):
+            self.buckets[band][key].append(doc_id)
+
+    def candidates(self, signature):
+        found = set()
+        for band, key in self._keys(signature):
+            found.update(self.buckets[band].get(key, ()))
+        return found
+
+    def find(self, signature, threshold=NEAR_DUP_THRESHOLD, exclude=None):
+        """[(doc_id, similitud)] de mayor a menor similitud."""
+        matches = []
+        for doc_id in self.candidates(signature):
+            if doc_id == exclude:
+                continue
+            sim = similarity(signature, self.signatures[doc_id])
+            if sim >= threshold:
+                matches.append((doc_id, sim))
+        return sorted(matches, key=lambda m: (-m[1], m[0]))
+
+    def __len__(self):
+        return len(self.signatures)
+
+
+def _insert_signature(conn, doc_id, data, now):
+    """INSERT sin error si el doc_id ya tiene firma; regresa si se insertó."""
+    row = {"doc_id": doc_id, "signature": data, "indexed_at": now}
+    dialect = conn.dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        result = conn.execute(insert(document_signatures).values(**row).on_conflict_do_nothing(index_elements=["doc_id"]))
+        return result.rowcount == 1
+    exists = conn.execute(select(document_signatures.c.doc_id).where(document_signatures.c.doc_id == doc_id)).first()
+    if exists:
+        return False
+    conn.execute(document_signatures.insert().values(**row))
+    return True
+
+
+class DuplicateDetector:
+    """Índice del proceso extractor + escritura de firmas y pares en la transacción del llamador."""
+
+    def __init__(self, threshold=NEAR_DUP_THRESHOLD):
+        self.threshold = threshold
+        self.index = LshIndex()
+
+    def refresh(self, conn, chunk=500):
+        """Carga las firmas que faltan en el índice (de este u otro extractor).
+
+        Por ids y no por "mayor que el último": otro extractor puede hacer
+        commit después de un documento con id más bajo que los ya cargados.
+        """
+        stored = conn.execute(select(document_signatures.c.doc_id)).scalars().all()
+        missing = sorted(set(stored) - self.index.signatures.keys())
+        for start in range(0, len(missing), chunk):
+            rows = conn.execute(
+                select(document_signatures.c.doc_id, document_signatures.c.signature)
+                .where(document_signatures.c.doc_id.in_(missing[start:start + chunk]))
+                .order_by(document_signatures.c.doc_id)
+            ).all()
+            for doc_id, data in rows:
+                self.index.add(doc_id, unpack(data))
+
+    def check_and_add(self, conn, doc_id, signature, now=None):
+        """Guarda la firma, registra los pares con documentos anteriores y regresa [(doc_id, similitud)]."""
+        if doc_id in self.index.signatures:
+            return []  # ya indexado (renta vencida y extraído otra vez)
+        now = now or datetime.utcnow()
+        matches = self.index.find(signature, self.threshold, exclude=doc_id)
+        if not _insert_signature(conn, doc_id, pack(signature), now):
+            # Otro extractor lo indexó (y registró sus pares) después de nuestro refresh
+            self.index.add(doc_id, signature)
+            return []
+        if matches:
+            conn.execute(duplicate_flags.insert(), [
+                {"doc_id": doc_id, "match_doc_id": m, "similarity": round(sim, 4), "detected_at": now}
+                for m, sim in matches
+            ])
+            # El aviso aparece en el listado de admin (cacheado por versión de datos)
+            bump_data_version(conn)
+        self.index.add(doc_id, signature)
+        return matches
+
+# =========================
+# RECONSTRUCCIÓN
+# =========================
+
+def rebuild(engine, pool=None, chunk=200):
+    """Recalcula firmas y pares de todos los documentos extraídos (en orden de id)."""
+    from proposal_search import DONE, document_texts
+
+    detector = DuplicateDetector()
+    flagged = 0
+    with engine.begin() as conn:
+        conn.execute(duplicate_flags.delete())
+        conn.execute(document_signatures.delete())
+        ids = [i for (i,) in conn.execute(
+            select(document_texts.c.id).where(document_texts.c.status == DONE).order_by(document_texts.c.id)
+        )]
+        for start in range(0, len(ids), chunk):
+            batch = conn.execute(
+                select(document_texts.c.id, document_texts.c.content)
+                .where(document_texts.c.id.in_(ids[start:start + chunk]))
+                .order_by(document_texts.c.id)
+            ).all()
+            contents = [content or "" for _, content in batch]
+            signatures = pool.map(minhash, contents, chunksize=8) if pool else map(minhash, contents)
+            for (doc_id, _), signature in zip(batch, signatures):
+                if signature is not None:
+                    flagged += len(detector.check_and_add(conn, doc_id, signature))
+        bump_data_version(conn)
+    return len(detector.index), flagged
+
+
+def main(argv=None):
+    from concurrent.futures import ProcessPoolExecutor
+
+    from migrations import get_engine
+    from proposal_search import EXTRACT_WORKERS
+
+    parser = argparse.ArgumentParser(description="Detección de propuestas casi duplicadas")
+    parser.add_argument("--database-url", default=os.environ.get("DATABASE_URL"))
+    parser.add_argument("--rebuild", action="store_true", help="recalcula firmas y pares")
+    parser.add_argument("--status", action="store_true", help="firmas y pares guardados")
+    args = parser.parse_args(argv)
+
+    engine = get_engine(args.database_url)
+    if args.rebuild:
+        with ProcessPoolExecutor(max_workers=EXTRACT_WORKERS) as pool:
+            indexed, flagged = rebuild(engine, pool)
+        print(f"✅ {indexed} documentos indexados, {flagged} pares casi duplicados")
+        return 0
+
+    with engine.connect() as conn:
+        signatures = conn.execute(select(func.count()).select_from(document_signatures)).scalar()
+        flags = conn.execute(select(func.count()).select_from(duplicate_flags)).scalar()
+    print(f"   firmas: {signatures}\n   pares: {flags}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
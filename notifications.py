@@ -0,0 +1,373 @@
+"""
+Notificaciones al candidato por cambio de estatus (outbox transaccional).
+
+La vista NO manda correo: escribe una fila en `notification_outbox` en la
+MISMA transacción que el cambio de estatus (si el commit falla, no queda
+notificación; si se hace, la notificación no se pierde). Un proceso aparte
+las entrega:
+
+    python notifications.py            # dispatcher continuo (junto a gunicorn)
+    python notifications.py --once     # una pasada y sale
+    python notifications.py --status   # filas por estado
+
+- Lotes por candidato: cada fila se vuelve enviable OUTBOX_BATCH_DELAY
+  segundos después del cambio; al tomar una, se toman también las demás
+  pendientes del mismo candidato y se manda UN correo con todos los cambios
+  (solo el estatus final de cada propuesta).
+- Una conexión SMTP reutilizada para todos los correos de la pasada (y las
+  siguientes mientras haya trabajo); si el servidor la cierra se reconecta.
+- Reintentos con backoff exponencial y jitter (OUTBOX_RETRY_BASE_DELAY,
+  tope OUTBOX_RETRY_MAX_DELAY) hasta OUTBOX_MAX_ATTEMPTS; un rechazo
+  permanente (5xx) o agotar los intentos la deja en `failed`.
+- Las filas tomadas pasan a `sending` y se "rentan" OUTBOX_LEASE_SECONDS:
+  otro dispatcher no las toma mientras dure la renta; si el dispatcher muere
+  a medio envío, al vencer se vuelven a tomar. En Postgres varios
+  dispatchers pueden correr a la vez (FOR UPDATE SKIP LOCKED).
+
+SMTP: SMTP_HOST (sin él no se envía nada), SMTP_PORT, SMTP_USER,
+SMTP_PASSWORD, SMTP_STARTTLS=1, SMTP_FROM.
+"""
+import argparse
+import json
+import os
+import random
+import smtplib
+import sys
+import time
+from collections import OrderedDict, defaultdict
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+
+from sqlalchemy import Column, DateTime, Index, Integer, MetaData, String, Table, Text, bindparam, func, select
+
+OUTBOX_BATCH_DELAY = float(os.getenv("OUTBOX_BATCH_DELAY", "60"))
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "200"))
+OUTBOX_POLL_INTERVAL = float(os.getenv("OUTBOX_POLL_INTERVAL", "5"))
+OUTBOX_LEASE_SECONDS = float(os.getenv("OUTBOX_LEASE_SECONDS", "300"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8"))
+OUTBOX_RETRY_BASE_DELAY = float(os.getenv("OUTBOX_RETRY_BASE_DELAY", "30"))
+OUTBOX_RETRY_MAX_DELAY = float(os.getenv("OUTBOX_RETRY_MAX_DELAY", "3600"))
+
+SMTP_HOST = os.getenv("SMTP_HOST")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
+SMTP_USER = os.getenv("SMTP_USER")
+SMTP_PASSWORD = os.getenv("SMTP_PASSWORD")
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "1") == "1"
+SMTP_FROM = os.getenv("SMTP_FROM", "Comité Técnico CMC <no-reply@noria.mx>")
+SMTP_TIMEOUT = float(os.getenv("SMTP_TIMEOUT", "30"))
+
+# Liga en el correo a "Mis Propuestas" (opcional)
+APP_BASE_URL = os.getenv("APP_BASE_URL", "")
+
+STATUS_CHANGE = "proposal_status"
+
+PENDING, SENDING, SENT, FAILED = "pending", "sending", "sent", "failed"
+
+metadata = MetaData()
+
+outbox = Table(
+    "notification_outbox", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("user_id", Integer, nullable=False),       # sin FK: sobrevive al borrado del usuario
+    Column("recipient", String(100), nullable=False),
+    Column("kind", String(50), nullable=False),
+    Column("payload", Text, nullable=False),            # JSON
+    Column("status", String(20), nullable=False, default=PENDING),
+    Column("attempts", Integer, nullable=False, default=0),
+    Column("available_at", DateTime, nullable=False),   # siguiente intento (sending: fin de la renta)
+    Column("created_at", DateTime, nullable=False),
+    Column("sent_at", DateTime),
+    Column("last_error", String(500)),
+    Index("ix_notification_outbox_due", "status", "available_at"),
+    Index("ix_notification_outbox_user", "user_id", "status"),
+)
+
+# =========================
+# ENCOLAR (en la transacción de la vista)
+# =========================
+
+def enqueue(conn, user_id, recipient, kind, payload, delay=OUTBOX_BATCH_DELAY):
+    """Inserta la notificación con `conn` (la de la sesión); el commit es de quien llama."""
+    now = datetime.utcnow()
+    conn.execute(outbox.insert().values(
+        user_id=user_id,
+        recipient=recipient,
+        kind=kind,
+        payload=json.dumps(payload, ensure_ascii=False),
+        status=PENDING,
+        attempts=0,
+        available_at=now + timedelta(seconds=delay),
+        created_at=now,
+    ))
+
+
+def enqueue_status_change(conn, proposal, recipient, old_status, delay=OUTBOX_BATCH_DELAY):
+    enqueue(conn, proposal.user_id, recipient, STATUS_CHANGE, {
+        "proposal_id": proposal.id,
+        "title": proposal.title,
+        "venue": proposal.venue,
+        "old_status": old_status,
+        "new_status": proposal.status,
+    }, delay=delay)
+
+# =========================
+# SMTP
+# =========================
+
+class SmtpMailer:
+    """Una conexión SMTP que se reutiliza entre envíos (se abre al primer uso)."""
+
+    def __init__(self, host=SMTP_HOST, port=SMTP_PORT, user=SMTP_USER, password=SMTP_PASSWORD,
+                 starttls=SMTP_STARTTLS, timeout=SMTP_TIMEOUT):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+        self.conn = None
+        self.metrics = {"connections": 0, "sent": 0}
+
+    def connect(self):
+        conn = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.starttls:
+                conn.starttls()
+            if self.user:
+                conn.login(self.user, self.password or "")
+        except Exception:
+            conn.close()
+            raise
+        self.conn = conn
+        self.metrics["connections"] += 1
+
+    def send(self, message):
+        if self.conn is None:
+            self.connect()
+        try:
+            self.conn.send_message(message)
+        except smtplib.SMTPServerDisconnected:
+            # El servidor cerró la conexión ociosa: una reconexión y se reintenta
+            self.conn = None
+            self.connect()
+            self.conn.send_message(message)
+        self.metrics["sent"] += 1
+
+    def close(self):
+        if self.conn is None:
+            return
+        try:
+            self.conn.quit()
+        except smtplib.SMTPException:
+            self.conn.close()
+        except OSError:
+            pass
+        self.conn = None
+
+# =========================
+# CORREO
+# =========================
+
+def build_message(recipient, rows, sender=SMTP_FROM):
+    """Un correo con el estatus final de cada propuesta; None si nada cambió en neto."""
+    changes = OrderedDict()
+    for row in sorted(rows, key=lambda r: (r["created_at"], r["id"])):
+        data = json.loads(row["payload"])
+        first = changes.get(data["proposal_id"])
+        changes[data["proposal_id"]] = {**data, "old_status": first["old_status"] if first else data["old_status"]}
+
+    lines = [c for c in changes.values() if c["new_status"] != c["old_status"]]
+    if not lines:
+        return None
+
+    body = ["Hola,", "", "El Comité Técnico del CMC actualizó el estatus de tus propuestas:", ""]
+    for c in lines:
+        body.append(f"- \"{c['title']}\" ({c['venue']}): {c['new_status']}")
+    body.append("")
+    if APP_BASE_URL:
+        body += [f"Puedes consultarlas en {APP_BASE_URL.rstrip('/')}/proposals", ""]
+    body.append("Comité Técnico CMC")
+
+    msg = EmailMessage()
+    msg["From"] = sender
+    msg["To"] = recipient
+    msg["Subject"] = "Actualización de tus propuestas - CMC Call for Papers"
+    msg.set_content("\n".join(body))
+    return msg
+
+# =========================
+# DISPATCHER
+# =========================
+
+def retry_delay(attempts):
+    """Backoff exponencial con jitter (entre la mitad y el total del escalón)."""
+    step = min(OUTBOX_RETRY_MAX_DELAY, OUTBOX_RETRY_BASE_DELAY * (2 ** max(0, attempts - 1)))
+    return step / 2 + random.uniform(0, step / 2)
+
+
+def _begin_claim(conn):
+    # SQLite: lock de escritura desde el SELECT para que dos dispatchers no tomen lo mismo
+    if conn.dialect.name == "sqlite":
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+def _skip_locked(stmt, conn):
+    if conn.dialect.name == "postgresql":
+        return stmt.with_for_update(skip_locked=True)
+    return stmt
+
+
+def claim(engine, now, limit=OUTBOX_BATCH_SIZE):
+    """Toma filas vencidas (y las demás pendientes de esos candidatos) y las renta."""
+    # Pendientes, o en envío con la renta vencida (dispatcher caído)
+    claimable = (outbox.c.status == PENDING) | ((outbox.c.status == SENDING) & (outbox.c.available_at <= now))
+    with engine.connect() as conn:
+        _begin_claim(conn)
+        due_users = select(outbox.c.user_id).where(
+            outbox.c.status.in_([PENDING, SENDING]), outbox.c.available_at <= now
+        ).order_by(outbox.c.available_at).limit(limit)
+        user_ids = sorted({r.user_id for r in conn.execute(_skip_locked(due_users, conn))})
+        if not user_ids:
+            conn.rollback()
+            return []
+
+        # Lo pendiente del mismo candidato sale en el mismo correo (aunque no haya vencido)
+        rows = [dict(r._mapping) for r in conn.execute(_skip_locked(
+            select(outbox).where(claimable, outbox.c.user_id.in_(user_ids)), conn
+        ))]
+        lease_until = now + timedelta(seconds=OUTBOX_LEASE_SECONDS)
+        conn.execute(
+            outbox.update().where(outbox.c.id.in_([r["id"] for r in rows]))
+            .values(status=SENDING, available_at=lease_until)
+        )
+        conn.commit()
+    return rows
+
+
+def _is_permanent(error):
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in error.recipients.values())
+    return isinstance(error, smtplib.SMTPResponseException) and error.smtp_code >= 500
+
+
+def _record(engine, now, sent, retry, failed):
+    with engine.begin() as conn:
+        if sent:
+            conn.execute(
+                outbox.update().where(outbox.c.id.in_(sent)).values(status=SENT, sent_at=now, last_error=None)
+            )
+        if retry:
+            conn.execute(
+                outbox.update().where(outbox.c.id == bindparam("row_id")).values(
+                    status=PENDING, attempts=bindparam("attempts"), available_at=bindparam("next_at"),
+                    last_error=bindparam("error"),
+                ),
+                retry,
+            )
+        if failed:
+            conn.execute(
+                outbox.update().where(outbox.c.id == bindparam("row_id")).values(
+                    status=FAILED, attempts=bindparam("attempts"), last_error=bindparam("error"),
+                ),
+                failed,
+            )
+
+
+def dispatch_once(engine, mailer, now=None):
+    """Una pasada: regresa {"emails", "sent", "retry", "failed"} (filas, salvo emails)."""
+    now = now or datetime.utcnow()
+    rows = claim(engine, now)
+    stats = {"emails": 0, "sent": 0, "retry": 0, "failed": 0}
+    if not rows:
+        return stats
+
+    groups = defaultdict(list)
+    for row in rows:
+        groups[(row["user_id"], row["recipient"])].append(row)
+
+    sent, retry, failed = [], [], []
+
+    def give_up_or_retry(group, error, permanent=False):
+        for row in group:
+            attempts = row["attempts"] + 1
+            item = {"row_id": row["id"], "attempts": attempts, "error": str(error)[:500]}
+            if permanent or attempts >= OUTBOX_MAX_ATTEMPTS:
+                failed.append(item)
+            else:
+                retry.append({**item, "next_at": now + timedelta(seconds=retry_delay(attempts))})
+
+    pending = list(groups.items())
+    while pending:
+        (user_id, recipient), group = pending.pop(0)
+        message = build_message(recipient, group)
+        if message is None:
+            sent.extend(r["id"] for r in group)  # se revirtió antes de enviarse: nada que avisar
+            continue
+        try:
+            mailer.send(message)
+        except (smtplib.SMTPRecipientsRefused, smtplib.SMTPDataError, smtplib.SMTPSenderRefused) as e:
+            # Problema de este correo: los demás siguen
+            give_up_or_retry(group, e, permanent=_is_permanent(e))
+            continue
+        except (smtplib.SMTPException, OSError) as e:
+            # Servidor caído o conexión rota: se reprograma todo lo que falta
+            mailer.close()
+            give_up_or_retry(group, e)
+            for _, rest in pending:
+                give_up_or_retry(rest, e)
+            pending = []
+            break
+        stats["emails"] += 1
+        sent.extend(r["id"] for r in group)
+
+    _record(engine, now, sent, retry, failed)
+    stats.update(sent=len(sent), retry=len(retry), failed=len(failed))
+    return stats
+
+
+def run(engine, mailer, poll_interval=OUTBOX_POLL_INTERVAL, once=False):
+    while True:
+        stats = dispatch_once(engine, mailer)
+        if stats["sent"] or stats["retry"] or stats["failed"]:
+            print(f"📨 {stats['emails']} correos ({stats['sent']} avisos), "
+                  f"{stats['retry']} por reintentar, {stats['failed']} fallidos")
+        if once:
+            mailer.close()
+            return stats
+        if not stats["sent"]:
+            # Sin trabajo (o SMTP caído): se suelta la conexión y se espera
+            mailer.close()
+            time.sleep(poll_interval)
+
+
+def status_counts(engine):
+    with engine.connect() as conn:
+        return dict(conn.execute(select(outbox.c.status, func.count()).group_by(outbox.c.status)).all())
+
+
+def main(argv=None):
+    from migrations import get_engine
+
+    parser = argparse.ArgumentParser(description="Dispatcher de notificaciones (outbox)")
+    parser.add_argument("--database-url", default=os.environ.get("DATABASE_URL"))
+    parser.add_argument("--once", action="store_true", help="una pasada y sale")
+    parser.add_argument("--status", action="store_true", help="filas por estado")
+    args = parser.parse_args(argv)
+
+    engine = get_engine(args.database_url)
+
+    if args.status:
+        counts = status_counts(engine)
+        for status in (PENDING, SENDING, SENT, FAILED):
+            print(f"   {status}: {counts.get(status, 0)}")
+        return 0
+
+    if not SMTP_HOST:
+        print("❌ SMTP_HOST no configurado")
+        return 1
+    run(engine, SmtpMailer(), once=args.once)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,462 @@
+"""
+Búsqueda de texto completo sobre el contenido de los documentos de propuesta.
+
+Al enviar una propuesta la app encola su documento en `document_texts` (misma
+transacción, una fila por URL: las sedes de un envío comparten documento).
+Un proceso aparte extrae el texto:
+
+    python proposal_search.py              # extractor continuo
+    python proposal_search.py --once       # una pasada y sale
+    python proposal_search.py --backfill   # encola los documentos ya existentes
+    python proposal_search.py --status     # filas por estado
+
+- Las descargas van en hilos (I/O); la extracción (PDF con pypdf, DOCX con
+  zipfile + XML, DOC con `antiword` si está instalado) en un pool de
+  procesos (EXTRACT_WORKERS), porque parsear PDFs es CPU.
+- Índice: en SQLite, tabla FTS5 de contenido externo sincronizada por
+  triggers (unicode61 sin acentos; SQLite no trae stemming en español); en
+  Postgres, columna tsvector generada con la configuración 'spanish' e
+  índice GIN.
+- `search` regresa los documentos ordenados por relevancia (bm25 /
+  ts_rank_cd) con un fragmento del texto donde coinciden los términos.
+- Junto con el texto se calcula su firma MinHash y se buscan casi duplicados
+  de documentos anteriores (near_duplicates.py).
+
+Las filas que se quedan "working" más de EXTRACT_LEASE_SECONDS (extractor
+caído) se vuelven a tomar; tras EXTRACT_MAX_ATTEMPTS fallas quedan en `failed`.
+"""
+import argparse
+import io
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timedelta
+from urllib.parse import urlparse
+from xml.etree import ElementTree
+
+from sqlalchemy import DDL, Column, DateTime, Index, Integer, MetaData, String, Table, Text, bindparam, column, event, func, or_, select, table, text
+
+from near_duplicates import DuplicateDetector, duplicate_flags, document_signatures, minhash
+
+# Opcional: texto de PDFs (sin pypdf los PDF quedan en failed)
+try:
+    from pypdf import PdfReader
+except ImportError:
+    PdfReader = None
+
+EXTRACT_WORKERS = int(os.getenv("EXTRACT_WORKERS", "2"))
+EXTRACT_BATCH_SIZE = int(os.getenv("EXTRACT_BATCH_SIZE", "20"))
+EXTRACT_POLL_INTERVAL = float(os.getenv("EXTRACT_POLL_INTERVAL", "10"))
+EXTRACT_LEASE_SECONDS = float(os.getenv("EXTRACT_LEASE_SECONDS", "600"))
+EXTRACT_MAX_ATTEMPTS = int(os.getenv("EXTRACT_MAX_ATTEMPTS", "3"))
+EXTRACT_MAX_BYTES = 10 * 1024 * 1024        # mismo límite que la subida (MAX_FILE_SIZES["proposal"])
+MAX_TEXT_CHARS = 200_000                    # lo que pase de aquí no se indexa
+ORPHAN_PURGE_INTERVAL = 600
+
+PENDING, WORKING, DONE, FAILED = "pending", "working", "done", "failed"
+
+# Marcas del fragmento; la vista escapa el texto y las cambia por <mark>
+HIGHLIGHT_START, HIGHLIGHT_END = "\x02", "\x03"
+
+metadata = MetaData()
+
+document_texts = Table(
+    "document_texts", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("doc_url", String(255), nullable=False, unique=True),
+    Column("status", String(20), nullable=False, default=PENDING),
+    Column("content", Text),
+    Column("attempts", Integer, nullable=False, default=0),
+    Column("error", String(500)),
+    Column("queued_at", DateTime, nullable=False),
+    Column("claimed_at", DateTime),
+    Column("extracted_at", DateTime),
+    Index("ix_document_texts_status", "status"),
+)
+
+# ---- Índice SQLite: FTS5 de contenido externo + triggers ----
+for _ddl in (
+    "CREATE VIRTUAL TABLE document_texts_fts USING fts5("
+    "content, content='document_texts', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER document_texts_ai AFTER INSERT ON document_texts BEGIN "
+    "INSERT INTO document_texts_fts(rowid, content) VALUES (new.id, new.content); END",
+    "CREATE TRIGGER document_texts_ad AFTER DELETE ON document_texts BEGIN "
+    "INSERT INTO document_texts_fts(document_texts_fts, rowid, content) VALUES ('delete', old.id, old.content); END",
+    "CREATE TRIGGER document_texts_au AFTER UPDATE OF content ON document_texts BEGIN "
+    "INSERT INTO document_texts_fts(document_texts_fts, rowid, content) VALUES ('delete', old.id, old.content); "
+    "INSERT INTO document_texts_fts(rowid, content) VALUES (new.id, new.content); END",
+):
+    event.listen(document_texts, "after_create", DDL(_ddl).execute_if(dialect="sqlite"))
+
+# ---- Índice Postgres: tsvector generado (español) + GIN ----
+for _ddl in (
+    "ALTER TABLE document_texts ADD COLUMN search_vector tsvector "
+    "GENERATED ALWAYS AS (to_tsvector('spanish', coalesce(content, ''))) STORED",
+    "CREATE INDEX ix_document_texts_search ON document_texts USING GIN (search_vector)",
+):
+    event.listen(document_texts, "after_create", DDL(_ddl).execute_if(dialect="postgresql"))
+
+# Solo las columnas que se usan (sin depender de los modelos de la app)
+proposals = table("proposals", column("supporting_doc_url"))
+
+# =========================
+# ENCOLAR
+# =========================
+
+# En texto: SQLAlchemy no cachea la compilación de ON CONFLICT y esto corre en
+# cada envío con documento
+_INSERT_IGNORE_SQL = text(
+    "INSERT INTO document_texts (doc_url, status, attempts, queued_at) "
+    "VALUES (:doc_url, :status, :attempts, :queued_at) ON CONFLICT (doc_url) DO NOTHING"
+).bindparams(bindparam("queued_at", type_=DateTime))
+
+
+def _insert_ignore(conn, rows):
+    if conn.dialect.name in ("postgresql", "sqlite"):
+        conn.execute(_INSERT_IGNORE_SQL, rows)
+        return
+    for row in rows:
+        exists = conn.execute(select(document_texts.c.id).where(document_texts.c.doc_url == row["doc_url"])).first()
+        if not exists:
+            conn.execute(document_texts.insert().values(**row))
+
+
+def enqueue_document(conn, doc_url):
+    """Encola el documento para extracción (si ya estaba, no hace nada). Sin commit."""
+    if doc_url:
+        _insert_ignore(conn, [{"doc_url": doc_url, "status": PENDING, "attempts": 0, "queued_at": datetime.utcnow()}])
+
+
+def backfill(engine):
+    """Encola los documentos de propuestas que todavía no están en document_texts."""
+    with engine.begin() as conn:
+        urls = [u for (u,) in conn.execute(
+            select(proposals.c.supporting_doc_url).distinct()
+            .where(proposals.c.supporting_doc_url.isnot(None))
+            .where(proposals.c.supporting_doc_url.notin_(select(document_texts.c.doc_url)))
+        )]
+        if urls:
+            now = datetime.utcnow()
+            _insert_ignore(conn, [{"doc_url": u, "status": PENDING, "attempts": 0, "queued_at": now} for u in urls])
+    return len(urls)
+
+
+def purge_orphans(engine):
+    """Borra el texto (y firma y pares de duplicados) de documentos que ya no usa ninguna propuesta."""
+    with engine.begin() as conn:
+        ids = [i for (i,) in conn.execute(select(document_texts.c.id).where(
+            document_texts.c.doc_url.notin_(
+                select(proposals.c.supporting_doc_url).where(proposals.c.supporting_doc_url.isnot(None))
+            )
+        ))]
+        if ids:
+            conn.execute(duplicate_flags.delete().where(
+                duplicate_flags.c.doc_id.in_(ids) | duplicate_flags.c.match_doc_id.in_(ids)
+            ))
+            conn.execute(document_signatures.delete().where(document_signatures.c.doc_id.in_(ids)))
+            conn.execute(document_texts.delete().where(document_texts.c.id.in_(ids)))
+    return len(ids)
+
+# =========================
+# EXTRACCIÓN (corre en el pool de procesos)
+# =========================
+
+class ExtractionError(ValueError):
+    pass
+
+
+WORD_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+
+def _docx_text(data):
+    try:
+        with zipfile.ZipFile(io.BytesIO(data)) as zf:
+            xml = zf.read("word/document.xml")
+    except (zipfile.BadZipFile, KeyError) as e:
+        raise ExtractionError(f"DOCX inválido: {e}") from e
+    paragraphs = []
+    for p in ElementTree.fromstring(xml).iter(f"{WORD_NS}p"):
+        parts = []
+        for node in p.iter():
+            if node.tag == f"{WORD_NS}t" and node.text:
+                parts.append(node.text)
+            elif node.tag in (f"{WORD_NS}tab", f"{WORD_NS}br"):
+                parts.append(" ")
+        paragraphs.append("".join(parts))
+    return "\n".join(paragraphs)
+
+
+def _pdf_text(data):
+    if PdfReader is None:
+        raise ExtractionError("pypdf no instalado")
+    try:
+        reader = PdfReader(io.BytesIO(data))
+        pages, size = [], 0
+        for page in reader.pages:
+            chunk = page.extract_text() or ""
+            pages.append(chunk)
+            size += len(chunk)
+            if size >= MAX_TEXT_CHARS:
+                break
+        return "\n".join(pages)
+    except ExtractionError:
+        raise
+    except Exception as e:
+        raise ExtractionError(f"PDF inválido: {e}") from e
+
+
+def _doc_text(data):
+    antiword = shutil.which("antiword")
+    if not antiword:
+        raise ExtractionError(".doc requiere antiword")
+    with tempfile.NamedTemporaryFile(suffix=".doc") as tmp:
+        tmp.write(data)
+        tmp.flush()
+        result = subprocess.run([antiword, tmp.name], capture_output=True, timeout=60)
+    if result.returncode != 0:
+        raise ExtractionError(f"antiword: {result.stderr.decode(errors='replace')[:200]}")
+    return result.stdout.decode("utf-8", errors="replace")
+
+
+EXTRACTORS = {"pdf": _pdf_text, "docx": _docx_text, "doc": _doc_text}
+
+
+def extension_of(doc_url):
+    return os.path.splitext(urlparse(doc_url).path)[1].lstrip(".").lower()
+
+
+def extract_text(data, extension):
+    """bytes del documento -> texto normalizado (espacios colapsados, con tope)."""
+    extractor = EXTRACTORS.get(extension)
+    if extractor is None:
+        raise ExtractionError(f"formato no soportado: {extension or '?'}")
+    content = extractor(data).replace("\x00", "")
+    content = re.sub(r"[ \t\r\f\v]+", " ", content)
+    content = re.sub(r"\n\s*\n+", "\n", content).strip()
+    return content[:MAX_TEXT_CHARS]
+
+
+def extract_and_sign(data, extension):
+    """(texto, firma MinHash o None): las dos cosas son CPU, van en el mismo viaje al pool."""
+    content = extract_text(data, extension)
+    return content, minhash(content)
+
+# =========================
+# EXTRACTOR
+# =========================
+
+def claim(engine, now, limit=EXTRACT_BATCH_SIZE):
+    """Toma documentos pendientes (o rentas vencidas) y los marca como working."""
+    stale = now - timedelta(seconds=EXTRACT_LEASE_SECONDS)
+    with engine.connect() as conn:
+        if conn.dialect.name == "sqlite":
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+        query = select(document_texts.c.id, document_texts.c.doc_url, document_texts.c.attempts).where(
+            or_(document_texts.c.status == PENDING,
+                (document_texts.c.status == WORKING) & (document_texts.c.claimed_at < stale))
+        ).order_by(document_texts.c.queued_at).limit(limit)
+        if conn.dialect.name == "postgresql":
+            query = query.with_for_update(skip_locked=True)
+        rows = [dict(r._mapping) for r in conn.execute(query)]
+        if rows:
+            conn.execute(
+                document_texts.update().where(document_texts.c.id.in_([r["id"] for r in rows]))
+                .values(status=WORKING, claimed_at=now)
+            )
+        conn.commit()
+    return rows
+
+
+def _download(storage, doc_url):
+    data = storage.read(doc_url, max_bytes=EXTRACT_MAX_BYTES)
+    if data is None:
+        raise ExtractionError("documento no encontrado")
+    return data
+
+
+_detector = None
+
+
+def extract_once(engine, storage, process_pool, io_pool, now=None, detector=None):
+    """Una pasada: regresa {"done": n, "retry": n, "failed": n, "duplicates": n}."""
+    global _detector
+    if detector is None:
+        _detector = _detector or DuplicateDetector()
+        detector = _detector
+    now = now or datetime.utcnow()
+    rows = claim(engine, now)
+    stats = {"done": 0, "retry": 0, "failed": 0, "duplicates": 0}
+    if not rows:
+        return stats
+
+    downloads = {r["id"]: io_pool.submit(_download, storage, r["doc_url"]) for r in rows}
+    extractions = {}
+    results = []
+    for row in rows:
+        try:
+            data = downloads[row["id"]].result()
+        except Exception as e:
+            results.append((row, None, e))
+            continue
+        extractions[row["id"]] = process_pool.submit(extract_and_sign, data, extension_of(row["doc_url"]))
+    for row in rows:
+        if row["id"] in extractions:
+            try:
+                results.append((row, extractions[row["id"]].result(), None))
+            except Exception as e:
+                results.append((row, None, e))
+
+    done, retry, failed = [], [], []
+    signatures = {}
+    for row, extracted, error in results:
+        if error is None:
+            content, signatures[row["id"]] = extracted
+            done.append({"row_id": row["id"], "content": content})
+            continue
+        attempts = row["attempts"] + 1
+        item = {"row_id": row["id"], "attempts": attempts, "error": str(error)[:500]}
+        # Formato no soportado, archivo roto o demasiado grande: reintentar no sirve
+        if isinstance(error, ValueError) or attempts >= EXTRACT_MAX_ATTEMPTS:
+            failed.append(item)
+        else:
+            retry.append(item)
+
+    with engine.begin() as conn:
+        if done:
+            conn.execute(
+                document_texts.update().where(document_texts.c.id == bindparam("row_id"))
+                .values(status=DONE, content=bindparam("content"), error=None, extracted_at=now),
+                done,
+            )
+            # Casi duplicados contra todo lo indexado antes (también por otros extractores)
+            detector.refresh(conn)
+            for row_id, signature in sorted(signatures.items()):
+                if signature is not None:
+                    stats["duplicates"] += len(detector.check_and_add(conn, row_id, signature, now))
+        for status, items in ((PENDING, retry), (FAILED, failed)):
+            if items:
+                conn.execute(
+                    document_texts.update().where(document_texts.c.id == bindparam("row_id"))
+                    .values(status=status, attempts=bindparam("attempts"), error=bindparam("error")),
+                    items,
+                )
+    stats.update(done=len(done), retry=len(retry), failed=len(failed))
+    return stats
+
+
+def run(engine, storage, once=False, workers=EXTRACT_WORKERS, poll_interval=EXTRACT_POLL_INTERVAL):
+    last_purge = 0.0
+    with ProcessPoolExecutor(max_workers=workers) as process_pool, \
+            ThreadPoolExecutor(max_workers=4, thread_name_prefix="extract-io") as io_pool:
+        while True:
+            stats = extract_once(engine, storage, process_pool, io_pool)
+            if any(stats.values()):
+                print(f"📄 {stats['done']} extraídos, {stats['retry']} por reintentar, {stats['failed']} fallidos, "
+                      f"{stats['duplicates']} casi duplicados")
+            if once:
+                return stats
+            if time.time() - last_purge > ORPHAN_PURGE_INTERVAL:
+                last_purge = time.time()
+                purge_orphans(engine)
+            if not any(stats.values()):
+                time.sleep(poll_interval)
+
+# =========================
+# BÚSQUEDA
+# =========================
+
+def fts5_query(query):
+    """Texto libre -> consulta FTS5: todos los términos, con prefijo ("manten" encuentra "mantenimiento")."""
+    terms = re.findall(r"\w+", query.lower())
+    return " ".join(f'"{t}"*' for t in terms)
+
+
+SQLITE_SEARCH = text(f"""
+    SELECT d.doc_url AS doc_url,
+           bm25(document_texts_fts) AS rank,
+           snippet(document_texts_fts, 0, '{HIGHLIGHT_START}', '{HIGHLIGHT_END}', '…', 24) AS snippet
+    FROM document_texts_fts
+    JOIN document_texts d ON d.id = document_texts_fts.rowid
+    WHERE document_texts_fts MATCH :q
+    ORDER BY rank
+    LIMIT :limit
+""")
+
+# Primero se rankea con el índice; ts_headline (caro) solo para las filas de la página
+PG_SEARCH = text(f"""
+    WITH q AS (SELECT websearch_to_tsquery('spanish', :q) AS query),
+    ranked AS (
+        SELECT d.doc_url, d.content, ts_rank_cd(d.search_vector, q.query) AS rank, q.query
+        FROM document_texts d, q
+        WHERE d.search_vector @@ q.query
+        ORDER BY rank DESC
+        LIMIT :limit
+    )
+    SELECT doc_url, rank,
+           ts_headline('spanish', content, query,
+                       'StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_END}, MaxFragments=2, MinWords=10, MaxWords=30, FragmentDelimiter=" … "') AS snippet
+    FROM ranked
+    ORDER BY rank DESC
+""")
+
+
+def search(conn, query, limit=50):
+    """[{doc_url, rank, snippet}] de más a menos relevante ([] si la consulta no tiene términos)."""
+    if conn.dialect.name == "postgresql":
+        if not query.strip():
+            return []
+        result = conn.execute(PG_SEARCH, {"q": query, "limit": limit})
+    else:
+        q = fts5_query(query)
+        if not q:
+            return []
+        result = conn.execute(SQLITE_SEARCH, {"q": q, "limit": limit})
+    return [dict(r._mapping) for r in result]
+
+
+def status_counts(engine):
+    with engine.connect() as conn:
+        return dict(conn.execute(
+            select(document_texts.c.status, func.count()).group_by(document_texts.c.status)
+        ).all())
+
+
+def main(argv=None):
+    from migrations import get_engine
+    from storage import create_storage
+
+    parser = argparse.ArgumentParser(description="Extracción de texto de propuestas (búsqueda)")
+    parser.add_argument("--database-url", default=os.environ.get("DATABASE_URL"))
+    parser.add_argument("--once", action="store_true", help="una pasada y sale")
+    parser.add_argument("--backfill", action="store_true", help="encola documentos existentes")
+    parser.add_argument("--status", action="store_true", help="filas por estado")
+    args = parser.parse_args(argv)
+
+    engine = get_engine(args.database_url)
+
+    if args.status:
+        counts = status_counts(engine)
+        for status in (PENDING, WORKING, DONE, FAILED):
+            print(f"   {status}: {counts.get(status, 0)}")
+        return 0
+    if args.backfill:
+        print(f"✅ {backfill(engine)} documentos encolados")
+        return 0
+
+    # Mismo backend que la app (ver STORAGE_BACKEND en call_for_papers_app.py)
+    storage = create_storage(
+        os.getenv("STORAGE_BACKEND", "cloudinary"),
+        local_root=os.getenv("STORAGE_LOCAL_ROOT", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "files")),
+    )
+    run(engine, storage, once=args.once)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
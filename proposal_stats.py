@@ -0,0 +1,270 @@
+"""
+Contadores del tablero de revisión (/admin/dashboard).
+
+Dos tablas de resumen que se mantienen de forma incremental, en la MISMA
+transacción que el cambio de la propuesta (listener before_flush de la app):
+
+    proposal_status_counts (venue, status) -> total
+    proposal_daily_counts  (day)           -> total   (por fecha de recepción, UTC)
+
+Así el tablero lee unas cuantas filas en vez de hacer GROUP BY sobre
+`proposals`. Lo que no pasa por el ORM (SQL directo, seeds, backfills) no se
+refleja: para eso está la conciliación, que recalcula todo desde `proposals`,
+reporta diferencias y reescribe el resumen:
+
+    python proposal_stats.py            # concilia (corrige si hay diferencias)
+    python proposal_stats.py --check    # solo verifica; código 1 si no cuadra
+"""
+import argparse
+import os
+import sys
+from collections import Counter
+from datetime import date, datetime
+
+from sqlalchemy import Column, Date, Integer, MetaData, String, Table, and_, bindparam, column, func, select, table, text
+from sqlalchemy import inspect as sa_inspect
+
+DEFAULT_STATUS = "En revisión"
+
+metadata = MetaData()
+
+status_counts = Table(
+    "proposal_status_counts", metadata,
+    Column("venue", String(50), primary_key=True),
+    Column("status", String(50), primary_key=True),
+    Column("total", Integer, nullable=False, default=0),
+)
+
+daily_counts = Table(
+    "proposal_daily_counts", metadata,
+    Column("day", Date, primary_key=True),
+    Column("total", Integer, nullable=False, default=0),
+)
+
+# Solo las columnas que se agregan (sin depender de los modelos de la app)
+proposals = table("proposals", column("venue"), column("status"), column("received_at"))
+
+# =========================
+# DELTAS (en el flush)
+# =========================
+
+def _as_day(value):
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def _committed(session, obj, key):
+    """Valor en la BD antes de este flush (sin cambios pendientes)."""
+    state = sa_inspect(obj)
+    hist = state.attrs[key].history
+    if hist.deleted:
+        return hist.deleted[0]
+    if hist.unchanged:
+        return hist.unchanged[0]
+    if hist.added:
+        # Se asignó sin haberse cargado antes: el valor anterior solo está en la BD
+        tbl = state.mapper.local_table
+        pk = state.mapper.primary_key[0]
+        return session.connection().execute(
+            select(tbl.c[key]).where(pk == state.identity[0])
+        ).scalar()
+    return getattr(obj, key)
+
+
+def _key(venue, status):
+    return (venue, status or DEFAULT_STATUS)
+
+
+def flush_deltas(session, model):
+    """Cambios de conteo que implica el flush pendiente de `session` para `model`."""
+    by_status, by_day = Counter(), Counter()
+
+    for obj in session.new:
+        if isinstance(obj, model):
+            by_status[_key(obj.venue, obj.status)] += 1
+            # received_at lo llena el default al insertar: hoy (UTC)
+            by_day[_as_day(obj.received_at) or datetime.utcnow().date()] += 1
+
+    for obj in session.deleted:
+        if isinstance(obj, model):
+            by_status[_key(_committed(session, obj, "venue"), _committed(session, obj, "status"))] -= 1
+            day = _as_day(_committed(session, obj, "received_at"))
+            if day:
+                by_day[day] -= 1
+
+    for obj in session.dirty:
+        if not isinstance(obj, model) or not session.is_modified(obj):
+            continue
+        state = sa_inspect(obj)
+        if any(state.attrs[k].history.has_changes() for k in ("venue", "status")):
+            old = _key(_committed(session, obj, "venue"), _committed(session, obj, "status"))
+            new = _key(obj.venue, obj.status)
+            if old != new and old[0] is not None:
+                by_status[old] -= 1
+                by_status[new] += 1
+        if state.attrs["received_at"].history.has_changes():
+            old_day, new_day = _as_day(_committed(session, obj, "received_at")), _as_day(obj.received_at)
+            if old_day != new_day:
+                if old_day:
+                    by_day[old_day] -= 1
+                if new_day:
+                    by_day[new_day] += 1
+
+    return _nonzero(by_status), _nonzero(by_day)
+
+
+def _nonzero(counter):
+    return {k: v for k, v in counter.items() if v}
+
+
+# total += delta con un solo statement (Postgres y SQLite >= 3.24). En texto:
+# SQLAlchemy no cachea la compilación de ON CONFLICT y esto corre en cada envío
+_UPSERT_SQL = {
+    "proposal_status_counts": text(
+        "INSERT INTO proposal_status_counts (venue, status, total) VALUES (:venue, :status, :total) "
+        "ON CONFLICT (venue, status) DO UPDATE SET total = proposal_status_counts.total + excluded.total"
+    ),
+    "proposal_daily_counts": text(
+        "INSERT INTO proposal_daily_counts (day, total) VALUES (:day, :total) "
+        "ON CONFLICT (day) DO UPDATE SET total = proposal_daily_counts.total + excluded.total"
+    ).bindparams(bindparam("day", type_=Date)),
+}
+
+
+def _upsert_add(conn, tbl, key_columns, rows):
+    """total += delta por fila (la crea si no existe); un statement por tabla."""
+    if conn.dialect.name in ("postgresql", "sqlite"):
+        conn.execute(_UPSERT_SQL[tbl.name], rows)
+        return
+
+    for row in rows:
+        where = and_(*(tbl.c[k] == row[k] for k in key_columns))
+        result = conn.execute(tbl.update().where(where).values(total=tbl.c.total + row["total"]))
+        if result.rowcount == 0:
+            conn.execute(tbl.insert().values(**row))
+
+
+def apply_deltas(conn, by_status, by_day):
+    # Orden fijo de llaves: dos transacciones no se bloquean en orden cruzado
+    if by_status:
+        _upsert_add(conn, status_counts, ["venue", "status"], [
+            {"venue": venue, "status": status, "total": delta}
+            for (venue, status), delta in sorted(by_status.items())
+        ])
+    if by_day:
+        _upsert_add(conn, daily_counts, ["day"], [
+            {"day": day, "total": delta} for day, delta in sorted(by_day.items())
+        ])
+
+# =========================
+# LECTURA
+# =========================
+
+def read_summary(conn):
+    by_status = {
+        (venue, status): total
+        for venue, status, total in conn.execute(select(status_counts.c.venue, status_counts.c.status, status_counts.c.total))
+        if total
+    }
+    by_day = {
+        _as_day(day): total
+        for day, total in conn.execute(select(daily_counts.c.day, daily_counts.c.total))
+        if total
+    }
+    return by_status, by_day
+
+
+def recompute(conn):
+    """Conteos desde cero con GROUP BY sobre proposals."""
+    status = func.coalesce(proposals.c.status, DEFAULT_STATUS)
+    by_status = {
+        (venue, st): n
+        for venue, st, n in conn.execute(
+            select(proposals.c.venue, status, func.count()).group_by(proposals.c.venue, status)
+        )
+    }
+    day = func.date(proposals.c.received_at)
+    by_day = {
+        _as_day(d): n
+        for d, n in conn.execute(
+            select(day, func.count()).where(proposals.c.received_at.isnot(None)).group_by(day)
+        )
+    }
+    return by_status, by_day
+
+# =========================
+# CONCILIACIÓN
+# =========================
+
+def _diff(stored, fresh):
+    keys = set(stored) | set(fresh)
+    return {k: (stored.get(k, 0), fresh.get(k, 0)) for k in keys if stored.get(k, 0) != fresh.get(k, 0)}
+
+
+def _lock_for_reconcile(conn):
+    # Espera a los envíos en curso y detiene los nuevos mientras se recalcula
+    if conn.dialect.name == "postgresql":
+        conn.execute(text("LOCK TABLE proposal_status_counts, proposal_daily_counts IN SHARE ROW EXCLUSIVE MODE"))
+    elif conn.dialect.name == "sqlite":
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+def reconcile(engine, fix=True):
+    """
+    Recalcula desde `proposals` y compara con el resumen. Regresa
+    {"status": {(venue, status): (guardado, real)}, "daily": {día: (guardado, real)}}
+    solo con lo que no cuadra; con fix=True reescribe el resumen.
+    """
+    metadata.create_all(engine)
+    with engine.connect() as conn:
+        _lock_for_reconcile(conn)
+        stored_status, stored_day = read_summary(conn)
+        fresh_status, fresh_day = recompute(conn)
+        diff = {"status": _diff(stored_status, fresh_status), "daily": _diff(stored_day, fresh_day)}
+
+        if fix and (diff["status"] or diff["daily"]):
+            conn.execute(status_counts.delete())
+            conn.execute(daily_counts.delete())
+            if fresh_status:
+                conn.execute(status_counts.insert(), [
+                    {"venue": v, "status": s, "total": n} for (v, s), n in fresh_status.items()
+                ])
+            if fresh_day:
+                conn.execute(daily_counts.insert(), [{"day": d, "total": n} for d, n in fresh_day.items()])
+        conn.commit()
+    return diff
+
+
+def main(argv=None):
+    from migrations import get_engine
+
+    parser = argparse.ArgumentParser(description="Conciliación de contadores del tablero")
+    parser.add_argument("--database-url", default=os.environ.get("DATABASE_URL"))
+    parser.add_argument("--check", action="store_true", help="solo verifica, no corrige")
+    args = parser.parse_args(argv)
+
+    engine = get_engine(args.database_url)
+    diff = reconcile(engine, fix=not args.check)
+    mismatches = len(diff["status"]) + len(diff["daily"])
+    if not mismatches:
+        print("✅ Contadores del tablero al día")
+        return 0
+
+    for (venue, status), (stored, real) in sorted(diff["status"].items()):
+        print(f"⚠️ {venue} / {status}: guardado {stored}, real {real}")
+    for day, (stored, real) in sorted(diff["daily"].items()):
+        print(f"⚠️ {day}: guardado {stored}, real {real}")
+    if args.check:
+        print(f"❌ {mismatches} contadores no cuadran (corre sin --check para corregir)")
+        return 1
+    print(f"✅ {mismatches} contadores corregidos")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,299 @@
+"""
+Cache de resultados de consultas para los listados de admin.
+
+Cada entrada se guarda bajo (listado, filtros/página), junto con la versión
+de datos con la que se calculó. La versión es un contador global en la BD
+(`data_versions`) que la app sube en la misma transacción de cada escritura
+sobre propuestas o usuarios; si la versión guardada no es la actual, es un
+miss y el resultado nuevo reemplaza a la entrada (una sola copia por
+listado y filtros, en memoria y en disco). Así todos los workers invalidan a
+la vez sin mensajes entre ellos.
+
+- En memoria: LRU por proceso (QUERY_CACHE_SIZE entradas).
+- Compartido (opcional): con QUERY_CACHE_DIR, los resultados también se
+  escriben como JSON en ese directorio y otro worker los reutiliza en vez de
+  consultar la BD. Los valores deben ser serializables a JSON.
+
+Las métricas (hits en memoria, hits del store compartido, misses,
+desalojos) se exponen en /health.
+
+`SingleFlight` junta requests concurrentes idénticos dentro de un worker: el
+primero calcula y los demás esperan su resultado en vez de repetir el trabajo;
+el resultado se reutiliza unos segundos más (SINGLE_FLIGHT_TTL).
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import Column, Integer, MetaData, String, Table, select, text
+
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "64"))
+QUERY_CACHE_DIR = os.getenv("QUERY_CACHE_DIR")
+QUERY_CACHE_FILE_TTL = int(os.getenv("QUERY_CACHE_FILE_TTL", "3600"))
+SINGLE_FLIGHT_TTL = float(os.getenv("SINGLE_FLIGHT_TTL", "2"))
+SINGLE_FLIGHT_WAIT = float(os.getenv("SINGLE_FLIGHT_WAIT", "30"))
+
+DATA_VERSION_KEY = "admin"
+
+metadata = MetaData()
+
+data_versions = Table(
+    "data_versions", metadata,
+    Column("name", String(50), primary_key=True),
+    Column("version", Integer, nullable=False, default=0),
+)
+
+# =========================
+# VERSIÓN DE DATOS
+# =========================
+
+def current_version(conn, name=DATA_VERSION_KEY):
+    return conn.execute(select(data_versions.c.version).where(data_versions.c.name == name)).scalar() or 0
+
+
+# En texto: SQLAlchemy no cachea la compilación de ON CONFLICT y esto corre en
+# cada escritura de propuestas o usuarios
+_BUMP_SQL = text(
+    "INSERT INTO data_versions (name, version) VALUES (:name, 1) "
+    "ON CONFLICT (name) DO UPDATE SET version = data_versions.version + 1"
+)
+
+
+def bump_version(conn, name=DATA_VERSION_KEY):
+    """version += 1 (crea la fila la primera vez). Usar en la transacción de la escritura."""
+    if conn.dialect.name in ("postgresql", "sqlite"):
+        conn.execute(_BUMP_SQL, {"name": name})
+        return
+
+    result = conn.execute(
+        data_versions.update()
+        .where(data_versions.c.name == name)
+        .values(version=data_versions.c.version + 1)
+    )
+    if result.rowcount == 0:
+        conn.execute(data_versions.insert().values(name=name, version=1))
+
+# =========================
+# STORES
+# =========================
+
+class LRUStore:
+    def __init__(self, maxsize=QUERY_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._data:
+                return None
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class FileStore:
+    """JSON por llave en un directorio compartido por los workers del host."""
+
+    def __init__(self, root, ttl=QUERY_CACHE_FILE_TTL, gc_interval=300):
+        self.root = os.path.abspath(root)
+        self.ttl = ttl
+        self.gc_interval = gc_interval
+        self._last_gc = 0.0
+        os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.root, hashlib.sha256(key.encode("utf-8")).hexdigest() + ".json")
+
+    def get(self, key):
+        """(versión, valor) o None."""
+        try:
+            with open(self._path(key), encoding="utf-8") as fh:
+                entry = json.load(fh)
+        except (OSError, ValueError):
+            return None
+        if entry.get("key") != key:
+            return None
+        return entry.get("version"), entry["value"]
+
+    def set(self, key, version, value):
+        # Escritura atómica: otro worker nunca lee un archivo a medias
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                json.dump({"key": key, "version": version, "value": value}, fh)
+            os.replace(tmp, self._path(key))
+        except OSError:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+        self._maybe_gc()
+
+    def _maybe_gc(self):
+        now = time.time()
+        if now - self._last_gc < self.gc_interval:
+            return
+        self._last_gc = now
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            try:
+                if now - os.path.getmtime(path) > self.ttl:
+                    os.unlink(path)
+            except OSError:
+                pass
+
+# =========================
+# CACHE
+# =========================
+
+class QueryCache:
+    def __init__(self, maxsize=QUERY_CACHE_SIZE, shared_dir=QUERY_CACHE_DIR):
+        self.memory = LRUStore(maxsize)
+        self.shared = FileStore(shared_dir) if shared_dir else None
+        self.metrics = {"hits": 0, "shared_hits": 0, "misses": 0}
+        self._lock = threading.Lock()
+
+    def _count(self, name):
+        with self._lock:
+            self.metrics[name] += 1
+
+    @staticmethod
+    def make_key(listing, params):
+        return f"{listing}:" + json.dumps(params or {}, sort_keys=True, ensure_ascii=False)
+
+    def get_or_compute(self, listing, params, version, compute, shared=True):
+        """
+        Resultado de `compute()` para (listing, params) en esta versión de datos.
+        shared=False lo deja solo en memoria (p.ej. datos sensibles).
+        """
+        key = self.make_key(listing, params)
+        entry = self.memory.get(key)
+        if entry is not None and entry[0] == version:
+            self._count("hits")
+            return entry[1]
+
+        if shared and self.shared is not None:
+            stored = self.shared.get(key)
+            if stored is not None and stored[0] == version:
+                self._count("shared_hits")
+                self.memory.set(key, (version, stored[1]))
+                return stored[1]
+
+        self._count("misses")
+        value = compute()
+        # Un request que leyó una versión anterior no pisa un resultado más nuevo
+        current = self.memory.get(key)
+        if current is None or current[0] <= version:
+            self.memory.set(key, (version, value))
+            if shared and self.shared is not None:
+                self.shared.set(key, version, value)
+        return value
+
+    def snapshot(self):
+        with self._lock:
+            data = dict(self.metrics)
+        lookups = data["hits"] + data["shared_hits"] + data["misses"]
+        data["hit_ratio"] = round((data["hits"] + data["shared_hits"]) / lookups, 3) if lookups else None
+        data["entries"] = len(self.memory)
+        data["evictions"] = self.memory.evictions
+        data["shared_store"] = self.shared.root if self.shared else None
+        return data
+
+# =========================
+# SINGLE-FLIGHT
+# =========================
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SingleFlight:
+    def __init__(self, ttl=SINGLE_FLIGHT_TTL, wait=SINGLE_FLIGHT_WAIT):
+        self.ttl = ttl
+        self.wait = wait
+        self._calls = {}      # llave -> _Call en curso
+        self._recent = {}     # llave -> (expira, valor)
+        self._lock = threading.Lock()
+        self.metrics = {"computed": 0, "coalesced": 0, "recent": 0, "timeouts": 0}
+
+    def do(self, key, fn):
+        """
+        Resultado de `fn()` para `key`. Si otro hilo ya lo está calculando, espera
+        y regresa el mismo valor (o la misma excepción). Un resultado reciente
+        (menos de `ttl` segundos) se regresa sin llamar a `fn`.
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._prune(now)
+            recent = self._recent.get(key)
+            if recent is not None:
+                self.metrics["recent"] += 1
+                return recent[1]
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            if call.done.wait(self.wait):
+                with self._lock:
+                    self.metrics["coalesced"] += 1
+                if call.error is not None:
+                    raise call.error
+                return call.value
+            # El que calcula se tardó demasiado: no bloquear más a este request
+            with self._lock:
+                self.metrics["timeouts"] += 1
+            return fn()
+
+        try:
+            call.value = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self.metrics["computed"] += 1
+                del self._calls[key]
+                if call.error is None and self.ttl > 0:
+                    self._recent[key] = (time.monotonic() + self.ttl, call.value)
+            call.done.set()
+        return call.value
+
+    def clear(self):
+        """Olvida los resultados recientes (no afecta los cálculos en curso)."""
+        with self._lock:
+            self._recent.clear()
+
+    def _prune(self, now):
+        for key in [k for k, (expires, _) in self._recent.items() if expires <= now]:
+            del self._recent[key]
+
+    def snapshot(self):
+        with self._lock:
+            data = dict(self.metrics)
+            data["in_flight"] = len(self._calls)
+        return data
@@ -0,0 +1,149 @@
+/*
+ * Subida reanudable por bloques (/uploads/chunked).
+ *
+ * Antes de enviar el form, el archivo de cada <input data-chunked-kind="...">
+ * se manda en bloques con su sha256. Si la red se corta, cada bloque se
+ * reintenta con espera creciente y el servidor indica desde qué offset
+ * continuar; el upload_id se guarda en localStorage, así que también se
+ * reanuda tras recargar la página. Al terminar se finaliza con el sha256 del
+ * archivo completo y el form solo envía el upload_id.
+ * Cada petición lleva el token CSRF del form (X-CSRFToken).
+ * Sin WebCrypto (HTTP sin TLS) o si algo falla, se usa el envío normal.
+ */
+(function () {
+  "use strict";
+
+  var STORE_PREFIX = "c4p-chunked:";
+  var MAX_ATTEMPTS = 6;
+
+  function hex(buffer) {
+    return Array.prototype.map.call(new Uint8Array(buffer), function (b) {
+      return ("0" + b.toString(16)).slice(-2);
+    }).join("");
+  }
+
+  function sha256(blob) {
+    return blob.arrayBuffer().then(function (data) {
+      return crypto.subtle.digest("SHA-256", data);
+    }).then(hex);
+  }
+
+  function wait(ms) {
+    return new Promise(function (resolve) { setTimeout(resolve, ms); });
+  }
+
+  function csrfToken(form) {
+    var input = form.querySelector('input[name="csrf_token"]');
+    return input ? input.value : "";
+  }
+
+  function request(method, url, token, body, headers) {
+    headers = headers || { "Content-Type": "application/json" };
+    headers["X-CSRFToken"] = token;
+    return fetch(url, {
+      method: method,
+      credentials: "same-origin",
+      headers: headers,
+      body: body
+    }).then(function (resp) {
+      return resp.json().catch(function () { return {}; }).then(function (data) {
+        data.status = resp.status;
+        return data;
+      });
+    });
+  }
+
+  function storeKey(file) {
+    return STORE_PREFIX + [file.name, file.size, file.lastModified].join(":");
+  }
+
+  // Reanuda una subida previa del mismo archivo o inicia una nueva
+  function start(baseUrl, token, kind, file) {
+    var saved = localStorage.getItem(storeKey(file));
+    var resume = saved
+      ? request("GET", baseUrl + "/" + saved, token, undefined, {})
+      : Promise.resolve({ status: 404 });
+    return resume.then(function (state) {
+      if (state.status === 200) return state;
+      return request("POST", baseUrl, token, JSON.stringify({ kind: kind, filename: file.name, size: file.size }))
+        .then(function (created) {
+          if (created.status !== 201) throw new Error(created.error || "init: HTTP " + created.status);
+          localStorage.setItem(storeKey(file), created.upload_id);
+          return created;
+        });
+    });
+  }
+
+  function sendChunk(url, token, file, offset, chunkSize, attempt) {
+    var chunk = file.slice(offset, Math.min(offset + chunkSize, file.size));
+    return sha256(chunk).then(function (digest) {
+      return request("PUT", url + "?offset=" + offset, token, chunk, {
+        "Content-Type": "application/octet-stream",
+        "X-Chunk-SHA256": digest
+      });
+    }).then(function (resp) {
+      if (resp.status === 200 || resp.status === 409) return resp.offset;
+      var err = new Error(resp.error || "append: HTTP " + resp.status);
+      // 4xx (salvo 429) no se arregla reintentando
+      err.fatal = resp.status >= 400 && resp.status < 500 && resp.status !== 429;
+      throw err;
+    }).catch(function (err) {
+      if (err.fatal || attempt >= MAX_ATTEMPTS) throw err;
+      return wait(Math.min(1000 * Math.pow(2, attempt), 15000)).then(function () {
+        return sendChunk(url, token, file, offset, chunkSize, attempt + 1);
+      });
+    });
+  }
+
+  function upload(form, input, progress) {
+    var file = input.files[0];
+    var baseUrl = form.dataset.chunkedUrl;
+    var token = csrfToken(form);
+    return start(baseUrl, token, input.dataset.chunkedKind, file).then(function (state) {
+      var url = baseUrl + "/" + state.upload_id;
+
+      function next(offset) {
+        progress(offset / file.size);
+        if (state.assembled || offset >= file.size) return Promise.resolve();
+        return sendChunk(url, token, file, offset, state.chunk_size, 0).then(next);
+      }
+
+      return next(state.offset).then(function () {
+        return sha256(file);
+      }).then(function (digest) {
+        return request("POST", url + "/finalize", token, JSON.stringify({ sha256: digest }));
+      }).then(function (resp) {
+        if (resp.status !== 200) throw new Error(resp.error || "finalize: HTTP " + resp.status);
+        form.querySelector('input[name="' + input.dataset.chunkedKind + '_upload_id"]').value = state.upload_id;
+        input.disabled = true;
+      });
+    });
+  }
+
+  if (!window.crypto || !crypto.subtle || !window.fetch) return;
+
+  document.querySelectorAll("form[data-chunked-url]").forEach(function (form) {
+    form.addEventListener("submit", function (event) {
+      if (form.dataset.chunkedDone) return;
+      var input = form.querySelector("input[type=file][data-chunked-kind]");
+      if (!input || !input.files.length) return;
+
+      event.preventDefault();
+      var button = form.querySelector("[type=submit]");
+      var label = button ? button.textContent : "";
+      if (button) button.disabled = true;
+
+      upload(form, input, function (fraction) {
+        if (button) button.textContent = "Subiendo archivo… " + Math.floor(fraction * 100) + "%";
+      }).catch(function (err) {
+        console.warn("Subida por bloques no disponible, se usa el envío normal:", err);
+        input.disabled = false;
+        form.querySelector('input[name="' + input.dataset.chunkedKind + '_upload_id"]').value = "";
+      }).then(function () {
+        if (button) button.textContent = label;
+        form.dataset.chunkedDone = "1";
+        form.submit();
+      });
+    });
+  });
+})();
@@ -0,0 +1,106 @@
+/*
+ * Subida directa navegador -> almacenamiento.
+ *
+ * Antes de enviar el form, cada <input type="file" data-direct-kind="..."> con
+ * archivo pide parámetros firmados a data-sign-url, sube el archivo directo y
+ * guarda el descriptor en el campo oculto <kind>_direct. El archivo ya no
+ * viaja al servidor. Si algo falla, los archivos que sí se subieron se mandan
+ * a borrar (data-discard-url) y el form se envía como multipart normal.
+ */
+(function () {
+  "use strict";
+
+  function directField(form, input) {
+    return form.querySelector('input[name="' + input.dataset.directKind + '_direct"]');
+  }
+
+  // Mismo token CSRF que el form (Flask-WTF lo acepta en X-CSRFToken)
+  function jsonHeaders(form) {
+    var token = form.querySelector('input[name="csrf_token"]');
+    return { "Content-Type": "application/json", "X-CSRFToken": token ? token.value : "" };
+  }
+
+  function sign(form, kind) {
+    return fetch(form.dataset.signUrl, {
+      method: "POST",
+      credentials: "same-origin",
+      headers: jsonHeaders(form),
+      body: JSON.stringify({ kind: kind })
+    }).then(function (resp) {
+      if (!resp.ok) throw new Error("firma: HTTP " + resp.status);
+      return resp.json();
+    });
+  }
+
+  function uploadOne(form, input) {
+    var file = input.files[0];
+    return sign(form, input.dataset.directKind).then(function (params) {
+      var ext = file.name.split(".").pop().toLowerCase();
+      // Fuera de límites: el envío normal muestra el mensaje de error del servidor
+      if (params.extensions.indexOf(ext) === -1 || file.size > params.max_bytes) {
+        throw new Error("archivo fuera de límites");
+      }
+      var data = new FormData();
+      Object.keys(params.fields).forEach(function (name) {
+        data.append(name, params.fields[name]);
+      });
+      data.append("file", file);
+      return fetch(params.upload_url, { method: "POST", body: data });
+    }).then(function (resp) {
+      if (!resp.ok) throw new Error("subida: HTTP " + resp.status);
+      return resp.json();
+    });
+  }
+
+  // Subidas que ningún form va a referenciar: el servidor las borra
+  function discard(form, uploads) {
+    if (!uploads.length || !form.dataset.discardUrl) return Promise.resolve();
+    return fetch(form.dataset.discardUrl, {
+      method: "POST",
+      credentials: "same-origin",
+      headers: jsonHeaders(form),
+      body: JSON.stringify({ uploads: uploads })
+    }).catch(function (err) {
+      console.warn("No se pudieron descartar las subidas:", err);
+    });
+  }
+
+  document.querySelectorAll("form[data-sign-url]").forEach(function (form) {
+    form.addEventListener("submit", function (event) {
+      if (form.dataset.directDone) return;
+      var inputs = Array.prototype.filter.call(
+        form.querySelectorAll("input[type=file][data-direct-kind]"),
+        function (input) { return input.files.length > 0; }
+      );
+      if (!inputs.length) return;
+
+      event.preventDefault();
+      var button = form.querySelector("[type=submit]");
+      if (button) button.disabled = true;
+
+      // Se espera a todas (también a las que siguen en curso cuando otra falla)
+      Promise.all(inputs.map(function (input) {
+        return uploadOne(form, input).then(
+          function (descriptor) { return { input: input, descriptor: descriptor }; },
+          function (err) { return { input: input, error: err }; }
+        );
+      })).then(function (results) {
+        var failed = results.filter(function (r) { return r.error; });
+        if (!failed.length) {
+          results.forEach(function (r) {
+            directField(form, r.input).value = JSON.stringify(r.descriptor);
+            r.input.disabled = true;
+          });
+          return;
+        }
+        console.warn("Subida directa no disponible, se usa el envío normal:", failed[0].error);
+        return discard(form, results.filter(function (r) { return !r.error; }).map(function (r) {
+          return { kind: r.input.dataset.directKind, descriptor: r.descriptor };
+        }));
+      }).then(function () {
+        form.dataset.directDone = "1";
+        form.submit();
+      });
+    });
+  });
+})();
@@ -0,0 +1,305 @@
+"""
+Backends de almacenamiento de archivos (CV, fotos, propuestas).
+
+- CloudinaryStorage: comportamiento histórico (sube al CDN de Cloudinary).
+- LocalStorage: disco local, una llave única por subida (sha256 del
+  contenido + sufijo aleatorio) con shards de 2 niveles; la app lo sirve
+  con send_file (Range / ETag) o lo delega al proxy con X-Accel-Redirect /
+  X-Sendfile.
+
+La app elige el backend con STORAGE_BACKEND=cloudinary|local.
+
+Subida directa (DIRECT_UPLOADS=1): si el backend lo soporta, el navegador
+sube el archivo directo al almacenamiento con parámetros firmados por la app
+y solo envía de regreso el descriptor del recurso, que la app verifica antes
+de guardar la URL.
+"""
+import hashlib
+import os
+import re
+import secrets
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+import cloudinary
+import cloudinary.api
+import cloudinary.uploader
+import cloudinary.utils
+from werkzeug.utils import secure_filename
+
+COPY_CHUNK = 1024 * 1024
+READ_TIMEOUT = 30
+
+
+class FileTooLargeError(ValueError):
+    pass
+
+
+def _read_limited(fh, max_bytes):
+    data = fh.read(max_bytes + 1 if max_bytes else -1)
+    if max_bytes and len(data) > max_bytes:
+        raise FileTooLargeError(f"más de {max_bytes} bytes")
+    return data
+
+
+class StorageBackend:
+    name = "base"
+    supports_direct_upload = False
+
+    def save(self, file, folder):
+        """Guarda un FileStorage (o similar) y regresa su URL pública, o None."""
+        raise NotImplementedError
+
+    def delete(self, url):
+        raise NotImplementedError
+
+    def read(self, url, max_bytes=None):
+        """
+        Contenido del archivo (bytes), o None si no existe. Lanza
+        FileTooLargeError si pasa de max_bytes.
+        """
+        raise NotImplementedError
+
+    def direct_upload_params(self, folder, allowed_formats=None):
+        """Parámetros firmados para que el navegador suba directo a `folder`."""
+        raise NotImplementedError
+
+    def verify_direct_upload(self, descriptor, folder):
+        """
+        Descriptor devuelto por el almacenamiento -> dict con url, bytes,
+        extension y original_filename; None si no es auténtico o no está en
+        `folder`. bytes y extension salen del almacenamiento, no del
+        descriptor.
+        """
+        raise NotImplementedError
+
+# =========================
+# CLOUDINARY
+# =========================
+
+# Las transformaciones de entrega (p.ej. "c_fill,w_96/") van antes de la versión
+CLOUDINARY_URL_RE = re.compile(r"/(image|video|raw)/upload/(?:(?:[^/]+/)*?v\d+/)?(?P<path>.+)$")
+
+# Parámetros que el navegador manda tal cual a Cloudinary (todos entran en la firma)
+DIRECT_UPLOAD_OPTIONS = {"use_filename": "true", "unique_filename": "true"}
+
+
+class CloudinaryStorage(StorageBackend):
+    name = "cloudinary"
+
+    def __init__(self, upload_preset="c4p_public"):
+        self.upload_preset = upload_preset
+
+    def save(self, file, folder):
+        if not file or file.filename == "":
+            return None
+
+        result = cloudinary.uploader.upload(
+            file,
+            folder=folder,
+            upload_preset=self.upload_preset,
+            resource_type="auto",
+            use_filename=True,
+            unique_filename=True,
+            overwrite=False
+        )
+        return result.get("secure_url")
+
+    @staticmethod
+    def parse_url(file_url):
+        """URL de entrega -> (resource_type, public_id) o None."""
+        m = CLOUDINARY_URL_RE.search(file_url or "")
+        if not m:
+            return None
+        resource_type, path = m.group(1), m.group("path")
+        # En recursos "raw" la extensión es parte del public_id
+        public_id = path if resource_type == "raw" else os.path.splitext(path)[0]
+        return resource_type, public_id
+
+    def delete(self, file_url):
+        parsed = self.parse_url(file_url)
+        if not parsed:
+            return
+        resource_type, public_id = parsed
+        try:
+            cloudinary.uploader.destroy(public_id, resource_type=resource_type)
+        except Exception as e:
+            print("❌ Error al eliminar en Cloudinary:", e)
+
+    def read(self, file_url, max_bytes=None):
+        # Los recursos son públicos: se descarga la URL de entrega
+        if not self.parse_url(file_url):
+            return None
+        try:
+            with urllib.request.urlopen(file_url, timeout=READ_TIMEOUT) as resp:
+                return _read_limited(resp, max_bytes)
+        except urllib.error.HTTPError as e:
+            if e.code == 404:
+                return None
+            raise
+
+    # ---- Subida directa (upload firmado) ----
+
+    @property
+    def supports_direct_upload(self):
+        config = cloudinary.config()
+        return bool(config.cloud_name and config.api_key and config.api_secret)
+
+    def direct_upload_params(self, folder, allowed_formats=None):
+        config = cloudinary.config()
+        # Cloudinary rechaza firmas con timestamp de más de 1 hora
+        fields = {"folder": folder, "timestamp": str(int(time.time())), **DIRECT_UPLOAD_OPTIONS}
+        if allowed_formats:
+            # Firmado: el navegador no lo puede quitar ni cambiar
+            fields["allowed_formats"] = ",".join(sorted(allowed_formats))
+        fields["signature"] = cloudinary.utils.api_sign_request(fields, config.api_secret)
+        fields["api_key"] = config.api_key
+        return {
+            "upload_url": f"https://api.cloudinary.com/v1_1/{config.cloud_name}/auto/upload",
+            "fields": fields,
+        }
+
+    def verify_direct_upload(self, descriptor, folder):
+        try:
+            public_id = str(descriptor["public_id"])
+            version = str(descriptor["version"])
+            signature = str(descriptor["signature"])
+            secure_url = str(descriptor["secure_url"])
+        except (KeyError, TypeError, ValueError):
+            return None
+
+        # La firma de la respuesta solo la puede generar quien tiene el api_secret
+        if not cloudinary.utils.verify_api_response_signature(public_id, version, signature):
+            return None
+        if not public_id.startswith(folder.rstrip("/") + "/"):
+            return None
+
+        # La URL no está firmada: se valida contra la cuenta y el public_id verificados
+        cloud_name = cloudinary.config().cloud_name
+        parsed = self.parse_url(secure_url)
+        if (not secure_url.startswith(f"https://res.cloudinary.com/{cloud_name}/")
+                or not parsed or parsed[1] != public_id):
+            return None
+
+        # Solo public_id y version van firmados: tamaño y formato se piden a la
+        # Admin API (bytes/format del descriptor los puede editar el cliente)
+        resource_type = parsed[0]
+        try:
+            info = cloudinary.api.resource(public_id, resource_type=resource_type)
+            size = int(info["bytes"])
+        except Exception as e:
+            print("❌ Error al consultar el recurso en Cloudinary:", e)
+            return None
+        if info.get("resource_type", resource_type) != resource_type:
+            return None
+
+        # En recursos "raw" no hay format: la extensión es parte del public_id
+        extension = info.get("format") or os.path.splitext(public_id)[1].lstrip(".")
+        return {
+            "url": secure_url,
+            "bytes": size,
+            "extension": str(extension).lower(),
+            "original_filename": str(descriptor.get("original_filename") or ""),
+        }
+
+    @staticmethod
+    def transformed_url(file_url, transformation):
+        """Inserta una transformación de entrega (p.ej. "c_fill,w_96,h_96") en la URL."""
+        return file_url.replace("/image/upload/", f"/image/upload/{transformation}/", 1)
+
+# =========================
+# DISCO LOCAL
+# =========================
+
+# <sha256>-<sufijo>; las llaves sin sufijo son de antes (se siguen sirviendo)
+LOCAL_KEY_RE = re.compile(r"^[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}(-[0-9a-f]{16})?(\.[a-z0-9]{1,8})?$")
+
+
+class LocalStorage(StorageBackend):
+    """
+    Archivos en <root>/<h[0:2]>/<h[2:4]>/<sha256>-<sufijo><ext>. Cada subida
+    tiene su propia llave aunque el contenido se repita (entre usuarios o
+    tipos de archivo), así borrar una no rompe otra; el contenido de una
+    llave nunca cambia, los archivos se pueden cachear como inmutables.
+    """
+    name = "local"
+
+    def __init__(self, root, url_prefix="/files"):
+        self.root = os.path.abspath(root)
+        self.url_prefix = url_prefix.rstrip("/")
+        os.makedirs(self.root, exist_ok=True)
+
+    def save(self, file, folder):
+        if not file or file.filename == "":
+            return None
+
+        ext = os.path.splitext(secure_filename(file.filename))[1].lower()
+        if not re.fullmatch(r"(\.[a-z0-9]{1,8})?", ext):
+            ext = ""
+
+        # Se copia por bloques mientras se calcula el hash (no se carga en memoria)
+        digest = hashlib.sha256()
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, prefix=".upload-")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                while True:
+                    chunk = file.read(COPY_CHUNK)
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+                    out.write(chunk)
+
+            h = digest.hexdigest()
+            key = f"{h[:2]}/{h[2:4]}/{h}-{secrets.token_hex(8)}{ext}"
+            final_path = self.path_for(key)
+            os.makedirs(os.path.dirname(final_path), exist_ok=True)
+            os.replace(tmp_path, final_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        return f"{self.url_prefix}/{key}"
+
+    def key_for(self, url):
+        prefix = self.url_prefix + "/"
+        if not url or not url.startswith(prefix):
+            return None
+        key = url[len(prefix):]
+        return key if LOCAL_KEY_RE.match(key) else None
+
+    def path_for(self, key):
+        if not LOCAL_KEY_RE.match(key):
+            raise ValueError(f"llave inválida: {key!r}")
+        return os.path.join(self.root, *key.split("/"))
+
+    def read(self, url, max_bytes=None):
+        key = self.key_for(url)
+        if not key:
+            return None
+        try:
+            with open(self.path_for(key), "rb") as fh:
+                return _read_limited(fh, max_bytes)
+        except FileNotFoundError:
+            return None
+
+    def delete(self, url):
+        key = self.key_for(url)
+        if not key:
+            return
+        try:
+            os.remove(self.path_for(key))
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print("❌ Error al eliminar archivo local:", e)
+
+
+def create_storage(kind, local_root=None, url_prefix="/files"):
+    if kind == "local":
+        return LocalStorage(local_root, url_prefix=url_prefix)
+    if kind == "cloudinary":
+        return CloudinaryStorage()
+    raise ValueError(f"STORAGE_BACKEND desconocido: {kind!r}")